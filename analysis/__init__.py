@@ -2,7 +2,8 @@
 analysis
 ========
 Tiny convenience package that re-exports the single plotting helper
-from each module so users can do ::
+from each module (plus the shared readers they are built on) so users
+can do ::
 
     from analysis import plot_pe, plot_bsf, ...
 
@@ -14,3 +15,10 @@ from .plot_BSF import plot_bsf            # noqa: F401
 from .plot_SD import plot_sd              # noqa: F401
 from .plot_cSize import plot_csize        # noqa: F401
 from .plot_radialDist import plot_radial_distribution as plot_radialDist  # noqa: F401
+from .lammps_data import read_data        # noqa: F401
+from .snapshot import Snapshot           # noqa: F401
+from .lammps_dump import iter_dump        # noqa: F401
+from .dump_index import DumpIndex        # noqa: F401
+from .traj_store import TrajStore, convert_dump  # noqa: F401
+from .column_files import (read_thermo, read_bonddata,  # noqa: F401
+                           read_colvars_traj, read_hills_traj)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Array kernels for graphs given as bond lists – components, degrees and
+edge multiplicities without building a graph object.
+
+Typical usage
+-------------
+>>> from analysis.lammps_data import read_data
+>>> from analysis.bond_graph import node_index, components, pair_counts
+>>> data = read_data("final_state_Run1.DATA")
+>>> chains, edges = node_index(data.mols, data.mols[data.atom_index(data.bonds)])
+>>> n_clusters, label = components(edges, len(chains))
+>>> pairs, mult = pair_counts(edges)        # unique chain pairs, # of bonds each
+
+Nodes are rows ``0 … n-1``; edges are an ``(M, 2)`` integer array and are
+undirected.  Components come from :py:func:`scipy.sparse.csgraph.connected_components`
+on a CSR adjacency assembled from the edge array, and pair statistics
+from ``np.unique`` over ``lo * n + hi`` keys packed into one int64, so
+memory stays at a few bytes per bond.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+
+def node_index(node_ids: np.ndarray, edges: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Map arbitrary node IDs (e.g. molecule IDs) to rows ``0 … n-1``.
+
+    Parameters
+    ----------
+    node_ids
+        IDs of all nodes, repeats allowed (e.g. ``LammpsData.mols``).
+    edges
+        ``(M, 2)`` edges in terms of those IDs.
+
+    Returns
+    -------
+    nodes, rows
+        Sorted unique IDs and the ``(M, 2)`` edges as row indices.
+    """
+    nodes = np.unique(node_ids)
+    edges = np.asarray(edges).reshape(-1, 2)
+    return nodes, np.searchsorted(nodes, edges)
+
+
+def adjacency(edges: np.ndarray, n_nodes: int):
+    """Symmetric CSR adjacency (entries count parallel edges)."""
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    rows = np.concatenate([edges[:, 0], edges[:, 1]])
+    cols = np.concatenate([edges[:, 1], edges[:, 0]])
+    data = np.ones(len(rows), dtype=np.int32)
+    return coo_matrix((data, (rows, cols)), shape=(n_nodes, n_nodes)).tocsr()
+
+
+def components(edges: np.ndarray, n_nodes: int) -> tuple[int, np.ndarray]:
+    """
+    Connected components, isolated nodes included.
+
+    Returns
+    -------
+    n_components, labels
+        Number of components and the component label of every node.
+    """
+    return connected_components(adjacency(edges, n_nodes), directed=False)
+
+
+def pair_keys(edges: np.ndarray, n_nodes: int) -> np.ndarray:
+    """``lo * n + hi`` int64 key of each edge, independent of its direction."""
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    return edges.min(axis=1) * n_nodes + edges.max(axis=1)
+
+
+def pair_counts(edges: np.ndarray, n_nodes: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Unique undirected node pairs and how many edges join each.
+
+    Returns
+    -------
+    pairs, counts
+        ``(K, 2)`` pairs with ``lo <= hi`` and their multiplicities.
+    """
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    if n_nodes is None:
+        n_nodes = int(edges.max()) + 1 if len(edges) else 1
+    keys, counts = np.unique(pair_keys(edges, n_nodes), return_counts=True)
+    return np.column_stack([keys // n_nodes, keys % n_nodes]), counts
+
+
+def degrees(edges: np.ndarray, n_nodes: int, simple: bool = True) -> np.ndarray:
+    """
+    Degree of every node.
+
+    Parameters
+    ----------
+    simple
+        Count distinct neighbours (parallel edges collapsed, self-loops
+        dropped) instead of edge ends.
+    """
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    if simple:
+        edges, _ = pair_counts(edges[edges[:, 0] != edges[:, 1]], n_nodes)
+    return np.bincount(edges.ravel(), minlength=n_nodes)
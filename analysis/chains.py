@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Chain-major views of per-atom arrays and per-chain reductions.
+
+Typical usage
+-------------
+>>> from analysis.snapshot import Snapshot
+>>> snap = Snapshot.read("final_state_Run1.DATA")
+>>> lay = snap.layout
+>>> lay.regular, lay.shape                  # 200 chains of 70 beads
+(True, (200, 70))
+>>> x = lay.unwrap(snap.chain_coords, snap.box_lengths)   # (200, 70, 3)
+>>> rg = lay.radii_of_gyration(x)           # (200,)
+>>> ree = lay.end_to_end(x)                 # (200, 3)
+
+``writeSysLT.generate_syslt`` numbers the beads chain by chain, every
+chain has ``len(seg) * n`` beads, and both the data and the dump readers
+sort rows by atom ID.  Molecule IDs therefore come in equal, contiguous
+runs, and :py:meth:`ChainLayout.view` is just a ``reshape`` to
+``(n_chains, chain_len, ...)`` – no copy.  Anything else (chains of
+different length, rows not grouped by molecule, a type-filtered subset)
+falls back to a padded copy built with one fancy-indexing call; padding
+entries are excluded through :py:attr:`ChainLayout.mask`.
+
+Within a chain, beads stay in row (= ID) order, which is the sequence
+order of the build.  Per-sequence quantities are then plain slicing,
+e.g. the stickers of every chain::
+
+    keep = np.isin(snap.types, STICKER_TYPES)
+    stickers = ChainLayout.detect(snap.mols[keep]).view(snap.coords[keep])
+
+The reductions take chain-major arrays, with any number of leading axes
+(e.g. frames of a :py:meth:`analysis.traj_store.TrajStore.read` stack
+viewed with ``axis=1``).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class ChainLayout:
+    """
+    Where the beads of every chain sit in a per-atom array.
+
+    Attributes
+    ----------
+    chains
+        Sorted unique molecule IDs; chain *k* is ``chains[k]``.
+    lengths
+        Number of beads of every chain.
+    index
+        ``(n_chains, chain_len)`` row of every bead (0 for padding), or
+        *None* for a regular layout.
+    mask
+        ``(n_chains, chain_len)`` *True* for real beads, or *None* for a
+        regular layout.
+    """
+
+    chains: np.ndarray
+    lengths: np.ndarray
+    index: Optional[np.ndarray] = None
+    mask: Optional[np.ndarray] = None
+
+    @classmethod
+    def detect(cls, mols: np.ndarray) -> "ChainLayout":
+        """
+        Layout of the per-atom molecule IDs *mols* (rows in ID order).
+
+        Regular when *mols* is non-decreasing and every molecule has the
+        same number of rows; otherwise a padded index is built.
+        """
+        mols = np.asarray(mols)
+        if len(mols) == 0:
+            return cls(np.empty(0, mols.dtype), np.empty(0, np.int64))
+
+        order = None
+        if not np.all(mols[1:] >= mols[:-1]):
+            order = np.argsort(mols, kind="stable")
+        grouped = mols if order is None else mols[order]
+        starts = np.flatnonzero(np.r_[True, grouped[1:] != grouped[:-1]])
+        chains, lengths = grouped[starts], np.diff(np.r_[starts, len(mols)])
+        if order is None and np.all(lengths == lengths[0]):
+            return cls(chains, lengths)
+
+        mask = np.arange(lengths.max()) < lengths[:, None]
+        index = np.zeros(mask.shape, dtype=np.intp)
+        index[mask] = np.arange(len(mols)) if order is None else order
+        return cls(chains, lengths, index, mask)
+
+    @property
+    def regular(self) -> bool:
+        """*True* when :py:meth:`view` is a zero-copy reshape."""
+        return self.index is None
+
+    @property
+    def n_chains(self) -> int:
+        return len(self.chains)
+
+    @property
+    def chain_len(self) -> int:
+        """Beads of the longest chain (the padded length)."""
+        return int(self.lengths.max()) if len(self.lengths) else 0
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.n_chains, self.chain_len
+
+    # ---- views ---------------------------------------------------------
+    def view(self, values: np.ndarray, axis: int = 0, fill=0) -> np.ndarray:
+        """
+        *values* with its atom axis split into ``(n_chains, chain_len)``.
+
+        Parameters
+        ----------
+        values
+            Per-atom array, e.g. ``(N,)`` types, ``(N, 3)`` coordinates
+            or a ``(F, N, 3)`` stack of frames.
+        axis
+            Position of the atom axis in *values*.
+        fill
+            Value of the padding entries (irregular layouts only).
+
+        Returns
+        -------
+        numpy.ndarray
+            A view of *values* for a regular layout (when *values* is
+            contiguous), else a padded copy.
+        """
+        values = np.asarray(values)
+        axis = axis % values.ndim
+        if self.regular:
+            shape = values.shape[:axis] + self.shape + values.shape[axis + 1:]
+            return values.reshape(shape)
+        out = np.take(values, self.index, axis=axis)
+        out[(slice(None),) * axis + (~self.mask,)] = fill
+        return out
+
+    def _weights(self, weights: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        if weights is None:
+            return self.mask
+        return weights if self.mask is None else weights * self.mask
+
+    # ---- per-chain reductions ------------------------------------------
+    def unwrap(self, x: np.ndarray, box_lengths: np.ndarray) -> np.ndarray:
+        """
+        Make chains whole: every bead is moved to the periodic image
+        closest to its predecessor along the chain.
+
+        Parameters
+        ----------
+        x
+            Chain-major ``(..., n_chains, chain_len, 3)`` wrapped positions.
+        box_lengths
+            ``(3,)`` box edge lengths.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        step = np.diff(x, axis=-2)
+        step -= box_lengths * np.rint(step / box_lengths)
+        out = np.empty_like(x)
+        out[..., :1, :] = x[..., :1, :]
+        np.cumsum(step, axis=-2, out=out[..., 1:, :])
+        out[..., 1:, :] += x[..., :1, :]
+        return out
+
+    def centres_of_mass(self, x: np.ndarray,
+                        weights: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        ``(..., n_chains, 3)`` centre of every chain.
+
+        *x* should be unwrapped (see :py:meth:`unwrap`); *weights* are
+        chain-major bead masses (default: all beads equal).
+        """
+        w = self._weights(weights)
+        if w is None:
+            return x.mean(axis=-2)
+        return (x * w[..., None]).sum(axis=-2) / w.sum(axis=-1)[..., None]
+
+    def radii_of_gyration(self, x: np.ndarray,
+                          weights: Optional[np.ndarray] = None) -> np.ndarray:
+        """``(..., n_chains)`` radius of gyration of every chain."""
+        d = x - self.centres_of_mass(x, weights)[..., None, :]
+        sq = np.einsum("...i,...i->...", d, d)
+        w = self._weights(weights)
+        if w is None:
+            return np.sqrt(sq.mean(axis=-1))
+        return np.sqrt((sq * w).sum(axis=-1) / w.sum(axis=-1))
+
+    def end_to_end(self, x: np.ndarray) -> np.ndarray:
+        """``(..., n_chains, 3)`` vector from the first to the last bead."""
+        if self.regular:
+            return x[..., -1, :] - x[..., 0, :]
+        last = x[..., np.arange(self.n_chains), self.lengths - 1, :]
+        return last - x[..., 0, :]
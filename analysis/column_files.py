@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Named-column readers for the whitespace tables a run leaves behind:
+``Thermo_<fName>.dat``, ``BondData_<fName>.dat``, ``*.colvars.traj`` and
+``*.hills.traj``.
+
+Typical usage
+-------------
+>>> from analysis.column_files import read_thermo, read_colvars_traj
+>>> th = read_thermo("Thermo_Run1.dat", usecols=["Steps", "PotEng"])
+>>> th["PotEng"][:3]
+array([-1523.2, -1530.7, -1528.9])
+>>> cv = read_colvars_traj("Run1.colvars.traj")
+>>> cv.dtype.names
+('step', 'Rg1', 'E_meta-radgy', 'E_wall_Rg')
+
+Column names come from the file's own header – the ``title`` of
+``fix print`` (``# Steps Temp KinEng PotEng ...``) or the ``#  step  Rg1 …``
+line Colvars repeats in its trajectories – so selecting by name keeps
+working if the column order of ``fix saveThermo`` changes.  Files without
+a usable header (``BondData_*.dat`` only carries ``# Fix print output for
+fix saveBond``) fall back to the documented layout.
+
+Compressed copies of these files (``Thermo_Run1.dat.gz`` …) are read
+transparently.  The numbers are converted in one bulk C call after all
+comment lines are removed; a partially written last line (the run is
+still going) is ignored.  Results are cached per file on *(path, size, mtime, columns)*.
+"""
+
+from __future__ import annotations
+
+import re
+import warnings
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+try:
+    from .compressed import open_text, read_text
+except ImportError:                      # run as a loose script from analysis/
+    from compressed import open_text, read_text
+
+
+#: Layout of ``fix saveThermo`` in ``Template_input.in``.
+THERMO_COLUMNS = ("Steps", "Temp", "KinEng", "PotEng", "Epair", "Ebond", "Eangle", "Bonds")
+
+#: Layout of ``fix saveBond``: step, cumulative formed, cumulative broken.
+BONDDATA_COLUMNS = ("step", "formed", "broken")
+
+#: Column names treated as integer step counters.
+_STEP_NAMES = {"step", "steps", "timestep"}
+
+_COMMENT_LINE = re.compile(r"^[ \t]*#.*(?:\n|$)", re.MULTILINE)
+_HEADER_LINE = re.compile(r"^[ \t]*#(.*)$", re.MULTILINE)
+
+Columns = Optional[Sequence["int | str"]]
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# low-level parsing
+# ──────────────────────────────────────────────────────────────────────────
+def _bulk_parse(body: str, n_cols: int) -> Optional[np.ndarray]:
+    """``np.fromstring`` fast path; *None* if the body is not a clean
+    numeric table."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        try:
+            flat = np.fromstring(body, dtype=float, sep=" ")
+        except (DeprecationWarning, ValueError):
+            return None
+    if flat.size % n_cols:
+        return None
+    return flat.reshape(-1, n_cols)
+
+
+def _header_names(text: str, n_cols: int) -> Optional[list[str]]:
+    """Names of the last comment line that has one token per column."""
+    for match in reversed(list(_HEADER_LINE.finditer(text))):
+        tokens = match.group(1).split()
+        if len(tokens) == n_cols:
+            return tokens
+    return None
+
+
+def _resolve(names: Sequence[str], wanted: Columns) -> list[int]:
+    if wanted is None:
+        return list(range(len(names)))
+    lower = [n.lower() for n in names]
+    out = []
+    for w in wanted:
+        if isinstance(w, (int, np.integer)):
+            out.append(int(w) % len(names))
+        elif w in names:
+            out.append(names.index(w))
+        elif str(w).lower() in lower:
+            out.append(lower.index(str(w).lower()))
+        else:
+            raise KeyError(f"column '{w}' not found (have: {' '.join(names)})")
+    return out
+
+
+def _parse_table(path: Path,
+                 usecols: Optional[tuple],
+                 default_names: Optional[tuple[str, ...]]) -> np.ndarray:
+    text = read_text(path)
+    if not text.endswith("\n"):
+        text = text[:text.rfind("\n") + 1]              # drop a half-written line
+    body = _COMMENT_LINE.sub("", text)
+
+    first = next((ln for ln in body.splitlines() if ln.strip()), "")
+    n_cols = len(first.split())
+    names = _header_names(text, n_cols)
+    if names is None:
+        names = (list(default_names[:n_cols]) if default_names
+                 and len(default_names) >= n_cols else [])
+        names += [f"c{i}" for i in range(len(names), n_cols)]
+
+    table = _bulk_parse(body, n_cols) if n_cols else np.empty((0, 0))
+    if table is None:
+        table = np.loadtxt(body.splitlines(), comments="#", ndmin=2)
+
+    cols = _resolve(names, usecols)
+    dtype = [(names[c], np.int64 if names[c].lower() in _STEP_NAMES else np.float64)
+             for c in cols]
+    out = np.empty(len(table), dtype=dtype)
+    for (name, _), c in zip(dtype, cols):
+        out[name] = table[:, c]
+    out.setflags(write=False)                          # shared through the cache
+    return out
+
+
+@lru_cache(maxsize=16)
+def _read_memo(path: str, size: int, mtime_ns: int,
+               usecols: Optional[tuple],
+               default_names: Optional[tuple[str, ...]]) -> np.ndarray:
+    return _parse_table(Path(path), usecols, default_names)
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# public API
+# ──────────────────────────────────────────────────────────────────────────
+def read_columns(file_path: str | Path,
+                 usecols: Columns = None,
+                 default_names: Optional[Sequence[str]] = None) -> np.ndarray:
+    """
+    Read a whitespace table with ``#`` comments into a structured array.
+
+    Parameters
+    ----------
+    file_path
+        Text file with one record per line (optionally compressed).
+    usecols
+        Columns to keep, by header name (case-insensitive) or position
+        (negative counts from the end).  Default: all.
+    default_names
+        Names to use when no comment line matches the column count;
+        missing names become ``c0, c1, ...``.
+
+    Returns
+    -------
+    numpy.ndarray
+        Read-only structured array, one field per selected column
+        (``int64`` for step counters, ``float64`` otherwise).
+
+    Raises
+    ------
+    KeyError
+        If a requested column name does not exist.
+    """
+    path = Path(file_path).resolve()
+    st = path.stat()
+    return _read_memo(str(path), st.st_size, st.st_mtime_ns,
+                      tuple(usecols) if usecols is not None else None,
+                      tuple(default_names) if default_names is not None else None)
+
+
+def read_thermo(file_path: str | Path, usecols: Columns = None) -> np.ndarray:
+    """``Thermo_<fName>.dat`` (``fix saveThermo``); names from the title line,
+    else :py:data:`THERMO_COLUMNS`."""
+    return read_columns(file_path, usecols, THERMO_COLUMNS)
+
+
+def read_bonddata(file_path: str | Path, usecols: Columns = None) -> np.ndarray:
+    """``BondData_<fName>.dat`` (``fix saveBond``) as
+    :py:data:`BONDDATA_COLUMNS`."""
+    return read_columns(file_path, usecols, BONDDATA_COLUMNS)
+
+
+def read_colvars_traj(file_path: str | Path, usecols: Columns = None) -> np.ndarray:
+    """``<output>.colvars.traj``; names from the repeated ``#  step  Rg1 …``
+    header.  Only scalar colvars are supported."""
+    return read_columns(file_path, usecols, ("step",))
+
+
+def read_hills_traj(file_path: str | Path, usecols: Columns = None) -> np.ndarray:
+    """
+    ``<output>.colvars.<bias>.hills.traj``.
+
+    Rows are ``step, centre(s), width(s), height``; without a header the
+    fields are named ``step, center_1.., width_1.., height``.
+    """
+    path = Path(file_path)
+    with open_text(path) as fh:
+        first = next((ln for ln in fh if ln.strip() and not ln.lstrip().startswith("#")), "")
+    n_cv = max((len(first.split()) - 2) // 2, 0)
+    names = (("step",) + tuple(f"center_{i + 1}" for i in range(n_cv))
+             + tuple(f"width_{i + 1}" for i in range(n_cv)) + ("height",))
+    return read_columns(path, usecols, names)
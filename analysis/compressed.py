@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Transparent access to compressed run outputs (``traj_Run1.dump.gz``,
+``final_state_Run1.DATA.xz`` …).
+
+Typical usage
+-------------
+>>> from analysis.compressed import detect, open_binary, read_text
+>>> detect("traj_Run1.dump.gz")
+'gzip'
+>>> with open_binary("traj_Run1.dump.gz") as fh:      # decompresses while reading
+...     head = fh.read(1 << 22)
+>>> text = read_text("final_state_Run1.DATA.xz")
+
+The format is recognised from the first bytes of the file, not from its
+name, so renamed files work and plain text passes straight through.
+gzip, bzip2 and xz use the standard library; zstd needs the optional
+``zstandard`` package.  Nothing is ever decompressed to a temporary file.
+
+:py:func:`open_random` reads byte ranges by *decompressed* offset, which
+is what :py:class:`analysis.dump_index.DumpIndex` needs to seek to a frame.
+For gzip it keeps snapshots of the inflate state every ``spacing``
+decompressed bytes, so a read only inflates from the nearest snapshot
+(snapshots are ``zlib`` objects, kept in memory by the reader that took
+them and never written to disk or sent to another process); the other
+formats stream forward and restart from the top on a backwards
+seek.
+"""
+
+from __future__ import annotations
+
+import bz2
+import gzip
+import io
+import lzma
+import zlib
+from bisect import bisect_right
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+try:
+    import zstandard
+except ImportError:                      # optional: only needed for *.zst files
+    zstandard = None
+
+
+#: Leading bytes of each supported container.
+MAGIC = {
+    "gzip": b"\x1f\x8b",
+    "bz2": b"BZh",
+    "xz": b"\xfd7zXZ\x00",
+    "zstd": b"\x28\xb5\x2f\xfd",
+}
+
+_BLOCK = 1 << 22                         # bytes per read from disk / decompressor
+_GZIP_READ = 1 << 18                     # compressed bytes fed per inflate step
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# detection and streaming
+# ──────────────────────────────────────────────────────────────────────────
+def detect(path: str | Path) -> Optional[str]:
+    """Compression format of *path* (a key of :py:data:`MAGIC`), or *None*
+    for an uncompressed file."""
+    with Path(path).open("rb") as fh:
+        head = fh.read(8)
+    for name, magic in MAGIC.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def _zstd_reader(path: Path) -> BinaryIO:
+    if zstandard is None:
+        raise ImportError(f"{path} is zstd-compressed; install the 'zstandard' package")
+    return zstandard.ZstdDecompressor().stream_reader(path.open("rb"),
+                                                      read_size=_BLOCK,
+                                                      closefd=True)
+
+
+def open_binary(path: str | Path) -> BinaryIO:
+    """
+    Open *path* for binary reading, decompressing on the fly if needed.
+
+    Returns
+    -------
+    BinaryIO
+        File object whose ``read(n)`` returns decompressed bytes; use it
+        as a context manager.
+
+    Raises
+    ------
+    ImportError
+        For a zstd file when ``zstandard`` is not installed.
+    """
+    path = Path(path)
+    kind = detect(path)
+    if kind is None:
+        return path.open("rb", buffering=_BLOCK)
+    if kind == "gzip":
+        return gzip.open(path, "rb")
+    if kind == "bz2":
+        return bz2.open(path, "rb")
+    if kind == "xz":
+        return lzma.open(path, "rb")
+    return io.BufferedReader(_zstd_reader(path), buffer_size=_BLOCK)
+
+
+def open_text(path: str | Path) -> io.TextIOWrapper:
+    """Text-mode counterpart of :py:func:`open_binary`."""
+    return io.TextIOWrapper(open_binary(path))
+
+
+def read_text(path: str | Path) -> str:
+    """Whole (decompressed) content of *path* as a string."""
+    with open_binary(path) as fh:
+        return fh.read().decode()
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# random access by decompressed offset
+# ──────────────────────────────────────────────────────────────────────────
+class _FileAccess:
+    """Plain file: seek and read."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        with self.path.open("rb") as fh:
+            fh.seek(offset)
+            return fh.read(size)
+
+    def close(self) -> None:
+        pass
+
+
+class _StreamAccess:
+    """
+    Forward-only decompressed stream (bzip2, xz, zstd): reads past the
+    current position skip ahead, earlier ones reopen the file.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.stream: Optional[BinaryIO] = None
+        self.pos = 0
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        if self.stream is None or offset < self.pos:
+            self.close()
+            self.stream, self.pos = open_binary(self.path), 0
+        try:
+            while self.pos < offset:
+                skipped = len(self.stream.read(min(offset - self.pos, _BLOCK)))
+                if not skipped:
+                    return b""
+                self.pos += skipped
+            data = self.stream.read(size)
+        except EOFError:                        # archive still being written
+            self.close()
+            return b""
+        self.pos += len(data)
+        return data
+
+    def close(self) -> None:
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+
+class _GzipAccess:
+    """
+    gzip with inflate-state snapshots.
+
+    ``points`` holds ``(decompressed offset, compressed offset, state)``;
+    ``state`` is a ``zlib`` decompressor copied right after that many
+    compressed bytes were fed.  Reading resumes from the live cursor when
+    it is at or before the target, otherwise from a copy of the nearest
+    snapshot.  Concatenated gzip members are followed.
+    """
+
+    def __init__(self, path: Path, spacing: int) -> None:
+        self.path = path
+        self.spacing = spacing
+        self.points = [(0, 0, zlib.decompressobj(zlib.MAX_WBITS | 16))]
+        self._cursor: Optional[list] = None        # [u0, buf, c, state]
+
+    def _start(self, offset: int) -> list:
+        k = bisect_right([p[0] for p in self.points], offset) - 1
+        cur = self._cursor
+        if cur is not None and cur[0] <= offset and cur[0] + len(cur[1]) >= self.points[k][0]:
+            return cur
+        u, c, state = self.points[k]
+        return [u, b"", c, state.copy()]
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        u0, buf, c, d = self._start(offset)
+        buf = bytearray(buf)
+        end = offset + size
+        with self.path.open("rb") as fh:
+            fh.seek(c)
+            while u0 + len(buf) < end:
+                chunk = fh.read(_GZIP_READ)
+                if not chunk:
+                    break
+                c += len(chunk)
+                while chunk:
+                    if d.eof:                          # next gzip member
+                        if not MAGIC["gzip"].startswith(chunk[:2]):
+                            break                      # trailing padding
+                        d = zlib.decompressobj(zlib.MAX_WBITS | 16)
+                    buf += d.decompress(chunk)
+                    chunk = d.unused_data if d.eof else b""
+                if u0 < offset:                        # drop what lies before the target
+                    cut = min(offset - u0, len(buf))
+                    del buf[:cut]
+                    u0 += cut
+                top = u0 + len(buf)
+                if top >= self.points[-1][0] + self.spacing:
+                    self.points.append((top, c, d.copy()))
+
+        lo = max(offset - u0, 0)
+        out = bytes(buf[lo:lo + size])
+        self._cursor = [offset + len(out), bytes(buf[lo + len(out):]), c, d]
+        return out
+
+    def close(self) -> None:
+        self._cursor = None
+
+
+def open_random(path: str | Path, spacing: int = 1 << 24):
+    """
+    Reader with ``read_at(offset, size)`` by decompressed byte offset.
+
+    Parameters
+    ----------
+    path
+        Plain or compressed file.
+    spacing
+        Decompressed bytes between gzip inflate snapshots (each costs
+        about 40 kB of memory).
+
+    Returns
+    -------
+    object
+        Has ``read_at(offset, size) -> bytes`` (short at end of data) and
+        ``close()``.
+    """
+    path = Path(path)
+    kind = detect(path)
+    if kind is None:
+        return _FileAccess(path)
+    if kind == "gzip":
+        return _GzipAccess(path, spacing)
+    return _StreamAccess(path)
+
+
+class _Sequential:
+    """``read(n)`` view of an :py:func:`open_random` reader, starting at
+    decompressed byte *offset*."""
+
+    def __init__(self, access, offset: int = 0) -> None:
+        self.access = access
+        self.pos = offset
+
+    def read(self, n: int = _BLOCK) -> bytes:
+        data = self.access.read_at(self.pos, n)
+        self.pos += len(data)
+        return data
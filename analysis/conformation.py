@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Chain conformations – Rg, end-to-end distance and internal distances –
+inside and outside the condensate.
+
+Typical usage
+-------------
+>>> from analysis.conformation import chain_statistics
+>>> cs = chain_statistics("traj_Run1.dump", cutoff=15.0)
+>>> cs.rg("dense"), cs.rg("dilute")                 # √⟨Rg²⟩ [Å]
+>>> s, r = cs.internal("dilute")                   # √⟨R²(|i − j|)⟩
+>>> cs.scaling_exponent("dilute")                  # ν of R(s) ∝ s^ν
+
+All chains have the same length and contiguous IDs (the layout written by
+``create_InitCoor.sh``), so a frame is one ``(n_chains, chain_len, 3)``
+view (:py:class:`analysis.chains.ChainLayout`), made whole along each
+backbone.  Every quantity is an array operation over all chains – and
+over all frames when a stack ``(T, n_chains, chain_len, 3)`` is passed
+to :py:meth:`ChainStatistics.add`:
+
+* ``Rg²`` and ``R_ee²`` per chain;
+* the mean-square internal distance
+  ``R²(s) = ⟨ |r_{i+s} − r_i|² ⟩_i`` for ``s = 1 … chain_len − 1``,
+  one vectorised difference per *s*.
+
+Chains are split by phase with
+:py:func:`analysis.msd.dense_chains` (largest cluster of chains in
+contact).  :py:class:`ChainStatistics` only keeps sums per phase, and
+:py:func:`chain_statistics` accumulates the frames of a dump in worker
+processes (:py:func:`analysis.dump_index.reduce_frames`).
+"""
+
+from __future__ import annotations
+
+from functools import partial
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+try:
+    from .dump_index import reduce_frames
+    from .lammps_dump import DumpFrame
+    from .msd import dense_chains
+except ImportError:                      # run as a loose script from analysis/
+    from dump_index import reduce_frames
+    from lammps_dump import DumpFrame
+    from msd import dense_chains
+
+
+#: Dump columns a frame needs.
+COLUMNS = ("id", "mol", "x", "y", "z")
+
+#: Phases the sums are kept for.
+PHASES = ("all", "dense", "dilute")
+
+
+def internal_distances(x: np.ndarray) -> np.ndarray:
+    """
+    ``(..., n_chains, chain_len − 1)`` mean-square distance of beads
+    ``s = 1 … chain_len − 1`` apart along each chain of the whole,
+    chain-major positions ``(..., n_chains, chain_len, 3)``.
+    """
+    n = x.shape[-2]
+    out = np.empty(x.shape[:-2] + (max(n - 1, 0),))
+    for s in range(1, n):
+        d = x[..., s:, :] - x[..., :-s, :]
+        out[..., s - 1] = np.einsum("...ki,...ki->...", d, d) / (n - s)
+    return out
+
+
+class ChainStatistics:
+    """
+    Sums of chain conformations per phase.
+
+    Parameters
+    ----------
+    chain_len
+        Beads per chain (default: taken from the first chains added).
+
+    Attributes
+    ----------
+    counts
+        ``(3,)`` chain samples per :py:data:`PHASES` entry.
+    rg_sum, rg2_sum, ree2_sum
+        ``(3,)`` sums of ``Rg``, ``Rg²`` and ``R_ee²``.
+    r2_sum
+        ``(3, chain_len − 1)`` sums of ``R²(s)``.
+    """
+
+    _SUMS = ("counts", "rg_sum", "rg2_sum", "ree2_sum", "r2_sum")
+
+    def __init__(self, chain_len: Optional[int] = None) -> None:
+        self.chain_len = chain_len
+        self.counts = np.zeros(len(PHASES))
+        self.rg_sum = np.zeros(len(PHASES))
+        self.rg2_sum = np.zeros(len(PHASES))
+        self.ree2_sum = np.zeros(len(PHASES))
+        self.r2_sum = np.zeros((len(PHASES), max((chain_len or 1) - 1, 0)))
+
+    # ---- accumulation --------------------------------------------------
+    def add(self, x: np.ndarray, dense: Optional[np.ndarray] = None) -> None:
+        """
+        Accumulate whole chains.
+
+        Parameters
+        ----------
+        x
+            ``(..., n_chains, chain_len, 3)`` positions, each chain whole
+            (:py:meth:`analysis.chains.ChainLayout.unwrap`).
+        dense
+            ``(..., n_chains)`` *True* for chains in the condensate;
+            without it only ``"all"`` is filled.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        if self.chain_len is None:
+            self.chain_len = x.shape[-2]
+            self.r2_sum = np.zeros((len(PHASES), max(self.chain_len - 1, 0)))
+        if x.shape[-2] != self.chain_len:
+            raise ValueError(f"expected chains of {self.chain_len} beads, got {x.shape[-2]}")
+        d = x - x.mean(axis=-2, keepdims=True)
+        rg2 = np.einsum("...ki,...ki->...", d, d) / self.chain_len
+        ee = x[..., -1, :] - x[..., 0, :]
+        ree2 = np.einsum("...i,...i->...", ee, ee)
+        r2 = internal_distances(x)
+
+        masks = [np.ones(rg2.shape, dtype=bool)]
+        if dense is not None:
+            dense = np.broadcast_to(np.asarray(dense, dtype=bool), rg2.shape)
+            masks += [dense, ~dense]
+        for p, m in enumerate(masks):
+            self.counts[p] += np.count_nonzero(m)
+            self.rg_sum[p] += np.sqrt(rg2[m]).sum()
+            self.rg2_sum[p] += rg2[m].sum()
+            self.ree2_sum[p] += ree2[m].sum()
+            self.r2_sum[p] += r2[m].sum(axis=0)
+
+    def add_frame(self, frame: DumpFrame, cutoff: float = 15.0) -> None:
+        """Accumulate a dump frame (``id``, ``mol`` and ``x y z`` or
+        ``xu yu zu``), split by :py:func:`analysis.msd.dense_chains`."""
+        layout = frame.layout
+        if not layout.regular:
+            raise ValueError("chains must have equal lengths and contiguous IDs")
+        lengths = frame.box[:, 1] - frame.box[:, 0]
+        x = layout.unwrap(frame.chain_xyz("x" not in frame), lengths)
+        self.add(x, dense_chains(frame, cutoff))
+
+    def __add__(self, other: "ChainStatistics") -> "ChainStatistics":
+        if other.chain_len is None:
+            return self
+        if self.chain_len is None:
+            return other
+        if other.chain_len != self.chain_len:
+            raise ValueError("cannot add ChainStatistics of different chain lengths")
+        total = ChainStatistics(self.chain_len)
+        for name in self._SUMS:
+            setattr(total, name, getattr(self, name) + getattr(other, name))
+        return total
+
+    # ---- results -------------------------------------------------------
+    def _mean(self, sums: np.ndarray, phase: str) -> np.ndarray:
+        p = PHASES.index(phase)
+        n = self.counts[p]
+        return sums[p] / n if n > 0 else np.full(np.shape(sums[p]), np.nan)
+
+    def rg(self, phase: str = "all") -> float:
+        """Root-mean-square radius of gyration √⟨Rg²⟩."""
+        return float(np.sqrt(self._mean(self.rg2_sum, phase)))
+
+    def mean_rg(self, phase: str = "all") -> float:
+        """Mean radius of gyration ⟨Rg⟩."""
+        return float(self._mean(self.rg_sum, phase))
+
+    def end_to_end(self, phase: str = "all") -> float:
+        """Root-mean-square end-to-end distance √⟨R_ee²⟩."""
+        return float(np.sqrt(self._mean(self.ree2_sum, phase)))
+
+    def internal(self, phase: str = "all") -> tuple[np.ndarray, np.ndarray]:
+        """``s = 1 … chain_len − 1`` and √⟨R²(s)⟩."""
+        if self.chain_len is None:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        return np.arange(1, self.chain_len), np.sqrt(self._mean(self.r2_sum, phase))
+
+    def scaling_exponent(self, phase: str = "all",
+                         s_range: tuple[int, Optional[int]] = (2, None)) -> float:
+        """
+        Exponent ν of ``R(s) ∝ s^ν`` from a log–log fit over
+        ``s_range[0] ≤ s ≤ s_range[1]`` (default: from 2 to the chain
+        length − 1; 0.5 ideal, ≈0.59 good solvent, 1/3 globule).
+        """
+        if self.chain_len is None:
+            return float("nan")
+        s, r = self.internal(phase)
+        hi = s_range[1] if s_range[1] is not None else s[-1] if len(s) else 0
+        sel = (s >= s_range[0]) & (s <= hi) & np.isfinite(r) & (r > 0)
+        if np.count_nonzero(sel) < 2:
+            return float("nan")
+        return float(np.polyfit(np.log(s[sel]), np.log(r[sel]), 1)[0])
+
+
+def _frame_stats(cutoff: float, frame: DumpFrame) -> ChainStatistics:
+    cs = ChainStatistics()
+    cs.add_frame(frame, cutoff)
+    return cs
+
+
+def chain_statistics(dump_file: str | Path,
+                     cutoff: float = 15.0,
+                     frames: Optional[Sequence[int]] = None,
+                     workers: Optional[int] = None) -> ChainStatistics:
+    """
+    :py:class:`ChainStatistics` of a ``dump custom`` trajectory.
+
+    Parameters
+    ----------
+    dump_file
+        ``traj_<fName>.dump`` with the :py:data:`COLUMNS`.
+    cutoff
+        Contact distance for the phase split.
+    frames
+        Frame numbers to use (default: all).
+    workers
+        Worker processes (default: ``os.cpu_count()``; ``1`` = serial).
+    """
+    total = reduce_frames(dump_file, partial(_frame_stats, cutoff),
+                          frames=frames, columns=COLUMNS, workers=workers)
+    return total if total is not None else ChainStatistics()
@@ -0,0 +1,542 @@
+#!/usr/bin/env python3
+"""
+Byte-offset frame index for LAMMPS ``dump custom`` trajectories.
+
+Typical usage
+-------------
+>>> from analysis.dump_index import DumpIndex
+>>> idx = DumpIndex("traj_Run1.dump")        # scans once, then persists
+>>> len(idx), idx.timesteps[-1]
+(26, 250000000)
+>>> last = idx[-1]                            # one seek, one bulk parse
+>>> frame = idx.at_timestep(100_000_000)
+>>> for frame in idx.iter_frames(start=10, step=5, columns=["id", "xu", "yu", "zu"]):
+...     ...
+
+The index (``traj_Run1.dump.idx.npz``) records, for every complete frame,
+the byte offset of its ``ITEM: TIMESTEP`` line and of its atom rows, its
+end, the timestep, the atom count and the box.  It is built by one pass of
+``mmap.find`` over the file – the atom rows themselves are never split
+into lines – and is *extended* rather than rebuilt when the dump grows,
+so re-opening the trajectory of a running job only scans the new frames.
+
+Compressed dumps (``traj_Run1.dump.gz``, ``.xz``, ``.zst``, or a running
+``dump custom/gz``) are indexed by *decompressed* offset in one streaming
+pass.  Seeking then goes through :py:func:`analysis.compressed.open_random`:
+for gzip every read restarts from the nearest inflate snapshot taken
+during the scan; for the other formats frames are cheapest to read in
+increasing order, which is what :py:meth:`DumpIndex.iter_frames` does.
+The inflate snapshots are ``zlib`` objects that cannot be saved: they
+live only in the process that took them, are not part of the ``.idx.npz``
+file, and a new process inflates from the top of the archive up to the
+first frame it reads.
+
+:py:func:`map_frames` hands contiguous runs of frame numbers to worker
+processes, together with the index built once in the calling process
+(unpickled copies never rescan or write the index file); :py:func:`reduce_frames`
+does the same but sums the per-frame results inside every worker, so only
+one partial result per process is ever held.  :py:func:`reduce_runs` sums
+several trajectories at once, with the chunks of all of them sharing one
+pool of workers.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterator, Mapping, Optional, Sequence
+
+import numpy as np
+
+try:
+    from .compressed import _Sequential, detect, open_random
+    from .lammps_dump import DumpFrame, _ByteLines, _decode, _read_header, _row_keep, _to_frame
+except ImportError:                      # run as a loose script from analysis/
+    from compressed import _Sequential, detect, open_random
+    from lammps_dump import DumpFrame, _ByteLines, _decode, _read_header, _row_keep, _to_frame
+
+
+INDEX_SUFFIX = ".idx.npz"
+_INDEX_VERSION = 1
+_TIMESTEP = b"ITEM: TIMESTEP"
+
+#: One record per complete frame.
+FRAME_DTYPE = np.dtype([
+    ("offset", np.int64),        # start of "ITEM: TIMESTEP"
+    ("data_offset", np.int64),   # first atom row
+    ("end", np.int64),           # one past the last atom row
+    ("timestep", np.int64),
+    ("n_atoms", np.int64),
+    ("box", np.float64, (3, 2)),
+])
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# scanning
+# ──────────────────────────────────────────────────────────────────────────
+class _MappedLines:
+    """Text lines of a memory map for :py:func:`analysis.lammps_dump._read_header`."""
+
+    def __init__(self, mm: mmap.mmap) -> None:
+        self.mm = mm
+
+    def readline(self) -> str:
+        return self.mm.readline().decode()
+
+
+def _scan(mm: mmap.mmap, start: int) -> tuple[list[tuple], str, list[str]]:
+    """
+    Index complete frames from byte *start* onwards.
+
+    Returns the frame records plus the boundary flags and column names of
+    the ``ATOMS`` line (empty if no frame was found).
+    """
+    records: list[tuple] = []
+    boundary, names = "", []
+    size = len(mm)
+    pos = start
+
+    lines = _MappedLines(mm)
+    while pos < size:
+        mm.seek(pos)
+        header = _read_header(lines)
+        if header is None:
+            break                                           # header still being written
+        timestep, n_atoms, box, frame_boundary, frame_names = header
+        data_offset = mm.tell()
+
+        # the frame ends after its n_atoms-th row; the next TIMESTEP (which
+        # may itself be a partial line) only bounds the search
+        stop = mm.find(_TIMESTEP, data_offset)
+        rows = mm[data_offset:size if stop == -1 else stop]
+        found = rows.count(b"\n")
+        if found < n_atoms:
+            break                                           # rows still being written
+        if found == n_atoms:
+            end = data_offset + rows.rfind(b"\n") + 1
+        else:
+            newlines = np.flatnonzero(np.frombuffer(rows, dtype=np.uint8) == 10)
+            end = data_offset + int(newlines[n_atoms - 1]) + 1
+
+        if names and frame_names != names:
+            raise ValueError(f"ATOMS columns change at timestep {timestep}")
+        names, boundary = frame_names, frame_boundary
+        records.append((pos, data_offset, end, timestep, n_atoms, box.tolist()))
+        pos = end
+
+    return records, boundary, names
+
+
+def _scan_stream(access, start: int) -> tuple[list[tuple], str, list[str]]:
+    """
+    :py:func:`_scan` for compressed dumps, which cannot be mapped: one
+    forward pass over the decompressed stream from offset *start*, the
+    atom rows of each frame skipped as one block.
+    """
+    records: list[tuple] = []
+    boundary, names = "", []
+    fh = _ByteLines(_Sequential(access, start), offset=start)
+    while True:
+        pos = fh.tell()
+        header = _read_header(fh)
+        if header is None:
+            break
+        timestep, n_atoms, box, frame_boundary, frame_names = header
+        data_offset = fh.tell()
+        if fh.read_rows(n_atoms) is None:
+            break                                           # frame still being written
+        if names and frame_names != names:
+            raise ValueError(f"ATOMS columns change at timestep {timestep}")
+        names, boundary = frame_names, frame_boundary
+        records.append((pos, data_offset, fh.tell(), timestep, n_atoms, box.tolist()))
+    return records, boundary, names
+
+
+def _archive_digest(path: Path) -> str:
+    """``<hash of the first 64 kB>:<size>`` of a compressed dump; it may
+    only grow (``dump custom/gz``) while the index stays valid."""
+    with path.open("rb") as fh:
+        head = fh.read(1 << 16)
+        size = os.fstat(fh.fileno()).st_size
+    return f"{hashlib.blake2b(head, digest_size=16).hexdigest()}:{size}"
+
+
+def _archive_unchanged(path: Path, digest: str) -> bool:
+    head, _, size = digest.rpartition(":")
+    now_head, _, now_size = _archive_digest(path).rpartition(":")
+    return bool(size) and head == now_head and int(now_size) >= int(size)
+
+
+def _header_digest(mm: mmap.mmap, frames: np.ndarray) -> str:
+    """Hash of the last indexed frame header – detects a rewritten file."""
+    if len(frames) == 0:
+        return ""
+    last = frames[-1]
+    return hashlib.blake2b(mm[last["offset"]:last["data_offset"]],
+                           digest_size=16).hexdigest()
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# index object
+# ──────────────────────────────────────────────────────────────────────────
+class DumpIndex:
+    """
+    Random access to the frames of one ``dump custom`` file.
+
+    Parameters
+    ----------
+    dump_file
+        Path to ``traj_<fName>.dump``, plain or compressed.
+    persist
+        Load the index from ``<dump_file>.idx.npz`` and save it back after
+        scanning new frames.  Unwritable directories are tolerated.
+
+    Attributes
+    ----------
+    frames
+        Structured array (:py:data:`FRAME_DTYPE`), one record per frame.
+    names
+        Per-atom column names of the ``ITEM: ATOMS`` line.
+    boundary
+        Boundary flags of the ``BOX BOUNDS`` line.
+    """
+
+    def __init__(self, dump_file: str | Path, persist: bool = True) -> None:
+        self.path = Path(dump_file)
+        self.index_path = self.path.with_name(self.path.name + INDEX_SUFFIX)
+        self.persist = persist
+        self.frames = np.empty(0, dtype=FRAME_DTYPE)
+        self.names: list[str] = []
+        self.boundary = ""
+        self.compression = detect(self.path)
+        self._access = open_random(self.path)
+        if persist:
+            self._load()
+        self.refresh()
+
+    # ---- pickling (worker processes) ----------------------------------
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_access"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        """A copy in another process reads the frames indexed so far and
+        never writes the index file."""
+        self.__dict__.update(state)
+        self.persist = False
+        self._access = open_random(self.path)
+
+    # ---- persistence ---------------------------------------------------
+    def _load(self) -> None:
+        try:
+            with np.load(self.index_path, allow_pickle=False) as z:
+                if int(z["version"]) != _INDEX_VERSION:
+                    return
+                frames = z["frames"].astype(FRAME_DTYPE)
+                names = [str(n) for n in z["names"]]
+                boundary = str(z["boundary"])
+                digest = str(z["digest"])
+        except (OSError, KeyError, ValueError):
+            return
+
+        if self.compression is not None:
+            if not _archive_unchanged(self.path, digest):
+                return                                      # archive was replaced
+        else:
+            with self._map() as mm:
+                if mm is None or (len(frames) and frames[-1]["end"] > len(mm)):
+                    return                                  # file was truncated
+                if _header_digest(mm, frames) != digest:
+                    return                                  # file was rewritten
+        self.frames, self.names, self.boundary = frames, names, boundary
+
+    def _save(self) -> None:
+        if self.compression is not None:
+            digest = _archive_digest(self.path)
+        else:
+            with self._map() as mm:
+                digest = _header_digest(mm, self.frames) if mm is not None else ""
+        try:
+            fd, tmp = tempfile.mkstemp(prefix=self.index_path.name + ".",
+                                       suffix=".npz", dir=self.index_path.parent)
+            with os.fdopen(fd, "wb") as fh:
+                np.savez(fh, version=_INDEX_VERSION, frames=self.frames,
+                         names=np.array(self.names, dtype=str),
+                         boundary=self.boundary, digest=digest)
+            os.replace(tmp, self.index_path)
+        except OSError:
+            pass
+
+    @contextmanager
+    def _map(self) -> Iterator[Optional[mmap.mmap]]:
+        """Read-only mmap of the dump (*None* for an empty file)."""
+        with self.path.open("rb") as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                yield None
+                return
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                yield mm
+
+    def refresh(self) -> int:
+        """
+        Index frames appended since the last scan.
+
+        Returns
+        -------
+        int
+            Number of newly indexed frames.
+        """
+        start = int(self.frames[-1]["end"]) if len(self.frames) else 0
+        if self.compression is not None:
+            records, boundary, names = _scan_stream(self._access, start)
+        else:
+            with self._map() as mm:
+                if mm is None or start >= len(mm):
+                    return 0
+                records, boundary, names = _scan(mm, start)
+        if not records:
+            return 0
+        if self.names and names != self.names:
+            raise ValueError("ATOMS columns differ from the indexed frames")
+        self.frames = np.concatenate([self.frames, np.array(records, dtype=FRAME_DTYPE)])
+        self.names, self.boundary = names, boundary
+        if self.persist:
+            self._save()
+        return len(records)
+
+    # ---- lookup --------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def __getitem__(self, i: int) -> DumpFrame:
+        return self.frame(i)
+
+    @property
+    def timesteps(self) -> np.ndarray:
+        return self.frames["timestep"]
+
+    def find(self, timestep: int) -> int:
+        """Frame number of *timestep* (``KeyError`` if absent)."""
+        hits = np.flatnonzero(self.frames["timestep"] == timestep)
+        if not len(hits):
+            raise KeyError(f"timestep {timestep} not in {self.path.name}")
+        return int(hits[0])
+
+    def select(self,
+               start: Optional[int] = None,
+               stop: Optional[int] = None,
+               step: Optional[int] = None) -> np.ndarray:
+        """Frame numbers of the Python slice ``[start:stop:step]``."""
+        return np.arange(len(self.frames))[slice(start, stop, step)]
+
+    def split(self, n_parts: int, frames: Optional[Sequence[int]] = None) -> list[np.ndarray]:
+        """
+        Divide *frames* (default: all) into ``n_parts`` contiguous runs of
+        about equal byte size, e.g. one per worker process.
+        """
+        frames = self.select() if frames is None else np.asarray(frames, dtype=np.int64)
+        if len(frames) == 0:
+            return []
+        rec = self.frames[frames]
+        cost = np.cumsum(rec["end"] - rec["offset"])
+        bounds = np.searchsorted(cost, cost[-1] * np.arange(1, n_parts) / n_parts)
+        return [part for part in np.split(frames, bounds) if len(part)]
+
+    # ---- reading -------------------------------------------------------
+    def frame(self,
+              i: int,
+              columns: Optional[Sequence[str]] = None,
+              sort: bool = True,
+              types: Optional[Sequence[int]] = None,
+              mols: Optional[Sequence[int]] = None) -> DumpFrame:
+        """
+        Read frame number *i* (negative values count from the end).
+
+        Parameters
+        ----------
+        i
+            Frame number.
+        columns
+            Per-atom columns to keep (default: all).
+        sort
+            Reorder atoms by ``id``.
+        types, mols
+            Keep only rows of these atom types / molecule IDs, filtered
+            on the raw bytes before conversion.
+        """
+        rec = self.frames[i]
+        raw = self._access.read_at(int(rec["data_offset"]), int(rec["end"] - rec["data_offset"]))
+        return self._decode(rec, raw, columns, sort, _row_keep(self.names, types, mols))
+
+    def at_timestep(self, timestep: int, **kwargs: Any) -> DumpFrame:
+        """Read the frame written at *timestep*."""
+        return self.frame(self.find(timestep), **kwargs)
+
+    def iter_frames(self,
+                    start: Optional[int] = None,
+                    stop: Optional[int] = None,
+                    step: Optional[int] = None,
+                    frames: Optional[Sequence[int]] = None,
+                    columns: Optional[Sequence[str]] = None,
+                    sort: bool = True,
+                    types: Optional[Sequence[int]] = None,
+                    mols: Optional[Sequence[int]] = None) -> Iterator[DumpFrame]:
+        """
+        Yield frames ``[start:stop:step]`` (or the explicit *frames*),
+        seeking directly to each one; the other arguments are those of
+        :py:meth:`frame`.
+        """
+        keep = _row_keep(self.names, types, mols)
+        chosen = self.select(start, stop, step) if frames is None else frames
+        for i in chosen:
+            rec = self.frames[i]
+            raw = self._access.read_at(int(rec["data_offset"]),
+                                       int(rec["end"] - rec["data_offset"]))
+            yield self._decode(rec, raw, columns, sort, keep)
+
+    def _decode(self, rec: np.void, raw: bytes,
+                columns: Optional[Sequence[str]], sort: bool,
+                keep: tuple = ()) -> DumpFrame:
+        block = _decode(raw, int(rec["n_atoms"]), int(rec["timestep"]), self.names, keep)
+        return _to_frame(block, int(rec["timestep"]), np.array(rec["box"]),
+                         self.boundary, self.names, columns, sort)
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# parallel helper
+# ──────────────────────────────────────────────────────────────────────────
+def _map_chunk(index: DumpIndex, func: Callable[[DumpFrame], Any],
+               frames: np.ndarray, columns: Optional[Sequence[str]]) -> list[Any]:
+    return [func(frame) for frame in index.iter_frames(frames=frames, columns=columns)]
+
+
+def _reduce_chunk(index: DumpIndex, func: Callable[[DumpFrame], Any],
+                  frames: np.ndarray, columns: Optional[Sequence[str]]) -> list[Any]:
+    total = None
+    for frame in index.iter_frames(frames=frames, columns=columns):
+        result = func(frame)
+        total = result if total is None else total + result
+    return [] if total is None else [total]
+
+
+def _run_chunks(dump_file: str | Path, chunk_func: Callable, func: Callable,
+                frames: Optional[Sequence[int]], columns: Optional[Sequence[str]],
+                workers: Optional[int]) -> list[Any]:
+    index = DumpIndex(dump_file)                # build + persist once up front
+    workers = workers or os.cpu_count() or 1
+    chunks = index.split(workers, frames)
+    if workers == 1 or len(chunks) <= 1:
+        return [r for chunk in chunks for r in chunk_func(index, func, chunk, columns)]
+
+    # workers get a pickled copy of the frame table (persist=False): no
+    # rescan and no concurrent writes of the .idx.npz file
+    with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+        futures = [pool.submit(chunk_func, index, func, chunk, columns) for chunk in chunks]
+        return [r for fut in futures for r in fut.result()]
+
+
+def map_frames(dump_file: str | Path,
+               func: Callable[[DumpFrame], Any],
+               frames: Optional[Sequence[int]] = None,
+               columns: Optional[Sequence[str]] = None,
+               workers: Optional[int] = None) -> list[Any]:
+    """
+    Apply *func* to frames of a dump in parallel worker processes.
+
+    Parameters
+    ----------
+    dump_file
+        Path to ``traj_<fName>.dump``.
+    func
+        Picklable (module-level) function ``DumpFrame -> result``.
+    frames
+        Frame numbers to process (default: all indexed frames).
+    columns
+        Per-atom columns each worker parses.
+    workers
+        Number of processes (default: ``os.cpu_count()``); ``1`` runs
+        serially in the calling process.
+
+    Returns
+    -------
+    list
+        ``func`` results in frame order.
+    """
+    return _run_chunks(dump_file, _map_chunk, func, frames, columns, workers)
+
+
+def reduce_frames(dump_file: str | Path,
+                  func: Callable[[DumpFrame], Any],
+                  frames: Optional[Sequence[int]] = None,
+                  columns: Optional[Sequence[str]] = None,
+                  workers: Optional[int] = None) -> Any:
+    """
+    Sum *func* over frames of a dump in parallel worker processes.
+
+    The arguments are those of :py:func:`map_frames`; the results of
+    *func* must support ``+`` (arrays, or accumulator objects such as
+    :py:class:`analysis.rdf.PairCorrelation`).
+
+    Returns
+    -------
+    object
+        Sum of all ``func`` results (*None* when no frame was selected).
+    """
+    partial_sums = _run_chunks(dump_file, _reduce_chunk, func, frames, columns, workers)
+    total = None
+    for part in partial_sums:
+        total = part if total is None else total + part
+    return total
+
+
+def reduce_runs(dump_files: Sequence[str | Path] | Mapping[Any, str | Path],
+                func: Callable[[DumpFrame], Any],
+                frames: Optional[Sequence[int]] = None,
+                columns: Optional[Sequence[str]] = None,
+                workers: Optional[int] = None) -> dict[Any, Any]:
+    """
+    :py:func:`reduce_frames` over several dumps in one pool of workers.
+
+    Every trajectory is split into ``workers`` chunks and all chunks of
+    all runs are queued together, so short runs do not leave processes
+    idle.
+
+    Parameters
+    ----------
+    dump_files
+        Paths, or a mapping from a key (e.g. ``(Ens, Es)``) to a path.
+    func, frames, columns, workers
+        As for :py:func:`map_frames`; *frames* applies to every run.
+
+    Returns
+    -------
+    dict
+        Key (or path) → sum of ``func`` over that run (*None* when no
+        frame was selected).
+    """
+    runs = dict(dump_files) if isinstance(dump_files, Mapping) else {p: p for p in dump_files}
+    workers = workers or os.cpu_count() or 1
+    tasks = []
+    for key, path in runs.items():
+        index = DumpIndex(path)                 # build + persist once up front
+        tasks += [(key, index, chunk) for chunk in index.split(workers, frames)]
+
+    if workers == 1 or len(tasks) <= 1:
+        parts = [(key, _reduce_chunk(index, func, chunk, columns)) for key, index, chunk in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            futures = [(key, pool.submit(_reduce_chunk, index, func, chunk, columns))
+                       for key, index, chunk in tasks]
+            parts = [(key, fut.result()) for key, fut in futures]
+
+    totals: dict[Any, Any] = {key: None for key in runs}
+    for key, part in parts:
+        for result in part:
+            totals[key] = result if totals[key] is None else totals[key] + result
+    return totals
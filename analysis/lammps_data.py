@@ -0,0 +1,554 @@
+#!/usr/bin/env python3
+"""
+Single-pass reader for LAMMPS ``*.DATA`` files, shared by every snapshot
+helper in :py:mod:`analysis`.
+
+Typical usage
+-------------
+>>> from analysis.lammps_data import read_data
+>>> data = read_data("final_state_Run1.DATA")
+>>> data.types.shape, data.bonds.shape
+((14000,), (15300, 2))
+
+Each section is located in the file text and handed to NumPy as one
+block, so no per-line Python objects are created; the header counts
+(``14000 atoms``, ``13800 bonds`` …) are checked against the rows found.
+Parsed files are memoised in-process on *(path, size, mtime)*: running all
+plots on the same snapshot parses the text once.  Across sessions the
+arrays are served from a memory-mapped binary sidecar written next to the
+snapshot on first read.
+
+Analyses that only need part of a snapshot can say so:
+
+>>> stickers = read_data("final_state_Run1.DATA", types=(1, 3),
+...                      columns=("mols", "coords"))
+
+Without a sidecar the unwanted ``Atoms`` rows are removed from the text
+before their numbers are converted – only the filtered column is read,
+with array operations on the raw bytes – and the ``Velocities``, ``Bonds`` and
+``Angles`` sections are skipped unless requested.
+"""
+
+from __future__ import annotations
+
+import re
+import warnings
+from dataclasses import dataclass, field, fields, replace
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+try:
+    from .compressed import read_text
+    from .sidecar import load_sidecar, write_sidecar
+except ImportError:                      # run as a loose script from analysis/
+    from compressed import read_text
+    from sidecar import load_sidecar, write_sidecar
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# format tables
+# ──────────────────────────────────────────────────────────────────────────
+#: Section keyword → header count that gives its number of rows.
+_SECTION_ROWS = {
+    "masses": "atom types",
+    "pair coeffs": "atom types",
+    "bond coeffs": "bond types",
+    "angle coeffs": "angle types",
+    "dihedral coeffs": "dihedral types",
+    "improper coeffs": "improper types",
+    "atoms": "atoms",
+    "velocities": "atoms",
+    "bonds": "bonds",
+    "angles": "angles",
+    "dihedrals": "dihedrals",
+    "impropers": "impropers",
+}
+
+#: Leading columns of an ``Atoms`` line for the supported atom styles.
+#: Three trailing integers, if present, are the image flags.
+_ATOM_COLUMNS = {
+    "full":      ("id", "mol", "type", "q", "x", "y", "z"),
+    "molecular": ("id", "mol", "type", "x", "y", "z"),
+    "bond":      ("id", "mol", "type", "x", "y", "z"),
+    "angle":     ("id", "mol", "type", "x", "y", "z"),
+    "charge":    ("id", "type", "q", "x", "y", "z"),
+    "atomic":    ("id", "type", "x", "y", "z"),
+}
+
+#: What each ``read_data(columns=...)`` entry keeps; ``ids``, ``box`` and
+#: ``masses`` are always read.
+_COLUMN_FIELDS = {
+    "mols": ("mols",),
+    "types": ("types",),
+    "charges": ("charges",),
+    "coords": ("coords",),
+    "images": ("images",),
+    "velocities": ("velocities",),
+    "bonds": ("bond_types", "bonds"),
+    "angles": ("angle_types", "angles"),
+}
+DATA_COLUMNS = tuple(_COLUMN_FIELDS)
+
+#: Fields with one row per atom.
+_PER_ATOM = ("ids", "mols", "types", "charges", "coords", "images", "velocities")
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# container
+# ──────────────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class LammpsData:
+    """
+    Typed, read-only arrays of one LAMMPS data file.
+
+    Atoms (and velocities) are sorted by atom ID; bonds and angles keep
+    the order of the file and refer to atoms by **ID**, not by row.
+    Fields left out through ``read_data(columns=...)`` are *None*.
+
+    Attributes
+    ----------
+    path
+        File the data were read from.
+    counts
+        Header counts, e.g. ``{"atoms": 14000, "bonds": 13800, ...}``.
+    box
+        ``(3, 2)`` array of ``[lo, hi]`` bounds for x, y, z.
+    masses
+        Mass of atom type *t* at index ``t - 1`` (NaN if not listed).
+    ids, mols, types
+        Atom ID, molecule ID and atom type per atom.
+    charges
+        Per-atom charge (*None* for styles without ``q``).
+    coords
+        ``(N, 3)`` wrapped coordinates.
+    images
+        ``(N, 3)`` image flags, or *None* if the file has none.
+    velocities
+        ``(N, 3)`` velocities, or *None* without a ``Velocities`` section.
+    bond_types, bonds
+        Bond type and ``(M, 2)`` bonded atom IDs.
+    angle_types, angles
+        Angle type and ``(K, 3)`` atom IDs.
+    """
+
+    path: Path
+    counts: dict[str, int]
+    box: np.ndarray
+    masses: np.ndarray
+    ids: np.ndarray
+    mols: Optional[np.ndarray]
+    types: Optional[np.ndarray]
+    charges: Optional[np.ndarray]
+    coords: Optional[np.ndarray]
+    images: Optional[np.ndarray]
+    velocities: Optional[np.ndarray]
+    bond_types: Optional[np.ndarray]
+    bonds: Optional[np.ndarray]
+    angle_types: Optional[np.ndarray]
+    angles: Optional[np.ndarray]
+    atom_style: str = field(default="full")
+
+    @property
+    def n_atoms(self) -> int:
+        return len(self.ids)
+
+    @property
+    def box_lengths(self) -> np.ndarray:
+        """Edge lengths ``hi - lo`` of the (orthogonal) box."""
+        return self.box[:, 1] - self.box[:, 0]
+
+    def atom_index(self, atom_ids: np.ndarray) -> np.ndarray:
+        """
+        Map atom IDs (any shape) to row indices into the per-atom arrays.
+
+        Raises
+        ------
+        KeyError
+            If an ID does not belong to any atom of the snapshot.
+        """
+        atom_ids = np.asarray(atom_ids)
+        idx = np.searchsorted(self.ids, atom_ids)
+        idx = np.minimum(idx, max(len(self.ids) - 1, 0))
+        if atom_ids.size and not np.array_equal(self.ids[idx], atom_ids):
+            raise KeyError("atom IDs not present in the Atoms section")
+        return idx
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# low-level parsing
+# ──────────────────────────────────────────────────────────────────────────
+#: A section keyword line: first non-blank character is a letter.
+_KEYWORD_LINE = re.compile(r"^[ \t]*([A-Za-z][^\n#]*)(#[^\n]*)?$", re.MULTILINE)
+_FIRST_ROW = re.compile(r"^[ \t]*([^\s#][^\n]*)", re.MULTILINE)
+_FIRST_ROW_B = re.compile(rb"^[ \t]*([^\s#][^\n]*)", re.MULTILINE)
+
+
+def _parse_header_line(line: str, counts: dict[str, int], box: np.ndarray) -> None:
+    parts = line.split()
+    for axis, key in enumerate(("xlo", "ylo", "zlo")):
+        if len(parts) >= 4 and parts[2] == key:
+            box[axis] = float(parts[0]), float(parts[1])
+            return
+    if len(parts) >= 2 and parts[0].isdigit() and parts[1][0].isalpha():
+        counts[" ".join(parts[1:])] = int(parts[0])
+
+
+def _parse_rows(text: str | bytes, dtype=float) -> np.ndarray:
+    """Convert a block of equally shaped data rows (``str`` or ``bytes``)
+    into a 2-D array in one bulk call; blocks ``np.fromstring`` cannot
+    read cleanly go through ``np.loadtxt``, which reports the bad row."""
+    first = (_FIRST_ROW_B if isinstance(text, bytes) else _FIRST_ROW).search(text)
+    if first is None:
+        return np.empty((0, 0), dtype=dtype)
+    comment = b"#" if isinstance(text, bytes) else "#"
+    if comment not in text:
+        n_cols = len(first.group(1).split())
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", DeprecationWarning)
+            try:
+                flat = np.fromstring(text, dtype=dtype, sep=" ")
+            except (DeprecationWarning, ValueError):
+                flat = None                     # not a clean table: loadtxt below
+        if flat is not None and flat.size % n_cols == 0:
+            return flat.reshape(-1, n_cols)
+    if isinstance(text, bytes):
+        text = text.decode()
+    return np.loadtxt(text.splitlines(), dtype=dtype, comments="#", ndmin=2)
+
+
+def _keep_lines(buf: np.ndarray,
+                keep: tuple[tuple[int, tuple[int, ...]], ...]) -> np.ndarray:
+    """
+    Boolean mask of the bytes of *buf* (``uint8``, ending in a newline)
+    that belong to lines passing *keep*.
+
+    *keep* holds ``(column, allowed values)`` pairs; a line passes if the
+    unsigned integer in each of those whitespace-separated columns is one
+    of its allowed values.  Only the bytes of the tested columns are
+    converted, with array operations over the whole chunk.
+    """
+    ends = np.flatnonzero(buf == 10)
+    starts = np.r_[0, ends[:-1] + 1]
+    blank = (buf <= 32)
+    # positions where blank and non-blank alternate: token start, end, start, …
+    edge = np.flatnonzero(np.diff(np.r_[True, blank]))
+    first = np.searchsorted(edge, starts)
+
+    ok = np.ones(len(ends), dtype=bool)
+    for col, values in keep:
+        k = first + 2 * col
+        present = k + 1 < len(edge)
+        k = np.where(present, k, 0)
+        lo, hi = edge[k], edge[k + 1]
+        present &= hi <= ends
+        width = int((hi - lo)[present].max()) if present.any() else 0
+        value = np.zeros(len(ends), dtype=np.int64)
+        for d in range(width):
+            inside = present & (lo + d < hi)
+            digit = buf[np.where(inside, lo + d, 0)].astype(np.int64) - 48
+            present &= ~inside | ((0 <= digit) & (digit <= 9))
+            value = np.where(inside, value * 10 + digit, value)
+        ok &= present & np.isin(value, values)
+    return np.repeat(ok, ends - starts + 1)
+
+
+def _filter_rows(text: str | bytes,
+                 keep: tuple[tuple[int, tuple[int, ...]], ...],
+                 chunk_size: int = 1 << 23) -> str | bytes:
+    """
+    The rows of *text* that pass *keep* (see :py:func:`_keep_lines`), as
+    ``bytes``.  *text* is processed in chunks of about *chunk_size*
+    bytes, so the temporaries stay small and the dropped rows are never
+    converted.
+    """
+    if not keep:
+        return text
+    out = []
+    pos, size = 0, len(text)
+    while pos < size:
+        cut = text.find("\n" if isinstance(text, str) else b"\n", pos + chunk_size)
+        cut = size if cut == -1 else cut + 1
+        chunk = text[pos:cut]
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        if not chunk.endswith(b"\n"):
+            chunk += b"\n"
+        buf = np.frombuffer(chunk, dtype=np.uint8)
+        out.append(buf[_keep_lines(buf, keep)].tobytes())
+        pos = cut
+    return b"".join(out)
+
+
+def _sort_by_id(block: np.ndarray) -> np.ndarray:
+    ids = block[:, 0]
+    if len(ids) > 1 and not np.all(ids[1:] > ids[:-1]):
+        block = block[np.argsort(ids, kind="stable")]
+    return block
+
+
+def _parse_data(path: Path,
+                types: Optional[tuple[int, ...]] = None,
+                mols: Optional[tuple[int, ...]] = None,
+                columns: Optional[tuple[str, ...]] = None) -> LammpsData:
+    """Parse the text of *path*; the ``Atoms`` rows are filtered on
+    *types* / *mols* before conversion and the ``Velocities``, ``Bonds``
+    and ``Angles`` sections are only converted if *columns* needs them."""
+    text = read_text(path)
+    start = text.find("\n") + 1                       # skip the title line
+    keywords = list(_KEYWORD_LINE.finditer(text, start))
+
+    counts: dict[str, int] = {}
+    box = np.zeros((3, 2))
+    for line in text[start:keywords[0].start() if keywords else len(text)].splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line:
+            _parse_header_line(line, counts, box)
+
+    wanted = set(DATA_COLUMNS if columns is None else columns)
+    blocks: dict[str, np.ndarray] = {}
+    atom_style = "full"
+    for m, nxt in zip(keywords, keywords[1:] + [None]):
+        keyword = m.group(1).strip().lower()
+        if keyword == "atoms" and m.group(2) and m.group(2)[1:].split():
+            atom_style = m.group(2)[1:].split()[0]
+        if keyword not in ("masses", "atoms") and keyword not in wanted:
+            continue
+        if keyword not in _SECTION_ROWS:
+            continue
+
+        body = text[m.end():nxt.start() if nxt is not None else len(text)]
+        keep = ()
+        if keyword == "atoms":
+            keep = _atom_filter(atom_style, types, mols, path)
+            body = _filter_rows(body, keep)
+        block = _parse_rows(body, np.int64 if keyword in ("bonds", "angles") else float)
+
+        expected = counts.get(_SECTION_ROWS[keyword], 0)
+        if not keep and len(block) != expected:
+            raise ValueError(f"{path}: '{m.group(1).strip()}' has {len(block)} rows, "
+                             f"header says {expected}")
+        blocks[keyword] = block
+
+    return _assemble(path, counts, box, blocks, atom_style)
+
+
+def _atom_filter(atom_style: str,
+                 types: Optional[tuple[int, ...]],
+                 mols: Optional[tuple[int, ...]],
+                 path: Path) -> tuple[tuple[int, tuple[int, ...]], ...]:
+    if atom_style not in _ATOM_COLUMNS:
+        raise ValueError(f"unsupported atom style '{atom_style}' in {path}")
+    col = _ATOM_COLUMNS[atom_style]
+    keep = []
+    if types is not None:
+        keep.append((col.index("type"), types))
+    if mols is not None:
+        if "mol" not in col:
+            raise ValueError(f"atom style '{atom_style}' has no molecule IDs")
+        keep.append((col.index("mol"), mols))
+    return tuple(keep)
+
+
+def _assemble(path: Path,
+              counts: dict[str, int],
+              box: np.ndarray,
+              blocks: dict[str, np.ndarray],
+              atom_style: str) -> LammpsData:
+    if atom_style not in _ATOM_COLUMNS:
+        raise ValueError(f"unsupported atom style '{atom_style}' in {path}")
+    columns = _ATOM_COLUMNS[atom_style]
+    col = {name: i for i, name in enumerate(columns)}
+
+    n_types = counts.get("atom types", 0)
+    masses = np.full(n_types, np.nan)
+    if blocks.get("masses", np.empty((0, 0))).size:
+        m = blocks["masses"]
+        masses[m[:, 0].astype(np.int64) - 1] = m[:, 1]
+
+    atoms = blocks.get("atoms")
+    if atoms is None or atoms.size == 0:
+        atoms = np.empty((0, len(columns)))
+    atoms = _sort_by_id(atoms)
+    n = len(atoms)
+
+    xyz = [col["x"], col["y"], col["z"]]
+    images = None
+    if atoms.shape[1] >= len(columns) + 3:
+        images = atoms[:, len(columns):len(columns) + 3].astype(np.int32)
+
+    velocities = None
+    if blocks.get("velocities") is not None and blocks["velocities"].size:
+        vel = _sort_by_id(blocks["velocities"])
+        if len(vel) != n:                       # the Atoms rows were filtered
+            vel = vel[np.isin(vel[:, 0], atoms[:, col["id"]])]
+        velocities = np.ascontiguousarray(vel[:, 1:4])
+
+    bonds = blocks.get("bonds")
+    if bonds is None or bonds.size == 0:
+        bonds = np.empty((0, 4), dtype=np.int64)
+    angles = blocks.get("angles")
+    if angles is None or angles.size == 0:
+        angles = np.empty((0, 5), dtype=np.int64)
+
+    arrays = dict(
+        box=box,
+        masses=masses,
+        ids=atoms[:, col["id"]].astype(np.int64),
+        mols=(atoms[:, col["mol"]].astype(np.int64) if "mol" in col
+              else np.zeros(n, dtype=np.int64)),
+        types=atoms[:, col["type"]].astype(np.int32),
+        charges=atoms[:, col["q"]].copy() if "q" in col else None,
+        coords=np.ascontiguousarray(atoms[:, xyz]),
+        images=images,
+        velocities=velocities,
+        bond_types=bonds[:, 1].astype(np.int32),
+        bonds=np.ascontiguousarray(bonds[:, 2:4]),
+        angle_types=angles[:, 1].astype(np.int32),
+        angles=np.ascontiguousarray(angles[:, 2:5]),
+    )
+    for arr in arrays.values():
+        if arr is not None:
+            arr.setflags(write=False)          # shared through the memo
+
+    return LammpsData(path=path, counts=counts, atom_style=atom_style, **arrays)
+
+
+def _select(data: LammpsData,
+            types: Optional[tuple[int, ...]],
+            mols: Optional[tuple[int, ...]],
+            columns: Optional[tuple[str, ...]]) -> LammpsData:
+    """Restrict *data* to the atoms of *types* / *mols* (with the bonds and
+    angles among them) and drop the fields not named in *columns*."""
+    values: dict[str, Optional[np.ndarray]] = {}
+    if types is not None or mols is not None:
+        mask = np.ones(data.n_atoms, dtype=bool)
+        if types is not None:
+            mask &= np.isin(data.types, types)
+        if mols is not None:
+            mask &= np.isin(data.mols, mols)
+        if not mask.all():
+            values.update({name: getattr(data, name)[mask] for name in _PER_ATOM
+                           if getattr(data, name) is not None})
+        ids = values.get("ids", data.ids)
+        for kind in ("bond", "angle"):
+            members = getattr(data, f"{kind}s")
+            inside = np.isin(members, ids).all(axis=1)
+            if not inside.all():
+                values[f"{kind}_types"] = getattr(data, f"{kind}_types")[inside]
+                values[f"{kind}s"] = members[inside]
+
+    if columns is not None:
+        for name, owned in _COLUMN_FIELDS.items():
+            if name not in columns:
+                values.update(dict.fromkeys(owned))
+    for arr in values.values():
+        if arr is not None:
+            arr.setflags(write=False)
+    return replace(data, **values) if values else data
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# binary sidecar
+# ──────────────────────────────────────────────────────────────────────────
+_SIDECAR_KIND = "lammps-data"
+_META_FIELDS = ("counts", "atom_style")
+
+
+def _to_sidecar(data: LammpsData) -> tuple[dict[str, np.ndarray], dict]:
+    arrays = {f.name: getattr(data, f.name) for f in fields(data)
+              if isinstance(getattr(data, f.name), np.ndarray)}
+    meta = {name: getattr(data, name) for name in _META_FIELDS}
+    return arrays, meta
+
+
+def _from_sidecar(path: Path, arrays: dict[str, np.ndarray], meta: dict) -> LammpsData:
+    values = {f.name: arrays.get(f.name) for f in fields(LammpsData)
+              if f.name != "path" and f.name not in _META_FIELDS}
+    return LammpsData(path=path, **meta, **values)
+
+
+@lru_cache(maxsize=4)
+def _read_memo(path: str, size: int, mtime_ns: int, cache: bool,
+               types: Optional[tuple[int, ...]] = None,
+               mols: Optional[tuple[int, ...]] = None,
+               columns: Optional[tuple[str, ...]] = None) -> LammpsData:
+    source = Path(path)
+    subset = types is not None or mols is not None or columns is not None
+    if cache:
+        hit = load_sidecar(source, _SIDECAR_KIND)
+        if hit is not None:
+            return _select(_from_sidecar(source, *hit), types, mols, columns)
+    if not subset:
+        data = _parse_data(source)
+        if cache:
+            write_sidecar(source, _SIDECAR_KIND, *_to_sidecar(data))
+        return data
+    # no sidecar yet: push the filters into the text parse instead
+    return _select(_parse_data(source, types, mols, columns), types, mols, columns)
+
+
+def _as_key(values: Optional[Sequence]) -> Optional[tuple]:
+    if values is None:
+        return None
+    if np.isscalar(values):
+        values = (values,)
+    return tuple(sorted({int(v) for v in values}))
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# public API
+# ──────────────────────────────────────────────────────────────────────────
+def read_data(data_file: str | Path,
+              types: Optional[Sequence[int]] = None,
+              mols: Optional[Sequence[int]] = None,
+              columns: Optional[Sequence[str]] = None,
+              cache: bool = True) -> LammpsData:
+    """
+    Parse a LAMMPS ``*.DATA`` file into typed NumPy arrays.
+
+    Parameters
+    ----------
+    data_file
+        Snapshot written by ``write_data`` (or a Moltemplate data file),
+        optionally compressed (see :py:mod:`analysis.compressed`).
+    types, mols
+        Keep only atoms of these types / molecule IDs; bonds and angles
+        are reduced to those whose atoms are all kept.  Without a sidecar
+        the other ``Atoms`` rows are dropped before conversion.
+    columns
+        Fields to fill, any of :py:data:`DATA_COLUMNS` (default: all);
+        the rest are *None* and their sections are not converted.
+    cache
+        Serve the arrays from the binary sidecar
+        (``<data_file>.npcache/``, see :py:mod:`analysis.sidecar`) and
+        write one after the first full text parse.  Set to *False* to
+        always parse the text and leave the directory untouched.
+
+    Returns
+    -------
+    LammpsData
+        Read-only arrays (memory-mapped when served unfiltered from the
+        sidecar); repeated calls with the same arguments on an unchanged
+        file return the same object.
+
+    Raises
+    ------
+    ValueError
+        If the ``Atoms`` section uses an unsupported atom style or a
+        section does not hold the number of rows given in the header.
+    KeyError
+        If *columns* names an unknown field.
+    """
+    if columns is not None:
+        unknown = set(columns) - set(DATA_COLUMNS)
+        if unknown:
+            raise KeyError(f"unknown column(s) {sorted(unknown)} "
+                           f"(have: {' '.join(DATA_COLUMNS)})")
+        columns = tuple(c for c in DATA_COLUMNS if c in columns)
+    path = Path(data_file).resolve()
+    st = path.stat()
+    return _read_memo(str(path), st.st_size, st.st_mtime_ns, cache,
+                      _as_key(types), _as_key(mols), columns)
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Streaming reader for LAMMPS ``dump custom`` trajectories such as the
+``traj_<fName>.dump`` written by ``Template_input.in``::
+
+    dump coor all custom ${dt_movie} traj_${fName}.dump id type mol mass x y z xu yu zu
+
+Typical usage
+-------------
+>>> from analysis.lammps_dump import iter_dump
+>>> for frame in iter_dump("traj_Run1.dump"):
+...     print(frame.timestep, frame["type"].shape, frame.xyz(unwrapped=True).shape)
+
+Frames are yielded one at a time, so memory stays at one frame no matter
+how long the trajectory is.  Each ``ITEM: ATOMS`` block is cut out of the
+file as raw bytes (exactly ``NUMBER OF ATOMS`` lines) and converted to an
+array in one bulk call, never line by line.  ``types=`` / ``mols=`` drop
+the other rows from those bytes before conversion::
+
+    for frame in iter_dump("traj_Run1.dump", types=(1, 3), columns=["mol", "xu", "yu", "zu"]):
+        ...
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+from typing import Iterator, Optional, Sequence
+
+import numpy as np
+
+try:
+    from .chains import ChainLayout
+    from .compressed import open_binary
+    from .lammps_data import _filter_rows, _parse_rows
+except ImportError:                      # run as a loose script from analysis/
+    from chains import ChainLayout
+    from compressed import open_binary
+    from lammps_data import _filter_rows, _parse_rows
+
+
+#: Dump columns that hold integers; everything else is read as float64.
+INT_COLUMNS = frozenset({"id", "type", "mol", "ix", "iy", "iz", "proc", "procp1"})
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# container
+# ──────────────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class DumpFrame:
+    """
+    One frame of a ``dump custom`` file.
+
+    Attributes
+    ----------
+    timestep
+        Value of ``ITEM: TIMESTEP``.
+    box
+        ``(3, 2)`` array of ``[lo, hi]`` bounds for x, y, z.
+    boundary
+        Boundary flags of the ``BOX BOUNDS`` line, e.g. ``"pp pp pp"``.
+    columns
+        Column name → 1-D array, in the order of the ``ITEM: ATOMS`` line.
+    """
+
+    timestep: int
+    box: np.ndarray
+    boundary: str
+    columns: dict[str, np.ndarray]
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    @property
+    def n_atoms(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    @property
+    def box_lengths(self) -> np.ndarray:
+        """Edge lengths ``hi - lo`` of the (orthogonal) box."""
+        return self.box[:, 1] - self.box[:, 0]
+
+    def xyz(self, unwrapped: bool = False) -> np.ndarray:
+        """``(N, 3)`` coordinates from ``x y z`` (or ``xu yu zu``)."""
+        names = ("xu", "yu", "zu") if unwrapped else ("x", "y", "z")
+        return np.column_stack([self.columns[n] for n in names])
+
+    @cached_property
+    def layout(self) -> ChainLayout:
+        """Chain-major layout from the ``mol`` column (see
+        :py:mod:`analysis.chains`)."""
+        return ChainLayout.detect(self.columns["mol"])
+
+    def chain_xyz(self, unwrapped: bool = False) -> np.ndarray:
+        """:py:meth:`xyz` as ``(n_chains, chain_len, 3)``."""
+        return self.layout.view(self.xyz(unwrapped))
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# low-level parsing
+# ──────────────────────────────────────────────────────────────────────────
+class _ByteLines:
+    """
+    Buffered binary reader: header lines one at a time, atom rows as one
+    ``bytes`` block whose end is found with a vectorised newline search.
+    """
+
+    def __init__(self, fh, block_size: int = 1 << 22, offset: int = 0) -> None:
+        self.fh = fh
+        self.block_size = block_size
+        self.buf = b""
+        self.pos = 0
+        self.offset = offset                    # stream offset of buf[0]
+
+    def tell(self) -> int:
+        return self.offset + self.pos
+
+    def _fill(self, size: int) -> bool:
+        chunk = self.fh.read(max(size, self.block_size))
+        if not chunk:
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.offset += self.pos
+        self.pos = 0
+        return True
+
+    def readline(self) -> str:
+        while True:
+            end = self.buf.find(b"\n", self.pos)
+            if end >= 0 or not self._fill(0):
+                end = len(self.buf) - 1 if end < 0 else end
+                line = self.buf[self.pos:end + 1]
+                self.pos = end + 1
+                return line.decode()
+
+    def read_rows(self, n: int) -> Optional[bytes]:
+        """Next *n* complete lines, or *None* if the file ends first."""
+        if n <= 0:
+            return b""
+        found, scanned = 0, self.pos
+        while True:
+            found += self.buf.count(b"\n", scanned)
+            if found >= n:
+                break
+            have = len(self.buf) - self.pos
+            # guess the remaining size from the average line length so far
+            need = (have // found + 1) * (n - found) if found else self.block_size
+            if not self._fill(need):
+                return None
+            scanned = have
+        data = np.frombuffer(self.buf, dtype=np.uint8, offset=self.pos)
+        end = self.pos + int(np.flatnonzero(data == 10)[n - 1]) + 1
+        rows = self.buf[self.pos:end]
+        self.pos = end
+        return rows
+
+
+def _line(fh) -> Optional[str]:
+    """Next complete line, or *None* at the end of the file (a last line
+    without newline is still being written)."""
+    line = fh.readline()
+    return line if line.endswith("\n") else None
+
+
+def _expect(fh, item: str) -> Optional[str]:
+    """Return the ``ITEM:`` line that should start with *item*, or *None*
+    at a clean end of file (including a last line still being written)."""
+    line = _line(fh)
+    while line is not None and not line.strip():
+        line = _line(fh)
+    if line is None:
+        return None
+    if not line.startswith(f"ITEM: {item}"):
+        raise ValueError(f"expected 'ITEM: {item}', got {line.strip()!r}")
+    return line
+
+
+#: Lines of a frame header: ``ITEM:`` lines by name, values as *None*.
+_HEADER = ("TIMESTEP", None, "NUMBER OF ATOMS", None, "BOX BOUNDS",
+           None, None, None, "ATOMS")
+
+
+def _read_header(fh) -> Optional[tuple[int, int, np.ndarray, str, list[str]]]:
+    """Read the four header items of one frame; *None* at end of file or
+    on a frame that is still being written.  A complete but malformed
+    header line raises ``ValueError``."""
+    lines = []
+    for item in _HEADER:
+        line = _expect(fh, item) if item else _line(fh)
+        if line is None:
+            return None                         # truncated trailing frame
+        lines.append(line)
+    _, step_line, _, count_line, bounds_line, *rows, atoms_line = lines
+    try:
+        timestep = int(step_line)
+        n_atoms = int(count_line)
+        box = np.array([[float(v) for v in r.split()[:2]] for r in rows])
+    except ValueError as exc:
+        raise ValueError(f"malformed dump header: {exc}") from None
+    if box.shape != (3, 2):
+        raise ValueError(f"malformed BOX BOUNDS at timestep {timestep}")
+    boundary = " ".join(bounds_line.split()[3:])
+    names = atoms_line.split()[2:]
+    return timestep, n_atoms, box, boundary, names
+
+
+def _columns(block: np.ndarray, names: Sequence[str],
+             wanted: Optional[Sequence[str]]) -> dict[str, np.ndarray]:
+    cols = {}
+    for name in (wanted or names):
+        if name not in names:
+            raise KeyError(f"column '{name}' not in dump (has: {' '.join(names)})")
+        values = block[:, names.index(name)]
+        cols[name] = values.astype(np.int64) if name in INT_COLUMNS else values.copy()
+    return cols
+
+
+def _to_frame(block: np.ndarray, timestep: int, box: np.ndarray, boundary: str,
+              names: Sequence[str], columns: Optional[Sequence[str]],
+              sort: bool) -> DumpFrame:
+    n_atoms = len(block)
+    if sort and "id" in names and n_atoms > 1:
+        ids = block[:, names.index("id")]
+        if not np.all(ids[1:] > ids[:-1]):
+            block = block[np.argsort(ids, kind="stable")]
+    return DumpFrame(timestep, box, boundary, _columns(block, names, columns))
+
+
+def _row_keep(names: Sequence[str],
+              types: Optional[Sequence[int]],
+              mols: Optional[Sequence[int]]) -> tuple[tuple[int, tuple[int, ...]], ...]:
+    """Row predicate for :py:func:`analysis.lammps_data._filter_rows`."""
+    keep = []
+    for name, values in (("type", types), ("mol", mols)):
+        if values is None:
+            continue
+        if name not in names:
+            raise KeyError(f"column '{name}' not in dump (has: {' '.join(names)})")
+        keep.append((list(names).index(name),
+                     tuple(sorted({int(v) for v in np.atleast_1d(values)}))))
+    return tuple(keep)
+
+
+def _decode(raw: bytes, n_atoms: int, timestep: int, names: Sequence[str],
+            keep: tuple[tuple[int, tuple[int, ...]], ...]) -> np.ndarray:
+    """Raw ``ATOMS`` rows → ``(rows, len(names))`` float array."""
+    block = _parse_rows(_filter_rows(raw, keep)) if n_atoms else np.empty((0, 0))
+    if not block.size:
+        return np.empty((0, len(names)))
+    if block.shape[1] != len(names) or (not keep and len(block) != n_atoms):
+        raise ValueError(f"malformed ATOMS block at timestep {timestep}")
+    return block
+
+
+def _read_frame(fh: _ByteLines,
+                columns: Optional[Sequence[str]],
+                sort: bool,
+                types: Optional[Sequence[int]] = None,
+                mols: Optional[Sequence[int]] = None) -> Optional[DumpFrame]:
+    header = _read_header(fh)
+    if header is None:
+        return None
+    timestep, n_atoms, box, boundary, names = header
+
+    raw = fh.read_rows(n_atoms)
+    if raw is None:
+        return None                             # truncated trailing frame
+    block = _decode(raw, n_atoms, timestep, names, _row_keep(names, types, mols))
+    return _to_frame(block, timestep, box, boundary, names, columns, sort)
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# public API
+# ──────────────────────────────────────────────────────────────────────────
+def iter_dump(dump_file: str | Path,
+              columns: Optional[Sequence[str]] = None,
+              sort: bool = True,
+              types: Optional[Sequence[int]] = None,
+              mols: Optional[Sequence[int]] = None) -> Iterator[DumpFrame]:
+    """
+    Yield the frames of a LAMMPS ``dump custom`` file one at a time.
+
+    Parameters
+    ----------
+    dump_file
+        Path to ``traj_<fName>.dump``, optionally gzip/bzip2/xz/zstd
+        compressed (see :py:mod:`analysis.compressed`).
+    columns
+        Names of the per-atom columns to keep (default: all of them).
+    sort
+        Reorder every frame by atom ``id`` (LAMMPS writes atoms in
+        processor order unless ``dump_modify sort id`` is used).
+    types, mols
+        Keep only rows of these atom types / molecule IDs; the other rows
+        are dropped before conversion.  Needs the ``type`` / ``mol``
+        column in the dump.
+
+    Yields
+    ------
+    DumpFrame
+        Timestep, box and the requested columns of one frame.
+
+    Raises
+    ------
+    KeyError
+        If *columns*, *types* or *mols* refer to a column the dump lacks.
+
+    Notes
+    -----
+    A trailing frame that is only partially written (the run is still
+    going) is silently dropped.
+    """
+    with open_binary(dump_file) as raw:
+        fh = _ByteLines(raw)
+        while True:
+            frame = _read_frame(fh, columns, sort, types, mols)
+            if frame is None:
+                return
+            yield frame
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Live tail-follow monitor and watchdog for a running simulation.
+
+Typical usage
+-------------
+>>> from analysis.monitor import monitor_run
+>>> mon = monitor_run("runs/N400_n5", "N400_n5_Es3ns05",
+...                   input_file="Template_input.in",
+...                   colvars_file="N400_Rg.colvars")
+>>> mon.run(interval=300)         # poll every 5 min, update plots, check rules
+
+Every follower remembers the byte offset it has consumed and, on each
+poll, reads only the bytes appended since – up to the last complete line
+(or, for ``traj_*.dump``, the last complete frame via
+:py:class:`~analysis.dump_index.DumpIndex`).  Rolling windows of the
+parsed rows feed the plots and the watchdog rules; the default rules flag
+NaN energies, a temperature far from ``T`` and ``Rg`` running into the
+``upperWalls`` of the colvars file.  When a rule trips, the monitor
+writes a *stop file* (default ``STOP`` in the run directory) with the
+reason, for the job script or a ``fix halt`` check to act on.
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+try:
+    from .column_files import (BONDDATA_COLUMNS, THERMO_COLUMNS, _bulk_parse,
+                               _COMMENT_LINE, _header_names)
+    from .dump_index import DumpIndex
+    from .lammps_dump import DumpFrame
+except ImportError:                      # run as a loose script from analysis/
+    from column_files import (BONDDATA_COLUMNS, THERMO_COLUMNS, _bulk_parse,
+                              _COMMENT_LINE, _header_names)
+    from dump_index import DumpIndex
+    from lammps_dump import DumpFrame
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# followers
+# ──────────────────────────────────────────────────────────────────────────
+class TableFollower:
+    """
+    Incrementally parse a growing whitespace table (``Thermo_*.dat``,
+    ``BondData_*.dat``, ``*.colvars.traj`` …).
+
+    Parameters
+    ----------
+    path
+        File to follow; it may not exist yet.
+    default_names
+        Column names if the header does not provide them.
+    window
+        Number of most recent rows kept in :py:attr:`data`.
+    """
+
+    def __init__(self, path: str | Path,
+                 default_names: Optional[Sequence[str]] = None,
+                 window: int = 100_000) -> None:
+        self.path = Path(path)
+        self.default_names = tuple(default_names or ())
+        self.window = window
+        self.offset = 0
+        self.names: list[str] = []
+        self.data = np.empty((0, 0))
+        self.latest = np.empty((0, 0))
+        self._header = ""                   # comments read before the first row
+
+    def column(self, name: str, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Column *name* of the rolling window (or of *rows*)."""
+        rows = self.data if rows is None else rows
+        return rows[:, self.names.index(name)] if len(rows) else np.empty(0)
+
+    def stats(self, name: str, last: Optional[int] = None) -> tuple[float, float]:
+        """Mean and standard deviation of the last *last* values of *name*."""
+        values = self.column(name)[-last:] if last else self.column(name)
+        return (float(values.mean()), float(values.std())) if len(values) else (np.nan, np.nan)
+
+    def poll(self) -> np.ndarray:
+        """
+        Parse rows appended since the previous poll.
+
+        Returns
+        -------
+        numpy.ndarray
+            ``(n_new, n_columns)`` float array (also kept in
+            :py:attr:`latest`).
+        """
+        self.latest = np.empty((0, len(self.names)))
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return self.latest
+        if size < self.offset:                          # file was restarted
+            self.offset, self.names, self.data = 0, [], np.empty((0, 0))
+            self._header = ""
+
+        with self.path.open("rb") as fh:
+            fh.seek(self.offset)
+            chunk = fh.read(size - self.offset)
+        cut = chunk.rfind(b"\n") + 1
+        if cut == 0:
+            return self.latest
+        self.offset += cut
+        text = chunk[:cut].decode()
+
+        body = _COMMENT_LINE.sub("", text)
+        first = next((ln for ln in body.splitlines() if ln.strip()), "")
+        if not self.names:
+            # the header may arrive in an earlier poll than the first row
+            self._header += text
+        if not first:
+            return self.latest
+        n_cols = len(first.split())
+        if not self.names:
+            self.names = (_header_names(self._header, n_cols)
+                          or list(self.default_names[:n_cols])
+                          + [f"c{i}" for i in range(len(self.default_names), n_cols)])
+            self._header = ""
+        rows = _bulk_parse(body, n_cols)
+        if rows is None:
+            rows = np.loadtxt(body.splitlines(), ndmin=2)
+
+        self.latest = rows
+        self.data = rows if not self.data.size else np.concatenate([self.data, rows])
+        self.data = self.data[-self.window:]
+        return rows
+
+
+class DumpFollower:
+    """
+    Yield frames appended to a ``traj_*.dump`` since the previous poll.
+
+    Parameters
+    ----------
+    path
+        Dump file; it may not exist yet.
+    columns
+        Per-atom columns to parse for each new frame.
+    """
+
+    def __init__(self, path: str | Path,
+                 columns: Optional[Sequence[str]] = None) -> None:
+        self.path = Path(path)
+        self.columns = columns
+        self.index: Optional[DumpIndex] = None
+        self.seen = 0
+
+    def poll(self) -> list[DumpFrame]:
+        if not self.path.exists():
+            return []
+        if self.index is None:
+            self.index = DumpIndex(self.path)
+        else:
+            self.index.refresh()
+        new = self.index.select(self.seen)
+        self.seen = len(self.index)
+        return list(self.index.iter_frames(frames=new, columns=self.columns))
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# watchdog rules
+# ──────────────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class Rule:
+    """
+    A watchdog condition on one table follower.
+
+    ``check`` receives the follower after a poll and returns a message
+    when the run should be stopped, else *None*.
+    """
+
+    name: str
+    source: str
+    check: Callable[[TableFollower], Optional[str]]
+
+
+def nan_rule(column: str = "PotEng", source: str = "thermo") -> Rule:
+    """Trip on NaN/inf in the newly appended values of *column*."""
+    def check(f: TableFollower) -> Optional[str]:
+        if column not in f.names:
+            return None
+        bad = ~np.isfinite(f.column(column, f.latest))
+        return f"non-finite {column} in {f.path.name}" if bad.any() else None
+    return Rule(f"nan:{column}", source, check)
+
+
+def band_rule(column: str, target: float, tolerance: float,
+              last: int = 5, source: str = "thermo") -> Rule:
+    """Trip when the mean of the last *last* values of *column* leaves
+    ``target ± tolerance``."""
+    def check(f: TableFollower) -> Optional[str]:
+        if column not in f.names or len(f.data) < last:
+            return None
+        mean, _ = f.stats(column, last)
+        if abs(mean - target) > tolerance:
+            return f"{column} = {mean:.4g} outside {target:g} ± {tolerance:g}"
+        return None
+    return Rule(f"band:{column}", source, check)
+
+
+def ceiling_rule(column: str, limit: float, margin: float = 0.0,
+                 source: str = "colvars") -> Rule:
+    """Trip when the latest value of *column* reaches ``limit - margin``
+    (e.g. ``Rg1`` against the ``upperWalls`` of a harmonic wall)."""
+    def check(f: TableFollower) -> Optional[str]:
+        if column not in f.names or not len(f.latest):
+            return None
+        value = f.column(column, f.latest)[-1]
+        if value >= limit - margin:
+            return f"{column} = {value:.4g} reached {limit:g} (margin {margin:g})"
+        return None
+    return Rule(f"ceiling:{column}", source, check)
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# monitor
+# ──────────────────────────────────────────────────────────────────────────
+class Monitor:
+    """
+    Poll followers, update rolling plots and evaluate watchdog rules.
+
+    Parameters
+    ----------
+    tables
+        Name → :py:class:`TableFollower` (rules refer to these names).
+    dump
+        Optional :py:class:`DumpFollower`; new frames go to *on_frame*.
+    rules
+        Watchdog rules.
+    plots
+        Table name → columns to draw against the first column.
+    stop_file
+        File written (with the reasons) when a rule trips; *None* only
+        reports.
+    on_frame
+        Callback for each new dump frame, e.g. a cluster analysis.
+    """
+
+    def __init__(self,
+                 tables: dict[str, TableFollower],
+                 dump: Optional[DumpFollower] = None,
+                 rules: Sequence[Rule] = (),
+                 plots: Optional[dict[str, Sequence[str]]] = None,
+                 stop_file: Optional[str | Path] = None,
+                 on_frame: Optional[Callable[[DumpFrame], None]] = None) -> None:
+        self.tables, self.dump, self.rules = tables, dump, list(rules)
+        self.plots = plots or {}
+        self.stop_file = Path(stop_file) if stop_file is not None else None
+        self.on_frame = on_frame
+        self.tripped: list[str] = []
+        self._lines: dict[tuple[str, str], plt.Line2D] = {}
+
+    def poll(self) -> list[str]:
+        """
+        Read new data once and evaluate the rules.
+
+        Returns
+        -------
+        list[str]
+            Messages of the rules that tripped on this poll.
+        """
+        for follower in self.tables.values():
+            follower.poll()
+        if self.dump is not None:
+            for frame in self.dump.poll():
+                if self.on_frame is not None:
+                    self.on_frame(frame)
+
+        messages = []
+        for rule in self.rules:
+            follower = self.tables.get(rule.source)
+            msg = rule.check(follower) if follower is not None else None
+            if msg:
+                messages.append(f"[{rule.name}] {msg}")
+        if messages:
+            self.tripped.extend(messages)
+            if self.stop_file is not None:
+                self.stop_file.write_text("\n".join(self.tripped) + "\n")
+        return messages
+
+    def draw(self) -> None:
+        """Create or refresh one axis per entry of *plots*."""
+        if not self.plots:
+            return
+        if not self._lines:
+            _, axes = plt.subplots(len(self.plots), 1, squeeze=False,
+                                   figsize=(7, 2.5 * len(self.plots)))
+            for ax, (table, cols) in zip(axes[:, 0], self.plots.items()):
+                for col in cols:
+                    self._lines[table, col], = ax.plot([], [], lw=1.2, label=col)
+                ax.set_title(self.tables[table].path.name)
+                ax.legend(fontsize="small")
+        for (table, col), line in self._lines.items():
+            f = self.tables[table]
+            if col in f.names and len(f.data):
+                line.set_data(f.data[:, 0], f.column(col))
+                line.axes.relim()
+                line.axes.autoscale_view()
+
+    def run(self, interval: float = 60.0,
+            max_polls: Optional[int] = None,
+            plot: bool = True,
+            stop_on_trip: bool = True) -> list[str]:
+        """
+        Poll every *interval* seconds until a rule trips (or *max_polls*).
+
+        Returns
+        -------
+        list[str]
+            All messages of rules that tripped.
+        """
+        polls = 0
+        while max_polls is None or polls < max_polls:
+            messages = self.poll()
+            polls += 1
+            if plot:
+                self.draw()
+                plt.pause(0.01)
+            if messages and stop_on_trip:
+                break
+            time.sleep(interval)
+        return self.tripped
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# convenience
+# ──────────────────────────────────────────────────────────────────────────
+def read_input_variable(input_file: str | Path, name: str) -> Optional[float]:
+    """Value of ``variable <name> equal <value>`` in a LAMMPS input."""
+    pattern = re.compile(rf"^\s*variable\s+{re.escape(name)}\s+equal\s+(\S+)", re.MULTILINE)
+    match = pattern.search(Path(input_file).read_text())
+    try:
+        return float(match.group(1)) if match else None
+    except ValueError:
+        return None
+
+
+def read_upper_wall(colvars_file: str | Path) -> Optional[float]:
+    """First ``upperWalls`` value of a Colvars configuration."""
+    match = re.search(r"upperWalls\s+([-+0-9.eE]+)", Path(colvars_file).read_text())
+    return float(match.group(1)) if match else None
+
+
+def monitor_run(run_dir: str | Path,
+                fName: str,
+                input_file: Optional[str | Path] = None,
+                colvars_file: Optional[str | Path] = None,
+                T: Optional[float] = None,
+                T_tolerance: float = 15.0,
+                upper_wall: Optional[float] = None,
+                wall_margin: float = 2.0,
+                stop_file: Optional[str | Path] = "STOP",
+                dump_columns: Optional[Sequence[str]] = None,
+                on_frame: Optional[Callable[[DumpFrame], None]] = None) -> Monitor:
+    """
+    Build a :py:class:`Monitor` for the outputs of ``Template_input.in``.
+
+    Parameters
+    ----------
+    run_dir
+        Directory the job writes to.
+    fName
+        Value of ``variable fName`` (``Thermo_${fName}.dat`` …).
+    input_file, colvars_file
+        Read ``T`` and ``upperWalls`` from these if not given explicitly.
+    T, T_tolerance
+        Target temperature and allowed deviation of the rolling mean.
+    upper_wall, wall_margin
+        Trip when ``Rg1`` gets within *wall_margin* of the wall.
+    stop_file
+        Written inside *run_dir* when a rule trips (*None* disables).
+    dump_columns, on_frame
+        Columns parsed for new ``traj_${fName}.dump`` frames and the
+        callback that receives them (no dump following without it).
+    """
+    run_dir = Path(run_dir)
+    if T is None and input_file is not None:
+        T = read_input_variable(input_file, "T")
+    if upper_wall is None and colvars_file is not None:
+        upper_wall = read_upper_wall(colvars_file)
+
+    tables = {
+        "thermo": TableFollower(run_dir / f"Thermo_{fName}.dat", THERMO_COLUMNS),
+        "bonds": TableFollower(run_dir / f"BondData_{fName}.dat", BONDDATA_COLUMNS),
+        "colvars": TableFollower(run_dir / f"{fName}.colvars.traj", ("step",)),
+    }
+    rules = [nan_rule("PotEng"), nan_rule("KinEng")]
+    if T is not None:
+        rules.append(band_rule("Temp", T, T_tolerance))
+    if upper_wall is not None:
+        rules.append(ceiling_rule("Rg1", upper_wall, wall_margin))
+
+    dump = (DumpFollower(run_dir / f"traj_{fName}.dump", dump_columns)
+            if on_frame is not None else None)
+    return Monitor(tables, dump, rules,
+                   plots={"thermo": ["PotEng"], "colvars": ["Rg1"]},
+                   stop_file=run_dir / stop_file if stop_file else None,
+                   on_frame=on_frame)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Periodic neighbour search for the pair-distance analyses.
+
+Typical usage
+-------------
+>>> from analysis.lammps_data import read_data
+>>> from analysis.neighbours import pair_histogram
+>>> st = read_data("final_state_Run1.DATA", types=(1, 3), columns=("mols", "coords"))
+>>> counts = pair_histogram(st.coords, max_r=50.0, bin_width=0.2,
+...                         box=st.box, exclude=st.mols)   # inter-molecular only
+
+Only pairs closer than ``max_r`` are ever enumerated: the positions are
+wrapped into the box and put in a periodic :py:class:`scipy.spatial.cKDTree`
+(minimum-image distances), and the tree is queried for one block of
+``chunk_size`` atoms at a time.  Memory is bounded by the neighbours of
+one block, and the cost grows with *N × neighbours* instead of *N²*.
+Histograms are accumulated block by block with ``np.bincount``.
+
+For short cut-offs in a periodic box, :py:func:`cell_pairs` finds the
+same pairs with a cell list instead of a tree: atoms are sorted into
+cells at least ``max_r`` wide and only the 27 surrounding cells are
+searched, so the cost is *O(N)* at fixed density.
+"""
+
+from __future__ import annotations
+
+from itertools import product
+from typing import Iterator, Optional
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+def wrap_positions(coords: np.ndarray, box: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Shift *coords* into ``[0, L)`` along every axis.
+
+    Parameters
+    ----------
+    coords
+        ``(N, 3)`` positions (wrapped or unwrapped).
+    box
+        ``(3, 2)`` ``[lo, hi]`` bounds, e.g. ``LammpsData.box``.
+
+    Returns
+    -------
+    positions, lengths
+        Wrapped ``(N, 3)`` float64 positions and the ``(3,)`` box lengths.
+    """
+    box = np.asarray(box, dtype=np.float64)
+    lengths = box[:, 1] - box[:, 0]
+    pos = np.mod(np.asarray(coords, dtype=np.float64) - box[:, 0], lengths)
+    pos[pos >= lengths] = 0.0                # mod can round up to exactly L
+    return pos, lengths
+
+
+def _check_cutoff(max_r: float, lengths: np.ndarray) -> None:
+    if max_r > 0.5 * lengths.min():
+        raise ValueError(f"max_r={max_r} exceeds half the shortest box edge "
+                         f"({0.5 * lengths.min()})")
+
+
+def iter_pairs(coords: np.ndarray,
+               max_r: float,
+               box: Optional[np.ndarray] = None,
+               chunk_size: int = 8192) -> Iterator[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Yield every pair closer than *max_r* exactly once, block by block.
+
+    Parameters
+    ----------
+    coords
+        ``(N, 3)`` positions.
+    max_r
+        Cut-off distance; in a periodic box at most half the shortest
+        edge (beyond that shells are incomplete, and every atom would be
+        paired with every other one).
+    box
+        ``(3, 2)`` box bounds for periodic (minimum-image) distances;
+        *None* for open boundaries.
+    chunk_size
+        Atoms queried per block.
+
+    Yields
+    ------
+    i, j, r
+        Row indices with ``i < j`` and their distance (blocks are not in
+        row order).
+
+    Raises
+    ------
+    ValueError
+        If *max_r* exceeds half the shortest edge of a periodic box.
+    """
+    if box is not None:
+        pos, lengths = wrap_positions(coords, box)
+        _check_cutoff(max_r, lengths)
+    else:
+        pos, lengths = np.asarray(coords, dtype=np.float64), None
+    tree = cKDTree(pos, boxsize=lengths)
+
+    # blocks follow the tree's leaf order, so each one is spatially compact
+    for start in range(0, len(pos), chunk_size):
+        rows = tree.indices[start:start + chunk_size]
+        block = cKDTree(pos[rows], boxsize=lengths)
+        pairs = block.sparse_distance_matrix(tree, max_r, output_type="ndarray")
+        i = rows[pairs["i"]].astype(np.int64)
+        j = pairs["j"].astype(np.int64)
+        keep = j > i
+        yield i[keep], j[keep], pairs["v"][keep]
+
+
+def cell_pairs(coords: np.ndarray,
+               max_r: float,
+               box: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Every pair closer than *max_r* in a periodic box, from a cell list.
+
+    Parameters
+    ----------
+    coords
+        ``(N, 3)`` positions (wrapped or unwrapped).
+    max_r
+        Cut-off distance (at most half the shortest box edge).
+    box
+        ``(3, 2)`` box bounds.
+
+    Returns
+    -------
+    i, j, r
+        Row indices with ``i < j`` and their minimum-image distance.
+    """
+    pos, lengths = wrap_positions(coords, box)
+    _check_cutoff(max_r, lengths)
+    n_cells = np.maximum((lengths // max_r).astype(np.int64), 1)
+    cell = np.minimum((pos / (lengths / n_cells)).astype(np.int64), n_cells - 1)
+    flat = (cell[:, 0] * n_cells[1] + cell[:, 1]) * n_cells[2] + cell[:, 2]
+
+    order = np.argsort(flat, kind="stable")
+    counts = np.bincount(flat, minlength=int(np.prod(n_cells)))
+    starts = np.cumsum(counts) - counts
+
+    # distinct neighbour shifts per axis (fewer than three cells wrap onto each other)
+    shifts = [np.unique(np.mod((-1, 0, 1), n)) for n in n_cells]
+    rows = np.arange(len(pos))
+    out_i, out_j, out_r = [], [], []
+    for dx, dy, dz in product(*shifts):
+        nb = (((cell[:, 0] + dx) % n_cells[0]) * n_cells[1]
+              + (cell[:, 1] + dy) % n_cells[1]) * n_cells[2] + (cell[:, 2] + dz) % n_cells[2]
+        cnt = counts[nb]
+        i = np.repeat(rows, cnt)
+        k = np.arange(cnt.sum()) - np.repeat(np.cumsum(cnt) - cnt, cnt)
+        j = order[np.repeat(starts[nb], cnt) + k]
+        keep = i < j
+        i, j = i[keep], j[keep]
+        d = pos[j] - pos[i]
+        d -= lengths * np.rint(d / lengths)
+        r = np.sqrt(np.einsum("ij,ij->i", d, d))
+        close = r < max_r
+        out_i.append(i[close])
+        out_j.append(j[close])
+        out_r.append(r[close])
+    return np.concatenate(out_i), np.concatenate(out_j), np.concatenate(out_r)
+
+
+def contact_edges(coords: np.ndarray,
+                  cutoff: float,
+                  box: Optional[np.ndarray] = None,
+                  chunk_size: int = 8192) -> np.ndarray:
+    """``(M, 2)`` row pairs closer than *cutoff* (arguments as for
+    :py:func:`iter_pairs`), e.g. as edges of a contact graph."""
+    edges = [np.column_stack([i, j]) for i, j, _ in iter_pairs(coords, cutoff, box, chunk_size)]
+    return np.concatenate(edges) if edges else np.empty((0, 2), dtype=np.int64)
+
+
+def pair_histogram(coords: np.ndarray,
+                   max_r: float,
+                   bin_width: float,
+                   box: Optional[np.ndarray] = None,
+                   exclude: Optional[np.ndarray] = None,
+                   chunk_size: int = 8192) -> np.ndarray:
+    """
+    Histogram of pair distances in bins ``[k·w, (k+1)·w)`` up to *max_r*.
+
+    Parameters
+    ----------
+    coords, max_r, box, chunk_size
+        As for :py:func:`iter_pairs`.
+    bin_width
+        Bin width *w*.
+    exclude
+        Per-atom labels (e.g. molecule IDs); pairs with equal labels are
+        not counted.
+
+    Returns
+    -------
+    numpy.ndarray
+        ``ceil(max_r / w)`` int64 pair counts (the last bin stops at
+        *max_r* when that is not a multiple of *w*).
+    """
+    n_bins = int(np.ceil(max_r / bin_width))
+    counts = np.zeros(n_bins, dtype=np.int64)
+    for i, j, r in iter_pairs(coords, max_r, box, chunk_size):
+        if exclude is not None:
+            r = r[exclude[i] != exclude[j]]
+        k = (r / bin_width).astype(np.int64)
+        counts += np.bincount(k[k < n_bins], minlength=n_bins)
+    return counts
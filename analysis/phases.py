@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Coexisting dense and dilute concentrations, averaged over frames and runs.
+
+Typical usage
+-------------
+>>> from analysis.phases import phase_concentrations, phase_diagram
+>>> series = phase_concentrations("traj_Run1.dump", cutoff=15.0)
+>>> res = series.result()                 # beads per Å³, with error bars
+>>> res.c_dense, res.err_dense, res.c_dilute, res.err_dilute
+>>> runs = phase_diagram({(0.3, 6): "Ens0.3_Es6/traj_Run1.dump",
+...                       (0.3, 8): "Ens0.3_Es8/traj_Run1.dump"}, frames=range(10, 26))
+
+Every frame is split into a dense and a dilute phase:
+
+* *dense atoms* are those of the chains in the largest cluster of chains
+  in contact (:py:mod:`analysis.clustering`), or – with a ``threshold`` –
+  those in grid cells whose bead density reaches the threshold;
+* the *dense volume* is the volume of the grid cells the dense atoms
+  occupy, or (``volume="hull"``) the convex hull of the largest cluster
+  made whole across the boundary (:py:func:`analysis.unwrap.make_whole`);
+* ``c_dense = N_dense / V_dense`` and
+  ``c_dilute = (N − N_dense) / (V_box − V_dense)``, in beads per Å³;
+  divide by the chain length for chains per Å³.
+
+:py:class:`PhaseSeries` keeps these few numbers per frame, never the
+coordinates.  Successive frames are correlated, so the error bars of
+:py:meth:`PhaseSeries.result` come from blocking (Flyvbjerg & Petersen,
+:py:func:`block_error`): the series is halved into block means until the
+standard error stops growing, which accounts for the autocorrelation
+without estimating it explicitly.
+
+:py:func:`phase_concentrations` spreads the frames of one dump over
+worker processes; :py:func:`phase_diagram` does so for many runs
+(one per *(Ens, Es)* point) in a single pool.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any, Mapping, Optional, Sequence
+
+import numpy as np
+from scipy.spatial import ConvexHull, QhullError
+
+try:
+    from .clustering import molecule_clusters
+    from .dump_index import reduce_frames, reduce_runs
+    from .lammps_dump import DumpFrame
+    from .neighbours import cell_pairs, wrap_positions
+    from .radial import largest_cluster
+    from .unwrap import make_whole
+except ImportError:                      # run as a loose script from analysis/
+    from clustering import molecule_clusters
+    from dump_index import reduce_frames, reduce_runs
+    from lammps_dump import DumpFrame
+    from neighbours import cell_pairs, wrap_positions
+    from radial import largest_cluster
+    from unwrap import make_whole
+
+
+#: Dump columns a frame needs.
+COLUMNS = ("mol", "x", "y", "z")
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# dense phase of one configuration
+# ──────────────────────────────────────────────────────────────────────────
+def _grid_cells(coords: np.ndarray, box: np.ndarray,
+                spacing: float) -> tuple[np.ndarray, int, float]:
+    """Flat cell index of every atom, the number of cells and the cell volume."""
+    pos, lengths = wrap_positions(coords, box)
+    n = np.maximum((lengths // spacing).astype(np.int64), 1)
+    cell = np.minimum((pos / (lengths / n)).astype(np.int64), n - 1)
+    flat = (cell[:, 0] * n[1] + cell[:, 1]) * n[2] + cell[:, 2]
+    return flat, int(np.prod(n)), float(np.prod(lengths / n))
+
+
+def occupied_volume(coords: np.ndarray, box: np.ndarray, spacing: float) -> float:
+    """Volume of the periodic grid cells (edge ≥ *spacing*) holding at
+    least one of *coords*."""
+    if len(coords) == 0:
+        return 0.0
+    flat, _, cell_volume = _grid_cells(coords, box, spacing)
+    return len(np.unique(flat)) * cell_volume
+
+
+def hull_volume(coords: np.ndarray, box: np.ndarray, cutoff: float) -> float:
+    """Convex-hull volume of *coords* after making their contact graph
+    (pairs closer than *cutoff*) whole; 0 for degenerate point sets."""
+    if len(coords) < 4:
+        return 0.0
+    i, j, _ = cell_pairs(coords, cutoff, box)
+    whole = make_whole(coords, box, np.column_stack([i, j]))
+    try:
+        return float(ConvexHull(whole).volume)
+    except QhullError:
+        return 0.0
+
+
+def dense_phase(coords: np.ndarray,
+                box: np.ndarray,
+                mols: np.ndarray,
+                cutoff: float = 15.0,
+                threshold: Optional[float] = None,
+                volume: str = "grid",
+                spacing: Optional[float] = None) -> tuple[np.ndarray, float]:
+    """
+    Atoms and volume of the dense phase.
+
+    Parameters
+    ----------
+    coords, box, mols
+        Positions, ``(3, 2)`` periodic box bounds and molecule IDs.
+    cutoff
+        Contact distance that joins chains into clusters.
+    threshold
+        Bead density [Å⁻³] above which a grid cell is dense; *None* takes
+        the largest cluster of chains instead.
+    volume
+        ``"grid"`` (occupied cells) or ``"hull"`` (convex hull of the
+        largest cluster; not with *threshold*).
+    spacing
+        Grid cell edge (default: *cutoff*).
+
+    Returns
+    -------
+    mask, v_dense
+        Boolean mask of the dense atoms and the dense volume [Å³].
+    """
+    if volume not in ("grid", "hull"):
+        raise ValueError(f"volume must be 'grid' or 'hull', not {volume!r}")
+    spacing = spacing or cutoff
+    if threshold is not None:
+        if volume == "hull":
+            raise ValueError("volume='hull' needs the largest-cluster definition (threshold=None)")
+        flat, n_cells, cell_volume = _grid_cells(coords, box, spacing)
+        dense_cell = np.bincount(flat, minlength=n_cells) >= threshold * cell_volume
+        mask = dense_cell[flat]
+        return mask, float(np.count_nonzero(dense_cell)) * cell_volume
+
+    chains, _, labels = molecule_clusters(coords, box, mols, cutoff)
+    mask = largest_cluster(labels)[np.searchsorted(chains, mols)]
+    if volume == "hull":
+        return mask, hull_volume(np.asarray(coords)[mask], box, cutoff)
+    return mask, occupied_volume(np.asarray(coords)[mask], box, spacing)
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# error bars
+# ──────────────────────────────────────────────────────────────────────────
+def block_error(x: np.ndarray, min_blocks: int = 8) -> tuple[float, float]:
+    """
+    Mean of a correlated time series and its blocking standard error.
+
+    The series is repeatedly replaced by the means of neighbouring pairs;
+    the standard error of the mean is computed at every level that still
+    has at least *min_blocks* blocks, and the largest one is returned
+    (the plateau, once blocks are longer than the correlation time).
+
+    Returns
+    -------
+    mean, err
+        NaN when *x* is empty; ``err`` is NaN for fewer than two values.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    x = x[np.isfinite(x)]
+    if len(x) == 0:
+        return float("nan"), float("nan")
+    if len(x) < 2:
+        return float(x[0]), float("nan")
+    mean = float(x.mean())
+    err = np.std(x, ddof=1) / np.sqrt(len(x))
+    while len(x) // 2 >= max(min_blocks, 2):
+        half = len(x) // 2
+        x = 0.5 * (x[0:2 * half:2] + x[1:2 * half:2])
+        err = max(err, np.std(x, ddof=1) / np.sqrt(len(x)))
+    return mean, float(err)
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# accumulator
+# ──────────────────────────────────────────────────────────────────────────
+@dataclass(frozen=True)
+class Coexistence:
+    """Frame-averaged concentrations [Å⁻³] with blocking errors."""
+
+    c_dense: float
+    err_dense: float
+    c_dilute: float
+    err_dilute: float
+    n_frames: int
+
+
+class PhaseSeries:
+    """
+    Per-frame dense/dilute split of a trajectory.
+
+    Parameters
+    ----------
+    cutoff, threshold, volume, spacing
+        See :py:func:`dense_phase`.
+
+    Attributes
+    ----------
+    timesteps, box_volume, v_dense, n_dense, n_atoms
+        One entry per frame, in timestep order.
+    """
+
+    _FIELDS = ("timesteps", "box_volume", "v_dense", "n_dense", "n_atoms")
+
+    def __init__(self,
+                 cutoff: float = 15.0,
+                 threshold: Optional[float] = None,
+                 volume: str = "grid",
+                 spacing: Optional[float] = None) -> None:
+        self.cutoff = cutoff
+        self.threshold = threshold
+        self.volume = volume
+        self.spacing = spacing
+        self.timesteps = np.empty(0, dtype=np.int64)
+        self.box_volume = np.empty(0)
+        self.v_dense = np.empty(0)
+        self.n_dense = np.empty(0, dtype=np.int64)
+        self.n_atoms = np.empty(0, dtype=np.int64)
+
+    @property
+    def settings(self) -> tuple:
+        return self.cutoff, self.threshold, self.volume, self.spacing
+
+    @property
+    def n_frames(self) -> int:
+        return len(self.timesteps)
+
+    # ---- accumulation --------------------------------------------------
+    def add(self, coords: np.ndarray, box: np.ndarray, mols: np.ndarray,
+            timestep: int = 0) -> None:
+        """Split one configuration and record it."""
+        box = np.asarray(box, dtype=np.float64)
+        mask, v_dense = dense_phase(coords, box, mols, *self.settings)
+        row = (timestep, np.prod(box[:, 1] - box[:, 0]), v_dense,
+               np.count_nonzero(mask), len(mask))
+        for name, value in zip(self._FIELDS, row):
+            setattr(self, name, np.append(getattr(self, name), value))
+
+    def add_frame(self, frame: DumpFrame) -> None:
+        """Record a dump frame (``mol`` and ``x y z`` or ``xu yu zu``)."""
+        unwrapped = "x" not in frame
+        self.add(frame.xyz(unwrapped), frame.box, frame["mol"], frame.timestep)
+
+    def __add__(self, other: "PhaseSeries") -> "PhaseSeries":
+        if other.settings != self.settings:
+            raise ValueError("cannot add PhaseSeries objects with different settings")
+        total = PhaseSeries(*self.settings)
+        order = np.argsort(np.concatenate([self.timesteps, other.timesteps]), kind="stable")
+        for name in self._FIELDS:
+            setattr(total, name, np.concatenate([getattr(self, name), getattr(other, name)])[order])
+        return total
+
+    # ---- results -------------------------------------------------------
+    @property
+    def c_dense(self) -> np.ndarray:
+        """Per-frame dense concentration (NaN without a dense volume)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.v_dense > 0, self.n_dense / self.v_dense, np.nan)
+
+    @property
+    def c_dilute(self) -> np.ndarray:
+        """Per-frame dilute concentration."""
+        rest = self.box_volume - self.v_dense
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(rest > 0, (self.n_atoms - self.n_dense) / rest, np.nan)
+
+    def result(self, start: int = 0, min_blocks: int = 8) -> Coexistence:
+        """
+        Average from frame *start* on (skip equilibration) with
+        :py:func:`block_error` error bars.
+        """
+        c_dense, err_dense = block_error(self.c_dense[start:], min_blocks)
+        c_dilute, err_dilute = block_error(self.c_dilute[start:], min_blocks)
+        return Coexistence(c_dense, err_dense, c_dilute, err_dilute,
+                           max(self.n_frames - start, 0))
+
+
+def _frame_phase(settings: tuple, frame: DumpFrame) -> PhaseSeries:
+    series = PhaseSeries(*settings)
+    series.add_frame(frame)
+    return series
+
+
+def phase_concentrations(dump_file: str | Path,
+                         cutoff: float = 15.0,
+                         threshold: Optional[float] = None,
+                         volume: str = "grid",
+                         spacing: Optional[float] = None,
+                         frames: Optional[Sequence[int]] = None,
+                         workers: Optional[int] = None) -> PhaseSeries:
+    """
+    :py:class:`PhaseSeries` of a ``dump custom`` trajectory.
+
+    Parameters
+    ----------
+    dump_file
+        ``traj_<fName>.dump`` with the :py:data:`COLUMNS`.
+    cutoff, threshold, volume, spacing
+        See :py:func:`dense_phase`.
+    frames
+        Frame numbers to use (default: all).
+    workers
+        Worker processes (default: ``os.cpu_count()``; ``1`` = serial).
+    """
+    settings = (cutoff, threshold, volume, spacing)
+    total = reduce_frames(dump_file, partial(_frame_phase, settings),
+                          frames=frames, columns=COLUMNS, workers=workers)
+    return total if total is not None else PhaseSeries(*settings)
+
+
+def phase_diagram(dump_files: Sequence[str | Path] | Mapping[Any, str | Path],
+                  cutoff: float = 15.0,
+                  threshold: Optional[float] = None,
+                  volume: str = "grid",
+                  spacing: Optional[float] = None,
+                  frames: Optional[Sequence[int]] = None,
+                  workers: Optional[int] = None) -> dict[Any, PhaseSeries]:
+    """
+    :py:func:`phase_concentrations` of many runs, e.g. one per
+    *(Ens, Es)* point, with the frames of all runs sharing one pool of
+    workers (:py:func:`analysis.dump_index.reduce_runs`).
+
+    Returns
+    -------
+    dict
+        Key (or path) → :py:class:`PhaseSeries`; call
+        :py:meth:`PhaseSeries.result` on each for the coexistence point.
+    """
+    settings = (cutoff, threshold, volume, spacing)
+    totals = reduce_runs(dump_files, partial(_frame_phase, settings),
+                         frames=frames, columns=COLUMNS, workers=workers)
+    return {key: total if total is not None else PhaseSeries(*settings)
+            for key, total in totals.items()}
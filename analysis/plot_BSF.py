@@ -11,10 +11,14 @@ autodoc.
 from pathlib import Path
 from typing import Optional
 
-import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.axes import Axes
 
+try:
+    from .column_files import read_thermo
+except ImportError:                      # run as a loose script from analysis/
+    from column_files import read_thermo
+
 
 font = {'family': 'arial', 'size': 16}
 plt.rc('font', **font)
@@ -55,15 +59,17 @@ def plot_bsf(
 
         BSF_i = (bonds_i - og_bonds) / max_bonds * 100
 
-    where ``bonds_i`` is taken from the last column of the thermo line.
+    where ``bonds_i`` is taken from the ``Bonds`` column of the thermo
+    title line (the last column if the file has no title).
     """
     file_path = Path(file_path)
-    data = np.loadtxt(file_path, comments="#")
-    if data.shape[1] < 5:
+    data = read_thermo(file_path)
+    names = data.dtype.names
+    if len(names) < 5:
         raise ValueError("Thermo file must have at least five columns.")
 
-    steps = data[:, 0]
-    bond_counts = data[:, -1]
+    steps = data[names[0]]
+    bond_counts = data["Bonds"] if "Bonds" in names else data[names[-1]]
 
     bsf = ((bond_counts - og_bonds) / max_bonds) * 100.0
 
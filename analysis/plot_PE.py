@@ -15,9 +15,13 @@ in the *API Reference*.
 from pathlib import Path
 from typing import Optional
 
-import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.axes import Axes
+
+try:
+    from .column_files import read_thermo
+except ImportError:                      # run as a loose script from analysis/
+    from column_files import read_thermo
 # ----------------------------------------------------------------------
 
 
@@ -26,7 +30,7 @@ plt.rc('font', **font)
 
 def plot_pe(file_path: str | Path, ax: Optional[Axes] = None) -> Axes:
     """
-    Plot *potential energy* (column 3) as a function of *timestep* (column 0).
+    Plot *potential energy* (``PotEng``) as a function of *timestep* (``Steps``).
 
     Parameters
     ----------
@@ -41,8 +45,8 @@ def plot_pe(file_path: str | Path, ax: Optional[Axes] = None) -> Axes:
         Axis containing the plotted line.
     """
     file_path = Path(file_path)
-    data = np.loadtxt(file_path, comments="#")
-    steps, pot = data[:, 0], data[:, 3]
+    data = read_thermo(file_path, usecols=("Steps", "PotEng"))
+    steps, pot = data["Steps"], data["PotEng"]
 
     if ax is None:
         _, ax = plt.subplots()
@@ -13,6 +13,11 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.axes import Axes
 
+try:
+    from .column_files import read_bonddata
+except ImportError:                      # run as a loose script from analysis/
+    from column_files import read_bonddata
+
 
 font = {'family': 'arial', 'size': 16}
 plt.rc('font', **font)
@@ -38,9 +43,9 @@ def plot_sd(file_path: str | Path, ax: Optional[Axes] = None) -> Axes:
         Axis with a bar chart (or line) of dissociation events vs step.
     """
     file_path = Path(file_path)
-    raw = np.loadtxt(file_path, comments="#")
-    step      = raw[:, 0]
-    cum_break = raw[:, 2]
+    raw = read_bonddata(file_path, usecols=("step", "broken"))
+    step      = raw["step"]
+    cum_break = raw["broken"]
 
     # convert cumulative -> per-interval
     d_break = np.diff(cum_break)
@@ -3,80 +3,60 @@
 Compute a *cluster-size distribution* (in **molecules**) from **one**
 LAMMPS ``*.DATA`` snapshot and display it as a bar chart.
 
-For simplicity the connectivity is extracted directly from the “Bonds”
-section; no fancy spatial search is performed.
+By default the connectivity is extracted directly from the “Bonds”
+section; with a ``cutoff`` molecules in contact are joined as well
+(:py:mod:`analysis.clustering`), so droplets held together by the
+spacer attraction alone count as one cluster.
 """
 
 from __future__ import annotations
 
-from collections import Counter, defaultdict
 from pathlib import Path
-from typing import Optional, Tuple, List
+from typing import Optional
 
 import matplotlib.pyplot as plt
-import networkx as nx
 import numpy as np
 from matplotlib.axes import Axes
 
+try:
+    from .clustering import cluster_sizes, molecule_clusters
+    from .snapshot import Snapshot, as_snapshot
+except ImportError:                      # run as a loose script from analysis/
+    from clustering import cluster_sizes, molecule_clusters
+    from snapshot import Snapshot, as_snapshot
+
 
 font = {'family': 'arial', 'size': 16}
 plt.rc('font', **font)
 
-def _read_snapshot(file_path: Path) -> Tuple[List[int], List[Tuple[int, int]]]:
-    mol_ids: list[int] = []
-    bonds: list[Tuple[int, int]] = []
-    atom_to_mol: dict[int, int] = {}      # NEW
-
-    mode = None
-    with file_path.open() as fh:
-        for line in fh:
-            clean = line.strip()
-            low  = clean.lower()
-
-            # --- section switches -------------------------------------------------
-            if low.startswith("atoms"):
-                mode = "atoms"
-                continue
-            if low.startswith("bonds"):
-                mode = "bonds"
-                continue
-            if low.startswith(("angles",          # anything we don’t need
-                                "velocities",
-                                "impropers",
-                                "dihedrals")):
-                mode = None
-                continue
-
-            if not clean or clean[0].isalpha():
-                continue
-
-            # --- data lines -------------------------------------------------------
-            if mode == "atoms":
-                # atom-ID, mol-ID, …
-                atom_id, mol_id = int(clean.split()[0]), int(clean.split()[1])
-                atom_to_mol[atom_id] = mol_id
-                mol_ids.append(mol_id)
-
-            elif mode == "bonds":
-                # bond-ID, type, atom-i, atom-j
-                _, _, a, b = clean.split()[:4]
-                bonds.append((int(a), int(b)))
-
-    # convert atom-level bonds → molecule-level bonds
-    mol_bonds = [(atom_to_mol[a], atom_to_mol[b]) for a, b in bonds]
-    return mol_ids, mol_bonds
-
-
-def plot_csize(data_file: str | Path, ax: Optional[Axes] = None) -> Axes:
+def _cluster_sizes(snap: Snapshot, cutoff: Optional[float] = None) -> np.ndarray:
+    """Number of molecules in every connected component of the
+    molecule-level bond graph (isolated molecules are clusters of size 1),
+    or of bonds plus contacts closer than *cutoff*."""
+    if cutoff is None:
+        _, label = snap.chain_clusters
+    else:
+        _, _, label = molecule_clusters(snap.coords, snap.box, snap.mols, cutoff,
+                                        bonds=snap.bond_rows)
+    return cluster_sizes(label)
+
+
+def plot_csize(data_file: str | Path | Snapshot,
+               ax: Optional[Axes] = None,
+               cutoff: Optional[float] = None) -> Axes:
     """
     Plot the *fraction of molecules* in clusters of size *s* for **one** snapshot.
 
     Parameters
     ----------
     data_file
-        LAMMPS ``*.DATA`` snapshot (with Atoms/Bonds sections).
+        LAMMPS ``*.DATA`` snapshot (with Atoms/Bonds sections), or a
+        :py:class:`~analysis.snapshot.Snapshot` of one.
     ax
         Optional Matplotlib axis.
+    cutoff
+        Contact distance [Å] that also joins molecules (e.g. ``15.0``);
+        *None* uses the bonds only.
 
     Returns
     -------
@@ -87,30 +67,24 @@ def plot_csize(data_file: str | Path, ax: Optional[Axes] = None) -> Axes:
     -----
     * Cluster size here means **number of molecules** (``mol`` IDs)
       in the connected component.
-    * Uses `networkx` for the connected-component search.
+    * Components come from ``scipy.sparse.csgraph`` on the molecule-level
+      bond array (:py:mod:`analysis.bond_graph`), cached on the snapshot;
+      with *cutoff* from a periodic cell list (:py:mod:`analysis.clustering`).
     """
-    data_file = Path(data_file)
-    mol_ids, bonds = _read_snapshot(data_file)
-
-    G = nx.Graph()
-    G.add_nodes_from(mol_ids)
-    # build edges *between molecules* (collapse atom IDs -> mol IDs)
-    for a, b in bonds:
-        G.add_edge(a, b)
+    snap = as_snapshot(data_file)
 
     # Connected components in molecule space
-    sizes = [len(cc) for cc in nx.connected_components(G)]
-    total_mols = len(set(mol_ids))
-    dist = Counter(sizes)
+    sizes = _cluster_sizes(snap, cutoff)
+    total_mols = sizes.sum()
 
-    xs = np.array(sorted(dist))
-    ys = np.array([dist[s] * s / total_mols for s in xs])
+    xs, n_clusters = np.unique(sizes, return_counts=True)
+    ys = n_clusters * xs / total_mols
 
     if ax is None:
         _, ax = plt.subplots()
     ax.bar(xs, ys, width=1.4)
     ax.set_xlabel("Cluster size (molecules)")
     ax.set_ylabel("Fraction of molecules in clusters of size s")
-    ax.set_title(data_file.name)
+    ax.set_title(snap.name)
 
     return ax
@@ -17,12 +17,18 @@ from __future__ import annotations
 
 from pathlib import Path
 from typing import Optional
-from collections import Counter
 
-import networkx as nx
+import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.axes import Axes
 
+try:
+    from .snapshot import Snapshot, as_snapshot
+    from .stickers import chain_degrees
+except ImportError:                      # run as a loose script from analysis/
+    from snapshot import Snapshot, as_snapshot
+    from stickers import chain_degrees
+
 
 font = {'family': 'arial', 'size': 16}
 plt.rc('font', **font)
@@ -30,58 +36,19 @@ plt.rc('font', **font)
 # ──────────────────────────────────────────────────────────────────────────
 # internal utilities
 # ──────────────────────────────────────────────────────────────────────────
-def _build_chain_graph(snapshot: Path) -> nx.MultiGraph:
+def _chain_degrees(snap: Snapshot) -> np.ndarray:
     """
-    Parse a LAMMPS ``*.DATA`` file and return a graph whose **nodes** are
-    molecules (chains) and whose **edges** are *type-3* bonds connecting
-    atoms in **different** molecules.
+    Return, for every molecule (chain), the number of **other** molecules
+    it is joined to by *type-3* bonds (parallel bonds to the same chain
+    count once), from the sticker partner array.
     """
-    atom2mol: dict[int, int] = {}
-    edges: list[tuple[int, int]] = []
-
-    section = None
-    with snapshot.open() as fh:
-        for raw in fh:
-            line = raw.strip()
-            low  = line.lower()
-
-            if low.startswith("atoms"):
-                section = "atoms"
-                continue
-            if low.startswith("bonds"):
-                section = "bonds"
-                continue
-            if low.startswith(("velocities", "angles", "masses",
-                                "pair coeffs", "angle coeffs")):
-                section = None
-                continue
-            if not line:
-                continue
-
-            if section == "atoms" and line[0].isdigit():
-                aid, mid = map(int, line.split()[:2])
-                atom2mol[aid] = mid
-
-            elif section == "bonds" and line[0].isdigit():
-                _, btype, a1, a2, *_ = line.split()
-                if int(btype) == 3:          # only sticker–sticker bonds
-                    edges.append((int(a1), int(a2)))
-
-    G = nx.MultiGraph()
-    G.add_nodes_from(set(atom2mol.values()))
-
-    for a1, a2 in edges:
-        m1, m2 = atom2mol[a1], atom2mol[a2]
-        if m1 != m2:
-            G.add_edge(m1, m2)
-
-    return G
+    return chain_degrees(snap.partner, snap.sticker_chain, len(snap.chains))
 
 
 # ──────────────────────────────────────────────────────────────────────────
 # public helper
 # ──────────────────────────────────────────────────────────────────────────
-def plot_neighbour_hist(snapshot_file: str | Path,
+def plot_neighbour_hist(snapshot_file: str | Path | Snapshot,
                         ax: Optional[Axes] = None,
                         colour: str = "tab:blue") -> Axes:
     """
@@ -90,7 +57,8 @@ def plot_neighbour_hist(snapshot_file: str | Path,
     Parameters
     ----------
     snapshot_file
-        Path to a ``final_state_*.DATA`` file.
+        Path to a ``final_state_*.DATA`` file, or a
+        :py:class:`~analysis.snapshot.Snapshot` of one.
     ax
         Existing Matplotlib ``Axes`` to draw on.  If *None* (default) a new
         ``Figure`` + ``Axes`` is created.
@@ -102,14 +70,10 @@ def plot_neighbour_hist(snapshot_file: str | Path,
     matplotlib.axes.Axes
         The axis containing the plotted histogram.
     """
-    snapshot_file = Path(snapshot_file)
-
-    G = _build_chain_graph(snapshot_file)
-    degs = [d for _, d in nx.Graph(G).degree()]         # collapse multiedges
-    hist = Counter(degs)
+    snap = as_snapshot(snapshot_file)
 
-    xs = sorted(hist)
-    ys = [hist[x] for x in xs]
+    xs, ys = np.unique(_chain_degrees(snap), return_counts=True)
+    xs, ys = xs.tolist(), ys.tolist()
 
     if ax is None:
         _, ax = plt.subplots(figsize=(6, 4))
@@ -123,7 +87,7 @@ def plot_neighbour_hist(snapshot_file: str | Path,
 
     ax.set_xlabel("# of neighbours (degree)")
     ax.set_ylabel("# of chains")
-    ax.set_title(snapshot_file.name)
+    ax.set_title(snap.name)
     ax.set_xticks(list(range(0, max(xs) + 1)))
     ax.set_xlim(-0.5, max(xs, default=0) + 0.5)
     ax.grid(axis="y", linestyle=":", linewidth=0.4)
@@ -14,76 +14,38 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Iterable, Optional
 
-import networkx as nx
+import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.axes import Axes
 
+try:
+    from .snapshot import Snapshot, as_snapshot
+    from .stickers import pair_multiplicities
+except ImportError:                      # run as a loose script from analysis/
+    from snapshot import Snapshot, as_snapshot
+    from stickers import pair_multiplicities
+
 
 font = {'family': 'arial', 'size': 16}
 plt.rc('font', **font)
 
 # ──────────────────────────────────────────────────────────────────────────
-# internal parser
+# internal utilities
 # ──────────────────────────────────────────────────────────────────────────
-def _build_chain_multigraph(snapshot: Path) -> nx.MultiGraph:
+def _pair_multiplicities(snap: Snapshot) -> np.ndarray:
     """
-    Return a **MultiGraph** whose nodes are molecule IDs and whose *parallel*
-    edges correspond to bonds joining a **type-1** atom and a **type-3** atom
-    that belong to two *different* molecules.
+    Return, for every pair of *different* molecules joined by at least one
+    sticker bond (type-1 ⇄ type-3), the number of such bonds, from the
+    sticker partner array.
     """
-    atom2mol: dict[int, int]   = {}
-    atom2type: dict[int, int]  = {}
-    candidate_bonds: list[tuple[int, int]] = []
-
-    section = None
-    with snapshot.open() as fh:
-        for raw in fh:
-            line = raw.strip()
-            if not line:
-                continue
-
-            low = line.lower()
-            if low.startswith("atoms"):
-                section = "atoms"
-                continue
-            if low.startswith("bonds"):
-                section = "bonds"
-                continue
-            if low.startswith(("velocities", "angles", "masses",
-                                "pair coeffs", "angle coeffs",
-                                "angles", "dihedrals", "impropers")):
-                section = None
-                continue
-
-            if section == "atoms" and line[0].isdigit():
-                aid, mid, atype = map(int, line.split()[:3])
-                atom2mol[aid]  = mid
-                atom2type[aid] = atype
-
-            elif section == "bonds" and line[0].isdigit():
-                # bond line: id  type  atom1 atom2
-                _, _btype, a1, a2, *_ = line.split()
-                candidate_bonds.append((int(a1), int(a2)))
-
-    # --- build graph -----------------------------------------------------
-    G = nx.MultiGraph()
-    G.add_nodes_from(set(atom2mol.values()))
-
-    for a1, a2 in candidate_bonds:
-        t1, t2 = atom2type.get(a1), atom2type.get(a2)
-        if {t1, t2} == {1, 3}:                     # sticker pair 1–3
-            m1, m2 = atom2mol[a1], atom2mol[a2]
-            if m1 != m2:                           # inter-molecular
-                G.add_edge(m1, m2)                 # MultiGraph keeps multiedges
-
-    return G
+    return pair_multiplicities(snap.partner, snap.sticker_chain, len(snap.chains))
 
 
 # ──────────────────────────────────────────────────────────────────────────
 # public helper
 # ──────────────────────────────────────────────────────────────────────────
 def plot_pair_bond_hist(
-    snapshot_file: str | Path,
+    snapshot_file: str | Path | Snapshot,
     *,
     bins: "int | Iterable[float] | str" = "auto",
     ax: Optional[Axes] = None,
@@ -94,19 +56,17 @@ def plot_pair_bond_hist(
 
     X-axis  →  # of parallel sticker bonds between a pair of chains  
     Y-axis  →  # of chain pairs exhibiting that count
-    """
-    snapshot_file = Path(snapshot_file)
-    G = _build_chain_multigraph(snapshot_file)
 
-    multiplicities = [
-        G.number_of_edges(u, v)           # counts parallel edges
-        for u, v in nx.Graph(G).edges()   # unique chain pairs
-    ]
+    *snapshot_file* is a ``*.DATA`` path or a
+    :py:class:`~analysis.snapshot.Snapshot`.
+    """
+    snap = as_snapshot(snapshot_file)
+    multiplicities = _pair_multiplicities(snap)
 
     if ax is None:
         _, ax = plt.subplots(figsize=(6, 4))
 
-    if multiplicities:
+    if len(multiplicities):
         ax.hist(multiplicities, bins=bins, edgecolor="black", alpha=0.85)
     else:
         ax.text(0.5, 0.5, "no type-1⇄3 inter-chain bonds", ha="center",
@@ -115,7 +75,7 @@ def plot_pair_bond_hist(
 
     ax.set_xlabel("# type-1/type-3 bonds connecting a chain pair")
     ax.set_ylabel("# chain pairs")
-    ax.set_title(snapshot_file.name)
+    ax.set_title(snap.name)
     ax.grid(axis="y", linestyle=":", linewidth=0.4)
     plt.tight_layout()
 
@@ -1,63 +1,97 @@
 #!/usr/bin/env python3
 """
 Volume-normalised **radial density** of stickers (types 1 & 3) and spacers
-(types 2 & 4) from a single LAMMPS ``*.DATA`` snapshot.
+(types 2 & 4) around the condensate, from a single LAMMPS ``*.DATA``
+snapshot or accumulated over dump frames.
 
 The function
 
 1. reads atomic coordinates,
-2. finds the geometric centre,
-3. bins distances into spherical shells (default 30),
+2. finds the largest cluster of chains joined by bonds or by contacts
+   within ``cutoff`` (:py:mod:`analysis.clustering`) and its periodic
+   (circular-mean) centre,
+3. bins minimum-image distances into spherical shells (default 30),
 4. normalises by shell volume and by total sticker / spacer count,
 5. plots two lines on the same axis.
+
+For many frames build the profile with
+:py:func:`analysis.radial.radial_profile` and draw it with
+:py:func:`plot_radial_profile`, which adds block-averaged error bars::
+
+    prof = radial_profile(iter_dump("traj_Run1.dump"), n_bins=30)
+    plot_radial_profile(prof)
 """
 
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple
 
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.axes import Axes
 
+try:
+    from .clustering import molecule_clusters
+    from .radial import RadialProfile, largest_cluster, minimum_image_distance, periodic_centre
+    from .snapshot import Snapshot, as_snapshot
+except ImportError:                      # run as a loose script from analysis/
+    from clustering import molecule_clusters
+    from radial import RadialProfile, largest_cluster, minimum_image_distance, periodic_centre
+    from snapshot import Snapshot, as_snapshot
+
 
 font = {'family': 'arial', 'size': 16}
 plt.rc('font', **font)
 
-def _load_atoms(file_path: Path) -> List[Tuple[int, float, float, float]]:
-    """Return list of tuples (type, x, y, z)."""
-    atoms: list[Tuple[int, float, float, float]] = []
-    with file_path.open() as fh:
-        mode = None
-        for line in fh:
-            clean = line.strip()
-            if clean.lower().startswith("atoms"):
-                mode = "atoms"
-                continue
-            if clean.lower().startswith(("bonds", "angles", "velocities")):
-                mode = None
-            if not clean or clean[0].isalpha() or mode != "atoms":
-                continue
-
-            parts = clean.split()
-            if len(parts) >= 7:
-                atoms.append(
-                    (int(parts[2]), float(parts[4]), float(parts[5]), float(parts[6]))
-                )
-    return atoms
-
-
-def _geometry(atoms):
-    pos = np.array([[x, y, z] for _, x, y, z in atoms])
-    centre = pos.mean(axis=0)
-    dist = np.linalg.norm(pos - centre, axis=1)
-    types = np.array([t for t, *_ in atoms])
-    return types, dist
+#: Type groups drawn by the helpers: stickers and spacers.
+GROUPS = ((1, 3), (2, 4))
+
+
+def _geometry(snap: Snapshot, cutoff: float = 15.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return types and minimum-image distances to the periodic centre of
+    the largest cluster of chains joined by bonds or contacts within
+    *cutoff* (without sticker bonds the droplet is held together by
+    contacts alone).
+    """
+    chains, _, label = molecule_clusters(snap.coords, snap.box, snap.mols, cutoff,
+                                         bonds=snap.bond_rows)
+    members = largest_cluster(label)[np.searchsorted(chains, snap.mols)]
+    centre = periodic_centre(snap.coords[members], snap.box)
+    return snap.types, minimum_image_distance(snap.coords, centre, snap.box)
+
+
+def plot_radial_profile(prof: RadialProfile,
+                        ax: Optional[Axes] = None,
+                        title: str = "") -> Axes:
+    """
+    Draw a two-group (stickers, spacers) :py:class:`~analysis.radial.RadialProfile`
+    normalised by the mean number of atoms of each group inside ``r_max``,
+    with error bars when the profile has at least two blocks.
+    """
+    rho, err = prof.density()
+    per_frame = prof.total.sum(axis=1, keepdims=True) / max(prof.n_frames, 1)
+    per_frame[per_frame == 0] = 1.0
+    rho, err = rho / per_frame, err / per_frame
+
+    if ax is None:
+        _, ax = plt.subplots()
+
+    for k, (marker, label) in enumerate([("*", "Stickers (1&3)"), ("o", "Spacers  (2&4)")]):
+        ax.errorbar(prof.centres, rho[k], yerr=None if np.isnan(err[k]).all() else err[k],
+                    marker=marker, capsize=2, label=label)
+    ax.set_xlabel("r [Å]")
+    ax.set_ylabel("Normalised density")
+    ax.set_title(title)
+    ax.legend()
+
+    return ax
 
 
 def plot_radial_distribution(
-    data_file: str | Path, nbins: int = 30, ax: Optional[Axes] = None
+    data_file: str | Path | Snapshot, nbins: int = 30, ax: Optional[Axes] = None,
+    cutoff: float = 15.0,
 ) -> Axes:
     """
     Plot volume-normalised radial distribution for *one* snapshot.
@@ -65,42 +99,26 @@ def plot_radial_distribution(
     Parameters
     ----------
     data_file
-        LAMMPS snapshot (``*.DATA``) with coordinates.
+        LAMMPS snapshot (``*.DATA``) with coordinates, or a
+        :py:class:`~analysis.snapshot.Snapshot` of one.
     nbins
-        Number of spherical shells between r=0 and r_max.
+        Number of spherical shells between r=0 and r_max (half the
+        shortest box edge, so every shell lies fully inside the box).
     ax
         Optional axis.
+    cutoff
+        Contact distance [Å] that joins chains into the condensate, as
+        for :py:func:`analysis.radial.radial_profile`.
 
     Returns
     -------
     matplotlib.axes.Axes
         Axis with two lines (stickers & spacers).
     """
-    atoms = _load_atoms(Path(data_file))
-    types, r = _geometry(atoms)
+    snap = as_snapshot(data_file)
+    types, r = _geometry(snap, cutoff)
 
-    r_max = r.max()
-    edges = np.linspace(0, r_max, nbins + 1)
-    vols = (4 / 3) * np.pi * (edges[1:] ** 3 - edges[:-1] ** 3)
-    centres = 0.5 * (edges[1:] + edges[:-1])
+    prof = RadialProfile(GROUPS, 0.5 * snap.box_lengths.min(), nbins)
+    prof.add_distances(types, r)
 
-    st_mask = np.isin(types, (1, 3))
-    sp_mask = np.isin(types, (2, 4))
-
-    hist_st, _ = np.histogram(r[st_mask], bins=edges)
-    hist_sp, _ = np.histogram(r[sp_mask], bins=edges)
-
-    dens_st = hist_st / vols / hist_st.sum()
-    dens_sp = hist_sp / vols / hist_sp.sum()
-
-    if ax is None:
-        _, ax = plt.subplots()
-
-    ax.plot(centres, dens_st, marker="*", label="Stickers (1&3)")
-    ax.plot(centres, dens_sp, marker="o", label="Spacers  (2&4)")
-    ax.set_xlabel("r [Å]")
-    ax.set_ylabel("Normalised density")
-    ax.set_title(Path(data_file).name)
-    ax.legend()
-
-    return ax
+    return plot_radial_profile(prof, ax=ax, title=snap.name)
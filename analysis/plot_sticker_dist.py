@@ -10,11 +10,19 @@ Typical usage
 >>> plot_sticker_hist([
 ...     "restart_term/final_state_Ens_0.30_Es_8.00.DATA",
 ...     "restart_uniform/final_state_Ens_0.30_Es_8.00.DATA",
-... ], bins_w=0.2, max_r=900)                                  # overlay
+... ], bins_w=0.2, max_r=50)                                   # overlay
 
 The helper is intentionally lightweight: no CLI, no batch mode – just one
 function that returns the Matplotlib ``Axes`` so the caller can style or
 save the figure as desired.
+
+Distances are minimum-image distances in the periodic box of the data
+file.  Only pairs within ``max_r`` are enumerated
+(:py:mod:`analysis.neighbours`), so the cost grows linearly with the
+number of stickers at a fixed cut-off.  ``max_r`` may not exceed half
+the shortest box edge, beyond which shells are incomplete; the default
+was therefore lowered from 900 to 50 (pass ``max_r=400`` for the whole
+range of the 800 Å template box).
 """
 
 from __future__ import annotations
@@ -26,8 +34,15 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.axes import Axes
 from matplotlib.cm import get_cmap
-from scipy.spatial.distance import pdist
-import networkx as nx   # only to satisfy IDEs; not used at runtime
+
+try:
+    from .lammps_data import read_data
+    from .neighbours import pair_histogram
+    from .snapshot import STICKER_TYPES, Snapshot
+except ImportError:                      # run as a loose script from analysis/
+    from lammps_data import read_data
+    from neighbours import pair_histogram
+    from snapshot import STICKER_TYPES, Snapshot
 
 
 font = {'family': 'arial', 'size': 16}
@@ -36,69 +51,53 @@ plt.rc('font', **font)
 # ──────────────────────────────────────────────────────────────────────────
 # internal parser
 # ──────────────────────────────────────────────────────────────────────────
-_SECTION_END = {
-    "velocities", "bonds", "angles", "dihedrals",
-    "impropers", "masses", "pair", "angle",
-    "dihedral", "improper",
-}
-
-
-def _type13_atoms(path: Path) -> tuple[np.ndarray, np.ndarray]:
+def _type13_atoms(source: Path | Snapshot) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
-    Return (molecule IDs, coordinates) for atoms of type **1** or **3**.
+    Return (molecule IDs, coordinates, box) for atoms of type **1** or **3**.
 
+    A path is read with the type filter pushed into the parser; a
+    :py:class:`~analysis.snapshot.Snapshot` reuses its cached sticker rows.
     If < 2 such atoms are present, raises ``ValueError``.
     """
-    mols, xyz = [], []
-    in_atoms = False
-
-    with path.open() as fh:
-        for raw in fh:
-            line = raw.strip()
-            if not line:
-                continue
-
-            low = line.lower()
-            if not in_atoms and low.startswith("atoms"):
-                in_atoms = True
-                continue
-            if in_atoms and any(low.startswith(k) for k in _SECTION_END):
-                break
-
-            if in_atoms and line[0].isdigit():
-                parts = line.split()
-                if len(parts) < 7:
-                    continue
-                atype = int(parts[2])
-                if atype in (1, 3):
-                    mols.append(int(parts[1]))
-                    xyz.append(tuple(map(float, parts[4:7])))
+    if isinstance(source, Snapshot):
+        rows = source.sticker_rows
+        mols, coords, box = source.mols[rows], source.coords[rows], source.box
+    else:
+        data = read_data(source, types=STICKER_TYPES, columns=("mols", "coords"))
+        mols, coords, box = data.mols, data.coords, data.box
 
     if len(mols) < 2:
         raise ValueError("fewer than two type-1/3 atoms")
 
-    return np.fromiter(mols, int), np.asarray(xyz, float)
+    return mols, coords, box
 
 
-def _distances_between_molecules(mol_ids: np.ndarray,
-                                 coords: np.ndarray) -> np.ndarray:
+def _default_label(source: Path | Snapshot) -> str:
+    """Parent folder name of the snapshot file."""
+    path = source.path if isinstance(source, Snapshot) else source
+    return path.parent.name if path is not None else source.name
+
+
+def _intermolecular_histogram(mol_ids: np.ndarray,
+                              coords: np.ndarray,
+                              box: np.ndarray,
+                              bins_w: float,
+                              max_r: float) -> np.ndarray:
     """
-    Return a 1-D array of distances between atoms that sit on *different*
-    molecule IDs.
+    Counts of minimum-image distances between atoms that sit on
+    *different* molecule IDs, in bins of width *bins_w* up to *max_r*.
     """
-    iu = np.triu_indices(len(mol_ids), 1)
-    mask = mol_ids[iu[0]] != mol_ids[iu[1]]
-    return pdist(coords)[mask]
+    return pair_histogram(coords, max_r, bins_w, box=box, exclude=mol_ids)
 
 
 # ──────────────────────────────────────────────────────────────────────────
 # public helper
 # ──────────────────────────────────────────────────────────────────────────
 def plot_sticker_hist(
-    snapshots: "str | Path | Sequence[str | Path]",
+    snapshots: str | Path | Snapshot | Sequence[str | Path | Snapshot],
     *,
     bins_w: float = 0.2,
-    max_r: float = 900.0,
+    max_r: float = 50.0,
     log_scale: bool = False,
     labels: Optional[Sequence[str]] = None,
     ax: Optional[Axes] = None,
@@ -109,11 +108,13 @@ def plot_sticker_hist(
     Parameters
     ----------
     snapshots
-        A single path or a sequence of paths to ``final_state_*.DATA`` files.
+        A single path or a sequence of paths to ``final_state_*.DATA`` files
+        (:py:class:`~analysis.snapshot.Snapshot` objects work as well).
     bins_w
         Bin width Δr in σ (default **0.2**).
     max_r
-        Maximum distance considered (default **900 σ**).
+        Maximum distance considered (default **50**, formerly 900); at
+        most half the shortest box edge.
     log_scale
         If *True*, apply log-scale to the y-axis.
     labels
@@ -126,32 +127,34 @@ def plot_sticker_hist(
     -------
     matplotlib.axes.Axes
         The axis containing the plotted histograms.
+
+    Raises
+    ------
+    ValueError
+        If *max_r* exceeds half the shortest box edge of a snapshot.
     """
     # normalise input
-    if isinstance(snapshots, (str, Path)):
-        snapshot_paths = [Path(snapshots)]
-    else:
-        snapshot_paths = [Path(p) for p in snapshots]
+    if isinstance(snapshots, (str, Path, Snapshot)):
+        snapshots = [snapshots]
+    sources = [s if isinstance(s, Snapshot) else Path(s) for s in snapshots]
 
-    if labels and len(labels) != len(snapshot_paths):
+    if labels and len(labels) != len(sources):
         raise ValueError("`labels` length must match `snapshots` length")
     if labels is None:
-        labels = [p.parent.name for p in snapshot_paths]
+        labels = [_default_label(s) for s in sources]
 
     # prepare common bins
     nbins = int(np.ceil(max_r / bins_w))
     bins = np.linspace(0.0, nbins * bins_w, nbins + 1)
 
     histograms = []
-    for path in snapshot_paths:
+    for source in sources:
         try:
-            mols, coords = _type13_atoms(path)
+            mols, coords, box = _type13_atoms(source)
         except ValueError:
             histograms.append(np.zeros(nbins))
             continue
-        dists = _distances_between_molecules(mols, coords)
-        hist, _ = np.histogram(dists, bins=bins)
-        histograms.append(hist)
+        histograms.append(_intermolecular_histogram(mols, coords, box, bins_w, max_r))
 
     if ax is None:
         _, ax = plt.subplots(figsize=(8, 5))
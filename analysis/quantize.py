@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+XTC-like lossy coordinate compression for archived trajectories.
+
+Typical usage
+-------------
+>>> from analysis.quantize import quantize, dequantize
+>>> block = quantize(xu, lo=-400.0, length=800.0, precision=1e-4)
+>>> block["max_error"]                 # measured, ≤ half a quantum
+array(0.04)
+>>> xu32 = dequantize(block)           # (frames, atoms) float32
+
+A ``(frames, atoms)`` block of one coordinate column is mapped onto an
+integer grid whose spacing is ``precision`` × box length (from the
+``ITEM: BOX BOUNDS`` header).  The first frame is stored as offsets from
+its minimum; every later frame as the difference to the previous one
+(zig-zag encoded).  Both are bit-packed at the narrowest width that holds
+the largest value, so a chunk of slowly moving beads costs a few bits per
+coordinate instead of 32.
+
+For *wrapped* coordinates the differences are taken modulo the box, so a
+bead crossing the boundary does not widen the whole chunk; such a bead may
+come back on the opposite face (``lo`` instead of ``hi``), i.e. it is
+reproduced up to a periodic image, and the reported error uses the
+minimum-image distance.
+"""
+
+from __future__ import annotations
+
+from typing import Mapping
+
+import numpy as np
+
+
+def _bit_width(values: np.ndarray) -> int:
+    top = int(values.max()) if values.size else 0
+    return top.bit_length()
+
+
+#: Values converted per step in :py:func:`pack_bits` / :py:func:`unpack_bits`;
+#: a multiple of 8, so every chunk fills whole bytes.
+_PACK_CHUNK = 1 << 16
+
+
+def pack_bits(values: np.ndarray, width: int) -> np.ndarray:
+    """Pack non-negative integers into a little-endian bit stream of
+    *width* bits each (bit planes are expanded one chunk of values at a
+    time, so the temporaries do not grow with ``values.size``)."""
+    if width == 0 or values.size == 0:
+        return np.empty(0, dtype=np.uint8)
+    values = values.reshape(-1)
+    shifts = np.arange(width, dtype=np.uint64)
+    out = np.empty((values.size * width + 7) // 8, dtype=np.uint8)
+    for lo in range(0, values.size, _PACK_CHUNK):
+        part = values[lo:lo + _PACK_CHUNK].astype(np.uint64)
+        bits = ((part[:, None] >> shifts) & 1).astype(np.uint8)
+        packed = np.packbits(bits.ravel(), bitorder="little")
+        start = lo * width // 8
+        out[start:start + len(packed)] = packed
+    return out
+
+
+def unpack_bits(packed: np.ndarray, width: int, count: int) -> np.ndarray:
+    """Inverse of :py:func:`pack_bits`; returns ``count`` uint64 values."""
+    out = np.zeros(count, dtype=np.uint64)
+    if width == 0 or count == 0:
+        return out
+    shifts = np.arange(width, dtype=np.uint64)
+    for lo in range(0, count, _PACK_CHUNK):
+        n = min(_PACK_CHUNK, count - lo)
+        start = lo * width // 8
+        bits = np.unpackbits(packed[start:start + (n * width + 7) // 8],
+                             count=n * width, bitorder="little")
+        out[lo:lo + n] = (bits.reshape(n, width).astype(np.uint64) << shifts).sum(
+            axis=1, dtype=np.uint64)
+    return out
+
+
+def _zigzag(d: np.ndarray) -> np.ndarray:
+    return ((d << 1) ^ (d >> 63)).astype(np.uint64)
+
+
+def _unzigzag(z: np.ndarray) -> np.ndarray:
+    z = z.astype(np.int64)
+    return (z >> 1) ^ -(z & 1)
+
+
+def quantize(values: np.ndarray,
+             lo: float,
+             length: float,
+             precision: float = 1e-4,
+             periodic: bool = False) -> dict[str, np.ndarray]:
+    """
+    Encode a ``(frames, atoms)`` coordinate block.
+
+    Parameters
+    ----------
+    values
+        Coordinates along one axis, one row per frame.
+    lo, length
+        Lower bound and edge length of the box along that axis.
+    precision
+        Grid spacing as a fraction of *length*; the error is at most half
+        a spacing.
+    periodic
+        *values* are wrapped into ``[lo, lo + length)``.
+
+    Returns
+    -------
+    dict[str, numpy.ndarray]
+        Self-describing arrays (savable with ``np.savez``) including the
+        measured ``max_error``.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim != 2:
+        raise ValueError("expected a (frames, atoms) block")
+    if not 0.0 < precision < 1.0:
+        raise ValueError("precision must lie in (0, 1)")
+    n_levels = int(np.ceil(1.0 / precision))
+    quantum = length / n_levels
+
+    k = np.rint((values - lo) / quantum).astype(np.int64)
+    if periodic:
+        k %= n_levels
+    base = int(k[0].min()) if k.size else 0
+    first = (k[0] - base).astype(np.uint64)
+
+    deltas = np.diff(k, axis=0)
+    if periodic:
+        deltas = (deltas + n_levels // 2) % n_levels - n_levels // 2
+    zz = _zigzag(deltas.ravel())
+
+    first_width, delta_width = _bit_width(first), _bit_width(zz)
+    block = {
+        "shape": np.array(values.shape, dtype=np.int64),
+        "lo": np.float64(lo),
+        "quantum": np.float64(quantum),
+        "n_levels": np.int64(n_levels),
+        "periodic": np.bool_(periodic),
+        "base": np.int64(base),
+        "first_width": np.int64(first_width),
+        "first": pack_bits(first, first_width),
+        "delta_width": np.int64(delta_width),
+        "deltas": pack_bits(zz, delta_width),
+    }
+    err = np.abs(dequantize(block).astype(np.float64) - values)
+    if periodic:
+        err = np.minimum(err, np.abs(length - err))
+    block["max_error"] = np.float64(err.max() if err.size else 0.0)
+    return block
+
+
+def dequantize(block: Mapping[str, np.ndarray]) -> np.ndarray:
+    """
+    Decode a block written by :py:func:`quantize`.
+
+    Returns
+    -------
+    numpy.ndarray
+        ``(frames, atoms)`` float32 coordinates.
+    """
+    n_frames, n_atoms = (int(v) for v in block["shape"])
+    k = np.empty((n_frames, n_atoms), dtype=np.int64)
+    if n_frames == 0:
+        return k.astype(np.float32)
+
+    k[0] = unpack_bits(block["first"], int(block["first_width"]), n_atoms).astype(np.int64)
+    k[0] += int(block["base"])
+    deltas = _unzigzag(unpack_bits(block["deltas"], int(block["delta_width"]),
+                                   (n_frames - 1) * n_atoms))
+    k[1:] = deltas.reshape(n_frames - 1, n_atoms)
+    np.cumsum(k, axis=0, out=k)
+    if bool(block["periodic"]):
+        k %= int(block["n_levels"])
+
+    return (float(block["lo"]) + k * float(block["quantum"])).astype(np.float32)
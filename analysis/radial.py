@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Radial density profiles around the condensate, accumulated over frames.
+
+Typical usage
+-------------
+>>> from analysis.lammps_dump import iter_dump
+>>> from analysis.radial import radial_profile
+>>> prof = radial_profile(iter_dump("traj_Run1.dump", columns=["type", "mol", "x", "y", "z"]),
+...                       groups=[(1, 3), (2, 4)], r_max=300.0, n_bins=60)
+>>> rho, err = prof.density()             # (2, 60) number densities [Å⁻³]
+>>> prof.centres, prof.n_frames
+
+Every frame is centred on its largest cluster:
+
+1. clusters are chains in contact – two chains belong together when any
+   of their beads are closer than ``cutoff`` (minimum image), found with
+   :py:func:`analysis.clustering.atom_clusters`;
+2. the centre of the largest one is the *circular mean* of its beads
+   along each axis (:py:func:`periodic_centre`), which stays correct
+   when the droplet straddles the periodic boundary, where the plain
+   mean of wrapped coordinates lands in the middle of the box;
+3. minimum-image distances to the centre are binned per group of atom
+   types.
+
+:py:class:`RadialProfile` keeps only running block sums, so the memory
+does not grow with the number of frames; error bars are the standard
+error of the block means (:py:meth:`RadialProfile.density`).
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+try:
+    from .clustering import atom_clusters
+    from .lammps_dump import DumpFrame
+except ImportError:                      # run as a loose script from analysis/
+    from clustering import atom_clusters
+    from lammps_dump import DumpFrame
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# centring
+# ──────────────────────────────────────────────────────────────────────────
+def periodic_centre(coords: np.ndarray,
+                    box: np.ndarray,
+                    weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Circular mean of *coords* along each periodic axis.
+
+    Every coordinate is mapped to an angle ``2π (x - lo) / L``; the
+    centre is the angle of the mean unit vector, mapped back into the box.
+
+    Parameters
+    ----------
+    coords
+        ``(N, 3)`` positions (wrapped or not).
+    box
+        ``(3, 2)`` ``[lo, hi]`` bounds.
+    weights
+        Optional per-atom weights (e.g. masses).
+
+    Returns
+    -------
+    numpy.ndarray
+        ``(3,)`` centre inside ``[lo, hi)``.
+    """
+    box = np.asarray(box, dtype=np.float64)
+    lengths = box[:, 1] - box[:, 0]
+    theta = 2.0 * np.pi * (np.asarray(coords, dtype=np.float64) - box[:, 0]) / lengths
+    mean_sin = np.average(np.sin(theta), axis=0, weights=weights)
+    mean_cos = np.average(np.cos(theta), axis=0, weights=weights)
+    phase = np.mod(np.arctan2(mean_sin, mean_cos), 2.0 * np.pi)
+    return box[:, 0] + lengths * phase / (2.0 * np.pi)
+
+
+def minimum_image_distance(coords: np.ndarray, centre: np.ndarray,
+                           box: np.ndarray) -> np.ndarray:
+    """Distance of every row of *coords* to *centre* under periodic boundaries."""
+    lengths = np.asarray(box)[:, 1] - np.asarray(box)[:, 0]
+    d = np.asarray(coords, dtype=np.float64) - centre
+    d -= lengths * np.rint(d / lengths)
+    return np.sqrt(np.einsum("ij,ij->i", d, d))
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# clusters
+# ──────────────────────────────────────────────────────────────────────────
+def largest_cluster(labels: np.ndarray) -> np.ndarray:
+    """Boolean mask of the members of the most populated label."""
+    if len(labels) == 0:
+        return np.zeros(0, dtype=bool)
+    return labels == np.argmax(np.bincount(labels))
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# accumulation
+# ──────────────────────────────────────────────────────────────────────────
+class RadialProfile:
+    """
+    Per-group radial histograms summed over frames.
+
+    Parameters
+    ----------
+    groups
+        Atom types of every group, e.g. ``[(1, 3), (2, 4)]`` for stickers
+        and spacers.
+    r_max
+        Outer edge of the last shell; keep it below half the shortest box
+        edge so that shells are complete.
+    n_bins
+        Number of shells of equal width.
+    n_blocks
+        Minimum number of blocks for the error estimate.  Frames are
+        summed into blocks of ``block_len`` frames; whenever
+        ``2 * n_blocks`` blocks are complete, neighbours are merged and
+        ``block_len`` doubles, so between ``n_blocks`` and
+        ``2 * n_blocks`` blocks are kept.
+    """
+
+    def __init__(self,
+                 groups: Sequence[Sequence[int]],
+                 r_max: float,
+                 n_bins: int = 30,
+                 n_blocks: int = 8) -> None:
+        self.groups = [tuple(int(t) for t in np.atleast_1d(g)) for g in groups]
+        self.edges = np.linspace(0.0, r_max, n_bins + 1)
+        self.n_blocks = n_blocks
+
+        top = max((t for g in self.groups for t in g), default=0)
+        self._group_of = np.full(top + 1, -1, dtype=np.int64)
+        for k, g in enumerate(self.groups):
+            self._group_of[list(g)] = k
+
+        shape = (len(self.groups), n_bins)
+        self.total = np.zeros(shape)              # counts over all frames
+        self.n_frames = 0
+        self.block_len = 1
+        self._blocks: list[np.ndarray] = []
+        self._open = np.zeros(shape)
+        self._open_frames = 0
+
+    @property
+    def n_bins(self) -> int:
+        return len(self.edges) - 1
+
+    @property
+    def centres(self) -> np.ndarray:
+        return 0.5 * (self.edges[1:] + self.edges[:-1])
+
+    @property
+    def shell_volumes(self) -> np.ndarray:
+        return (4.0 / 3.0) * np.pi * np.diff(self.edges ** 3)
+
+    def histogram(self, types: np.ndarray, r: np.ndarray) -> np.ndarray:
+        """``(n_groups, n_bins)`` counts of one frame."""
+        types = np.asarray(types)
+        group = np.full(len(types), -1, dtype=np.int64)
+        known = (types >= 0) & (types < len(self._group_of))
+        group[known] = self._group_of[types[known]]
+        k = np.floor(r / (self.edges[-1] / self.n_bins)).astype(np.int64)
+        ok = (group >= 0) & (k < self.n_bins)
+        flat = np.bincount(group[ok] * self.n_bins + k[ok],
+                           minlength=len(self.groups) * self.n_bins)
+        return flat.reshape(len(self.groups), self.n_bins)
+
+    def add(self, types: np.ndarray, coords: np.ndarray,
+            box: np.ndarray, centre: np.ndarray) -> None:
+        """Accumulate one frame centred on *centre*."""
+        self.add_distances(types, minimum_image_distance(coords, centre, box))
+
+    def add_distances(self, types: np.ndarray, r: np.ndarray) -> None:
+        """Accumulate one frame from precomputed distances to the centre."""
+        counts = self.histogram(types, r)
+        self.total += counts
+        self.n_frames += 1
+        self._open += counts
+        self._open_frames += 1
+        if self._open_frames == self.block_len:
+            self._blocks.append(self._open)
+            self._open = np.zeros_like(self.total)
+            self._open_frames = 0
+            if len(self._blocks) == 2 * self.n_blocks:
+                self._blocks = [a + b for a, b in zip(self._blocks[::2], self._blocks[1::2])]
+                self.block_len *= 2
+
+    def density(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Mean number density per shell and its standard error.
+
+        Returns
+        -------
+        density, error
+            ``(n_groups, n_bins)`` arrays in atoms per volume unit.  The
+            error is NaN with fewer than two complete blocks.
+        """
+        vols = self.shell_volumes
+        rho = self.total / max(self.n_frames, 1) / vols
+        if len(self._blocks) < 2:
+            return rho, np.full_like(rho, np.nan)
+        means = np.stack(self._blocks) / self.block_len / vols
+        err = means.std(axis=0, ddof=1) / np.sqrt(len(means))
+        return rho, err
+
+
+def frame_centre(coords: np.ndarray, box: np.ndarray,
+                 mols: Optional[np.ndarray], cutoff: float) -> np.ndarray:
+    """Periodic centre of the largest contact cluster of one frame."""
+    _, labels = atom_clusters(coords, box, cutoff, mols)
+    return periodic_centre(coords[largest_cluster(labels)], box)
+
+
+def radial_profile(frames: Iterable[DumpFrame],
+                   groups: Sequence[Sequence[int]] = ((1, 3), (2, 4)),
+                   r_max: Optional[float] = None,
+                   n_bins: int = 30,
+                   cutoff: float = 15.0,
+                   n_blocks: int = 8) -> RadialProfile:
+    """
+    Radial profile around the largest cluster, accumulated over *frames*.
+
+    Parameters
+    ----------
+    frames
+        Frames with ``type``, ``x y z`` and preferably ``mol`` columns,
+        e.g. from :py:func:`analysis.lammps_dump.iter_dump`.
+    groups, n_bins, n_blocks
+        See :py:class:`RadialProfile`.
+    r_max
+        Outer shell edge (default: half the shortest edge of the first
+        frame's box).
+    cutoff
+        Contact distance for the clusters (default 1.5 σ of the
+        templates' ``pair_coeff * * 0.3 10``).
+
+    Returns
+    -------
+    RadialProfile
+    """
+    prof = None
+    for frame in frames:
+        coords, box = frame.xyz(), frame.box
+        if prof is None:
+            if r_max is None:
+                r_max = 0.5 * frame.box_lengths.min()
+            prof = RadialProfile(groups, r_max, n_bins, n_blocks)
+        mols = frame["mol"] if "mol" in frame else None
+        prof.add(frame["type"], coords, box, frame_centre(coords, box, mols, cutoff))
+    if prof is None:
+        prof = RadialProfile(groups, r_max or 1.0, n_bins, n_blocks)
+    return prof
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Type-resolved pair correlation functions *g(r)*, averaged over frames.
+
+Typical usage
+-------------
+>>> from analysis.rdf import rdf
+>>> pc = rdf("traj_Run1.dump", pairs=[(1, 3), (1, 1), (2, 4)], r_max=60.0)
+>>> g, g_inter, g_intra = pc.g()          # each (3, n_bins)
+>>> pc.centres, pc.n_frames
+
+A pair is two groups of atom types; ``((1, 3), (2, 4))`` pairs stickers
+with spacers.  Within every frame the atoms of all requested types are
+put into one periodic neighbour search (:py:mod:`analysis.neighbours`),
+so only pairs closer than ``r_max`` are enumerated, and each pair is
+split into *inter*- and *intra*-molecular by its ``mol`` IDs.
+
+Normalisation is to the ideal gas of the same composition in the same
+box: the count of ordered pairs *(i ∈ A, j ∈ B, i ≠ j)* in a shell is
+divided by ``(N_A N_B − N_{A∩B}) / V`` times the shell volume, summed
+over frames, so boxes that change size are handled.  The inter and intra
+parts share that normalisation, hence ``g = g_inter + g_intra``.
+
+:py:func:`rdf` reads the frames of a dump in worker processes through
+:py:func:`analysis.dump_index.reduce_frames`; each worker accumulates its
+own :py:class:`PairCorrelation` and the partial sums are added at the
+end.  For a custom loop feed frames to :py:meth:`PairCorrelation.add_frame`.
+"""
+
+from __future__ import annotations
+
+from functools import partial
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+try:
+    from .dump_index import reduce_frames
+    from .lammps_dump import DumpFrame
+    from .neighbours import iter_pairs
+except ImportError:                      # run as a loose script from analysis/
+    from dump_index import reduce_frames
+    from lammps_dump import DumpFrame
+    from neighbours import iter_pairs
+
+
+#: A group of atom types, or a single type.
+TypeGroup = Union[int, Sequence[int]]
+
+#: Dump columns a frame needs.
+COLUMNS = ("type", "mol", "x", "y", "z")
+
+
+def _group(types: TypeGroup) -> tuple[int, ...]:
+    return tuple(sorted({int(t) for t in np.atleast_1d(types)}))
+
+
+class PairCorrelation:
+    """
+    Accumulated pair counts for a set of type pairs.
+
+    Parameters
+    ----------
+    pairs
+        ``(A, B)`` type groups, e.g. ``[(1, 3), (1, 1), ((1, 3), (2, 4))]``.
+    r_max
+        Largest distance; keep it below half the shortest box edge.
+    bin_width
+        Shell width.
+
+    Attributes
+    ----------
+    counts
+        ``(n_pairs, 2, n_bins)`` ordered-pair counts, ``[:, 0]``
+        inter-molecular and ``[:, 1]`` intra-molecular.
+    ideal
+        ``(n_pairs,)`` sum over frames of ``(N_A N_B − N_{A∩B}) / V``.
+    n_frames
+        Frames accumulated.
+    """
+
+    def __init__(self,
+                 pairs: Sequence[tuple[TypeGroup, TypeGroup]],
+                 r_max: float,
+                 bin_width: float = 0.5) -> None:
+        self.pairs = [(_group(a), _group(b)) for a, b in pairs]
+        self.n_bins = int(np.ceil(r_max / bin_width))
+        self.bin_width = bin_width
+        self.counts = np.zeros((len(self.pairs), 2, self.n_bins))
+        self.ideal = np.zeros(len(self.pairs))
+        self.n_frames = 0
+
+    @property
+    def r_max(self) -> float:
+        return self.n_bins * self.bin_width
+
+    @property
+    def edges(self) -> np.ndarray:
+        return np.arange(self.n_bins + 1) * self.bin_width
+
+    @property
+    def centres(self) -> np.ndarray:
+        return (np.arange(self.n_bins) + 0.5) * self.bin_width
+
+    @property
+    def types(self) -> tuple[int, ...]:
+        """Every atom type any pair refers to."""
+        return tuple(sorted({t for a, b in self.pairs for t in a + b}))
+
+    def _empty_like(self) -> "PairCorrelation":
+        other = PairCorrelation.__new__(PairCorrelation)
+        other.pairs, other.n_bins, other.bin_width = self.pairs, self.n_bins, self.bin_width
+        other.counts = np.zeros_like(self.counts)
+        other.ideal = np.zeros_like(self.ideal)
+        other.n_frames = 0
+        return other
+
+    # ---- accumulation --------------------------------------------------
+    def add(self,
+            types: np.ndarray,
+            coords: np.ndarray,
+            box: np.ndarray,
+            mols: Optional[np.ndarray] = None) -> None:
+        """
+        Accumulate one configuration.
+
+        Parameters
+        ----------
+        types, coords
+            Per-atom type and ``(N, 3)`` positions (wrapped or not).
+        box
+            ``(3, 2)`` periodic box bounds.
+        mols
+            Molecule ID per atom; without it every pair counts as
+            inter-molecular.
+        """
+        box = np.asarray(box, dtype=np.float64)
+        volume = float(np.prod(box[:, 1] - box[:, 0]))
+        keep = np.flatnonzero(np.isin(types, self.types))
+        types = np.asarray(types)[keep]
+        mols = None if mols is None else np.asarray(mols)[keep]
+
+        in_a = np.stack([np.isin(types, a) for a, _ in self.pairs])
+        in_b = np.stack([np.isin(types, b) for _, b in self.pairs])
+        n_a, n_b = in_a.sum(axis=1), in_b.sum(axis=1)
+        n_ab = (in_a & in_b).sum(axis=1)
+        self.ideal += (n_a * n_b - n_ab) / volume
+        self.n_frames += 1
+
+        size = 2 * self.n_bins
+        for i, j, r in iter_pairs(np.asarray(coords)[keep], self.r_max, box):
+            k = (r / self.bin_width).astype(np.int64)
+            ok = k < self.n_bins
+            i, j, k = i[ok], j[ok], k[ok]
+            if mols is not None:
+                k = k + self.n_bins * (mols[i] == mols[j])
+            for p in range(len(self.pairs)):
+                # ordered pairs: (i in A, j in B) and (j in A, i in B)
+                w = ((in_a[p, i] & in_b[p, j]).astype(np.float64)
+                     + (in_a[p, j] & in_b[p, i]))
+                self.counts[p] += np.bincount(k, weights=w, minlength=size).reshape(2, -1)
+
+    def add_frame(self, frame: DumpFrame) -> None:
+        """Accumulate a dump frame (needs the :py:data:`COLUMNS`)."""
+        mols = frame["mol"] if "mol" in frame else None
+        self.add(frame["type"], frame.xyz(), frame.box, mols)
+
+    def __add__(self, other: "PairCorrelation") -> "PairCorrelation":
+        if other.pairs != self.pairs or other.n_bins != self.n_bins \
+                or other.bin_width != self.bin_width:
+            raise ValueError("cannot add PairCorrelation objects with different settings")
+        total = self._empty_like()
+        total.counts = self.counts + other.counts
+        total.ideal = self.ideal + other.ideal
+        total.n_frames = self.n_frames + other.n_frames
+        return total
+
+    # ---- results -------------------------------------------------------
+    def g(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Normalised pair correlation functions.
+
+        Returns
+        -------
+        g, g_inter, g_intra
+            ``(n_pairs, n_bins)`` arrays; NaN for pairs with no ideal pairs.
+        """
+        shell = (4.0 / 3.0) * np.pi * np.diff(self.edges ** 3)
+        norm = self.ideal[:, None] * shell
+        with np.errstate(invalid="ignore", divide="ignore"):
+            g_inter = np.where(norm > 0, self.counts[:, 0] / norm, np.nan)
+            g_intra = np.where(norm > 0, self.counts[:, 1] / norm, np.nan)
+        return g_inter + g_intra, g_inter, g_intra
+
+
+def _frame_counts(pairs: list, r_max: float, bin_width: float,
+                  frame: DumpFrame) -> PairCorrelation:
+    pc = PairCorrelation(pairs, r_max, bin_width)
+    pc.add_frame(frame)
+    return pc
+
+
+def rdf(dump_file: str | Path,
+        pairs: Sequence[tuple[TypeGroup, TypeGroup]],
+        r_max: float = 50.0,
+        bin_width: float = 0.5,
+        frames: Optional[Sequence[int]] = None,
+        workers: Optional[int] = None) -> PairCorrelation:
+    """
+    *g(r)* of a ``dump custom`` trajectory.
+
+    Parameters
+    ----------
+    dump_file
+        ``traj_<fName>.dump`` with ``type``, ``mol`` and ``x y z`` columns.
+    pairs, r_max, bin_width
+        See :py:class:`PairCorrelation`.
+    frames
+        Frame numbers to use (default: all).
+    workers
+        Worker processes (default: ``os.cpu_count()``; ``1`` = serial).
+
+    Returns
+    -------
+    PairCorrelation
+    """
+    func = partial(_frame_counts, [(a, b) for a, b in pairs], r_max, bin_width)
+    total = reduce_frames(dump_file, func, frames=frames, columns=COLUMNS, workers=workers)
+    return total if total is not None else PairCorrelation(pairs, r_max, bin_width)
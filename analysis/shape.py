@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Gyration tensors and shape descriptors of every cluster in every frame.
+
+Typical usage
+-------------
+>>> from analysis.dump_index import DumpIndex
+>>> from analysis.shape import cluster_shapes, trajectory_shapes
+>>> rows = trajectory_shapes("traj_Run1.dump", cutoff=15.0, min_chains=5)
+>>> big = rows[rows["n_chains"] == rows["n_chains"].max()]
+>>> big["timestep"], big["rg"], big["asphericity"], big["prolateness"]
+
+For the atoms of a cluster with positions ``r_k`` about their centre the
+gyration tensor is ``S = ⟨ (r_k − r̄) ⊗ (r_k − r̄) ⟩`` with eigenvalues
+``λ1 ≤ λ2 ≤ λ3``, from which
+
+* ``Rg² = λ1 + λ2 + λ3``;
+* asphericity ``b = λ3 − (λ1 + λ2) / 2`` and acylindricity ``c = λ2 − λ1``;
+* relative shape anisotropy ``κ² = 1 − 3 (λ1λ2 + λ2λ3 + λ3λ1) / Rg⁴``
+  (0 for a sphere, 1 for a rod);
+* prolateness ``S* = 27 Π(λi − Rg²/3) / Rg⁶`` (< 0 oblate, > 0 prolate).
+
+Clusters are chains in contact, optionally joined by bonds
+(:py:mod:`analysis.clustering`).  They are made whole across the
+boundary through the contacts plus the chain backbones
+(:py:func:`analysis.unwrap.make_whole`); the centres and tensors of all
+clusters come from ``np.add.at`` over the atom labels and one batched
+``np.linalg.eigh`` of the stacked 3×3 tensors – there is no loop over
+clusters.
+
+Results are rows of :py:data:`SHAPE_DTYPE`, one per cluster and frame;
+:py:func:`trajectory_shapes` reads the frames in parallel worker
+processes (:py:func:`analysis.dump_index.map_frames`).
+"""
+
+from __future__ import annotations
+
+from functools import partial
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+try:
+    from .clustering import molecule_clusters
+    from .dump_index import map_frames
+    from .lammps_dump import DumpFrame
+    from .neighbours import cell_pairs
+    from .unwrap import make_whole
+except ImportError:                      # run as a loose script from analysis/
+    from clustering import molecule_clusters
+    from dump_index import map_frames
+    from lammps_dump import DumpFrame
+    from neighbours import cell_pairs
+    from unwrap import make_whole
+
+
+#: Dump columns a frame needs.
+COLUMNS = ("id", "mol", "x", "y", "z")
+
+#: One row per cluster and frame.
+SHAPE_DTYPE = np.dtype([
+    ("timestep", np.int64),
+    ("cluster", np.int64),         # label within the frame, largest first
+    ("n_chains", np.int64),
+    ("n_atoms", np.int64),
+    ("centre", np.float64, (3,)),  # inside the box
+    ("eigenvalues", np.float64, (3,)),   # λ1 ≤ λ2 ≤ λ3 [Å²]
+    ("rg", np.float64),
+    ("asphericity", np.float64),
+    ("acylindricity", np.float64),
+    ("kappa2", np.float64),
+    ("prolateness", np.float64),
+])
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# kernels
+# ──────────────────────────────────────────────────────────────────────────
+def gyration_tensors(coords: np.ndarray,
+                     labels: np.ndarray,
+                     n_clusters: Optional[int] = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Centre and gyration tensor of every label.
+
+    Parameters
+    ----------
+    coords
+        ``(N, 3)`` positions with every cluster whole.
+    labels
+        Cluster label ``0 … n_clusters − 1`` per atom.
+    n_clusters
+        Number of labels (default: ``labels.max() + 1``).
+
+    Returns
+    -------
+    centres, tensors
+        ``(n_clusters, 3)`` and ``(n_clusters, 3, 3)``; NaN for empty labels.
+    """
+    x = np.asarray(coords, dtype=np.float64)
+    labels = np.asarray(labels, dtype=np.int64)
+    if n_clusters is None:
+        n_clusters = int(labels.max()) + 1 if len(labels) else 0
+    size = np.bincount(labels, minlength=n_clusters).astype(np.float64)
+
+    centres = np.zeros((n_clusters, 3))
+    np.add.at(centres, labels, x)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        centres /= size[:, None]
+    d = x - centres[labels]
+    tensors = np.zeros((n_clusters, 3, 3))
+    np.add.at(tensors, labels, d[:, :, None] * d[:, None, :])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        tensors /= size[:, None, None]
+    return centres, tensors
+
+
+def shape_descriptors(tensors: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Eigenvalues and shape factors of stacked ``(..., 3, 3)`` gyration
+    tensors: keys ``eigenvalues``, ``rg``, ``asphericity``,
+    ``acylindricity``, ``kappa2`` and ``prolateness``.
+    """
+    lam = np.linalg.eigh(tensors)[0]                    # ascending
+    l1, l2, l3 = lam[..., 0], lam[..., 1], lam[..., 2]
+    rg2 = l1 + l2 + l3
+    dev = lam - rg2[..., None] / 3.0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        kappa2 = 1.0 - 3.0 * (l1 * l2 + l2 * l3 + l3 * l1) / rg2 ** 2
+        prolate = 27.0 * np.prod(dev, axis=-1) / rg2 ** 3
+    return {"eigenvalues": lam,
+            "rg": np.sqrt(rg2),
+            "asphericity": l3 - 0.5 * (l1 + l2),
+            "acylindricity": l2 - l1,
+            "kappa2": kappa2,
+            "prolateness": prolate}
+
+
+def _backbone_edges(mols: np.ndarray) -> np.ndarray:
+    """Consecutive atoms of every molecule, in row order."""
+    order = np.argsort(mols, kind="stable")
+    same = mols[order[1:]] == mols[order[:-1]]
+    return np.column_stack([order[:-1][same], order[1:][same]])
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# per frame
+# ──────────────────────────────────────────────────────────────────────────
+def cluster_shapes(coords: np.ndarray,
+                   box: np.ndarray,
+                   mols: np.ndarray,
+                   cutoff: float = 15.0,
+                   bonds: Optional[np.ndarray] = None,
+                   min_chains: int = 1,
+                   timestep: int = 0) -> np.ndarray:
+    """
+    Shape of every cluster of one configuration.
+
+    Parameters
+    ----------
+    coords, box, mols
+        Positions, ``(3, 2)`` periodic box bounds and molecule IDs; the
+        rows of a molecule must follow its backbone.
+    cutoff, bonds
+        See :py:func:`analysis.clustering.molecule_clusters`.
+    min_chains
+        Skip clusters with fewer chains.
+    timestep
+        Stored in every row.
+
+    Returns
+    -------
+    numpy.ndarray
+        :py:data:`SHAPE_DTYPE` rows, largest cluster first.
+    """
+    mols = np.asarray(mols)
+    chains, n_clusters, chain_label = molecule_clusters(coords, box, mols, cutoff, bonds)
+    n_chains = np.bincount(chain_label, minlength=n_clusters)
+    rank = np.empty(n_clusters, dtype=np.int64)          # largest first
+    rank[np.argsort(-n_chains, kind="stable")] = np.arange(n_clusters)
+    label = rank[chain_label][np.searchsorted(chains, mols)]
+    n_chains = n_chains[np.argsort(rank)]
+
+    i, j, _ = cell_pairs(coords, cutoff, box)
+    edges = [np.column_stack([i, j]), _backbone_edges(mols)]
+    if bonds is not None:
+        edges.append(np.asarray(bonds).reshape(-1, 2))
+    whole = make_whole(coords, box, np.concatenate(edges))
+
+    centres, tensors = gyration_tensors(whole, label, n_clusters)
+    keep = n_chains >= min_chains
+    desc = shape_descriptors(tensors[keep])
+
+    box = np.asarray(box, dtype=np.float64)
+    lengths = box[:, 1] - box[:, 0]
+    rows = np.zeros(int(keep.sum()), dtype=SHAPE_DTYPE)
+    rows["timestep"] = timestep
+    rows["cluster"] = np.flatnonzero(keep)
+    rows["n_chains"] = n_chains[keep]
+    rows["n_atoms"] = np.bincount(label, minlength=n_clusters)[keep]
+    rows["centre"] = box[:, 0] + np.mod(centres[keep] - box[:, 0], lengths)
+    for name, values in desc.items():
+        rows[name] = values
+    return rows
+
+
+def frame_shapes(frame: DumpFrame,
+                 cutoff: float = 15.0,
+                 min_chains: int = 1) -> np.ndarray:
+    """:py:func:`cluster_shapes` of a dump frame (``mol`` and ``x y z`` or
+    ``xu yu zu``, atoms in ``id`` order)."""
+    unwrapped = "x" not in frame
+    return cluster_shapes(frame.xyz(unwrapped), frame.box, frame["mol"], cutoff,
+                          min_chains=min_chains, timestep=frame.timestep)
+
+
+def trajectory_shapes(dump_file: str | Path,
+                      cutoff: float = 15.0,
+                      min_chains: int = 1,
+                      frames: Optional[Sequence[int]] = None,
+                      workers: Optional[int] = None) -> np.ndarray:
+    """
+    Time series of cluster shapes of a ``dump custom`` trajectory.
+
+    Parameters
+    ----------
+    dump_file
+        ``traj_<fName>.dump`` with the :py:data:`COLUMNS`.
+    cutoff, min_chains
+        See :py:func:`cluster_shapes`.
+    frames
+        Frame numbers to use (default: all).
+    workers
+        Worker processes (default: ``os.cpu_count()``; ``1`` = serial).
+
+    Returns
+    -------
+    numpy.ndarray
+        :py:data:`SHAPE_DTYPE` rows of all frames, in frame order.
+    """
+    func = partial(frame_shapes, cutoff=cutoff, min_chains=min_chains)
+    parts = map_frames(dump_file, func, frames=frames, columns=COLUMNS, workers=workers)
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=SHAPE_DTYPE)
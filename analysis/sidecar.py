@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Memory-mappable binary *sidecars* for parsed text outputs.
+
+A sidecar is a directory written next to its source file, e.g. ::
+
+    final_state_Run1.DATA
+    final_state_Run1.DATA.npcache/
+        manifest.json        # source size / mtime / content hash + metadata
+        ids.npy
+        coords.npy
+        ...
+
+Arrays are plain ``.npy`` files and are opened with ``mmap_mode="r"``, so
+serving a snapshot from its sidecar costs a few ``open`` calls instead of
+a text parse.  A sidecar is valid while the source keeps the recorded size
+and mtime; if only the mtime changed (``touch``, ``cp -p`` …) the content
+hash decides and the manifest is refreshed.
+
+The helpers are best-effort: an unwritable directory or a corrupt sidecar
+simply means the caller falls back to parsing the text.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+
+SIDECAR_SUFFIX = ".npcache"
+_MANIFEST = "manifest.json"
+_FORMAT_VERSION = 1
+_HASH_BLOCK = 1 << 22
+
+
+def sidecar_path(source: str | Path) -> Path:
+    """Directory that holds the sidecar of *source*."""
+    source = Path(source)
+    return source.with_name(source.name + SIDECAR_SUFFIX)
+
+
+def file_digest(path: str | Path) -> str:
+    """BLAKE2b content hash of *path*, read in large blocks."""
+    h = hashlib.blake2b(digest_size=20)
+    with Path(path).open("rb") as fh:
+        for block in iter(lambda: fh.read(_HASH_BLOCK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _fingerprint(source: Path) -> dict[str, int]:
+    st = source.stat()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def load_sidecar(source: str | Path,
+                 kind: str) -> Optional[tuple[dict[str, np.ndarray], dict[str, Any]]]:
+    """
+    Return ``(arrays, meta)`` from the sidecar of *source*, or *None* if it
+    is missing, of a different *kind*, or stale.
+
+    Arrays are read-only memory maps.
+    """
+    source = Path(source)
+    directory = sidecar_path(source)
+    try:
+        manifest = json.loads((directory / _MANIFEST).read_text())
+        if manifest.get("version") != _FORMAT_VERSION or manifest.get("kind") != kind:
+            return None
+
+        current = _fingerprint(source)
+        recorded = manifest["source"]
+        if current["size"] != recorded["size"]:
+            return None
+        if current["mtime_ns"] != recorded["mtime_ns"]:
+            if file_digest(source) != recorded["digest"]:
+                return None
+            recorded.update(current)           # touched, not modified
+            _write_manifest(directory, manifest)
+
+        arrays = {name: np.load(directory / f"{name}.npy", mmap_mode="r")
+                  for name in manifest["arrays"]}
+    except (OSError, ValueError, KeyError):
+        return None
+    return arrays, manifest["meta"]
+
+
+def write_sidecar(source: str | Path,
+                  kind: str,
+                  arrays: dict[str, np.ndarray],
+                  meta: dict[str, Any],
+                  digest: Optional[str] = None) -> Optional[Path]:
+    """
+    Write *arrays* and JSON-serialisable *meta* as the sidecar of *source*.
+
+    The directory is assembled under a temporary name and renamed into
+    place, so readers never see a half-written sidecar.  Returns the
+    sidecar directory, or *None* if it could not be written.
+    """
+    source = Path(source)
+    directory = sidecar_path(source)
+    try:
+        fingerprint = _fingerprint(source)
+        fingerprint["digest"] = digest or file_digest(source)
+        tmp = Path(tempfile.mkdtemp(prefix=directory.name + ".", dir=directory.parent))
+        try:
+            for name, arr in arrays.items():
+                np.save(tmp / f"{name}.npy", np.ascontiguousarray(arr))
+            _write_manifest(tmp, {
+                "version": _FORMAT_VERSION,
+                "kind": kind,
+                "source": fingerprint,
+                "arrays": sorted(arrays),
+                "meta": meta,
+            })
+            if directory.exists():
+                shutil.rmtree(directory)
+            os.replace(tmp, directory)
+        finally:
+            if tmp.exists():
+                shutil.rmtree(tmp, ignore_errors=True)
+    except OSError:
+        return None
+    return directory
+
+
+def _write_manifest(directory: Path, manifest: dict[str, Any]) -> None:
+    tmp = directory / (_MANIFEST + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=1))
+    os.replace(tmp, directory / _MANIFEST)
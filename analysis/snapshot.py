@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+One LAMMPS snapshot plus the topology every analysis derives from it,
+computed on first use and kept.
+
+Typical usage
+-------------
+>>> from analysis.snapshot import Snapshot
+>>> snap = Snapshot.read("final_state_Run1.DATA")
+>>> snap.chain_clusters[0]                 # number of clusters of chains
+47
+>>> plot_csize(snap); plot_neighbour_hist(snap); plot_cSizeBSF(snap)
+
+Every ``plot_*`` helper that works on a ``*.DATA`` file accepts either a
+path or a :py:class:`Snapshot`.  Passing one object through a whole
+diagnostic sweep builds the id → row map, the adjacency matrices and the
+component labels once; :py:meth:`Snapshot.read` also returns the same
+object for repeated calls on an unchanged file, so passing paths shares
+the work as well.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+try:
+    from .bond_graph import adjacency, components
+    from .chains import ChainLayout
+    from .lammps_data import LammpsData, read_data
+    from .stickers import partners
+    from .unwrap import make_whole
+except ImportError:                      # run as a loose script from analysis/
+    from bond_graph import adjacency, components
+    from chains import ChainLayout
+    from lammps_data import LammpsData, read_data
+    from stickers import partners
+    from unwrap import make_whole
+
+
+#: Atom types of the stickers (type 1 on A chains, type 3 on B chains).
+STICKER_TYPES = (1, 3)
+
+#: Bond type created between stickers by ``fix bond/create``.
+STICKER_BOND_TYPE = 3
+
+
+class Snapshot:
+    """
+    Arrays of one snapshot with lazily cached derived topology.
+
+    Parameters
+    ----------
+    ids, types, mols
+        Atom ID, type and molecule ID per atom (rows sorted by ID).
+    coords
+        ``(N, 3)`` coordinates.
+    box
+        ``(3, 2)`` ``[lo, hi]`` bounds.
+    bonds
+        ``(M, 2)`` bonded atom **IDs**.
+    bond_types
+        Type of each bond.
+    path
+        File the snapshot came from, if any.
+
+    Notes
+    -----
+    Derived attributes are properties that fill a slot on first access;
+    the snapshot must therefore be treated as immutable.
+    """
+
+    __slots__ = ("path", "ids", "types", "mols", "coords", "box", "bonds", "bond_types",
+                 "_row_of", "_bond_rows", "_adjacency", "_clusters",
+                 "_chains", "_chain_of", "_chain_adjacency", "_chain_clusters", "_layout",
+                 "_sticker_rows", "_partner", "_whole_coords")
+
+    def __init__(self,
+                 ids: np.ndarray,
+                 types: np.ndarray,
+                 mols: np.ndarray,
+                 coords: np.ndarray,
+                 box: np.ndarray,
+                 bonds: np.ndarray,
+                 bond_types: np.ndarray,
+                 path: Optional[Path] = None) -> None:
+        self.path = Path(path) if path is not None else None
+        self.ids, self.types, self.mols = ids, types, mols
+        self.coords, self.box = coords, box
+        self.bonds = np.asarray(bonds).reshape(-1, 2)
+        self.bond_types = bond_types
+        for name in self.__slots__:
+            if name.startswith("_"):
+                setattr(self, name, None)
+
+    # ---- construction --------------------------------------------------
+    @classmethod
+    def from_data(cls, data: LammpsData) -> "Snapshot":
+        """Wrap the arrays of a :py:class:`~analysis.lammps_data.LammpsData`."""
+        return cls(data.ids, data.types, data.mols, data.coords, data.box,
+                   data.bonds, data.bond_types, path=data.path)
+
+    @classmethod
+    def read(cls, data_file: str | Path) -> "Snapshot":
+        """
+        Read a ``*.DATA`` file (see :py:func:`analysis.lammps_data.read_data`);
+        the same object is returned while the file is unchanged.
+        """
+        path = Path(data_file).resolve()
+        st = path.stat()
+        return _read_memo(str(path), st.st_size, st.st_mtime_ns)
+
+    @property
+    def name(self) -> str:
+        """File name for plot titles."""
+        return self.path.name if self.path is not None else "snapshot"
+
+    @property
+    def n_atoms(self) -> int:
+        return len(self.ids)
+
+    @property
+    def box_lengths(self) -> np.ndarray:
+        return self.box[:, 1] - self.box[:, 0]
+
+    # ---- atom level ----------------------------------------------------
+    @property
+    def row_of(self) -> np.ndarray:
+        """Dense atom-ID → row array (``-1`` for IDs that are not used)."""
+        if self._row_of is None:
+            top = int(self.ids.max()) + 1 if self.n_atoms else 0
+            row_of = np.full(top, -1, dtype=np.int32 if self.n_atoms < 2**31 else np.int64)
+            row_of[self.ids] = np.arange(self.n_atoms)
+            self._row_of = row_of
+        return self._row_of
+
+    @property
+    def bond_rows(self) -> np.ndarray:
+        """``(M, 2)`` bonds as row indices."""
+        if self._bond_rows is None:
+            rows = self.row_of[self.bonds]
+            if (rows < 0).any():
+                raise KeyError("bond refers to an atom ID not in the snapshot")
+            self._bond_rows = rows
+        return self._bond_rows
+
+    @property
+    def adjacency(self):
+        """Atom-level CSR adjacency (``scipy.sparse``) of all bonds."""
+        if self._adjacency is None:
+            self._adjacency = adjacency(self.bond_rows, self.n_atoms)
+        return self._adjacency
+
+    @property
+    def clusters(self) -> tuple[int, np.ndarray]:
+        """``(n_clusters, label per atom)`` of the bond network."""
+        if self._clusters is None:
+            self._clusters = components(self.bond_rows, self.n_atoms)
+        return self._clusters
+
+    @property
+    def whole_coords(self) -> np.ndarray:
+        """``(N, 3)`` coordinates with every bonded cluster made whole
+        across the periodic boundary (see :py:mod:`analysis.unwrap`)."""
+        if self._whole_coords is None:
+            self._whole_coords = make_whole(self.coords, self.box, self.bond_rows)
+        return self._whole_coords
+
+    # ---- chain level ---------------------------------------------------
+    def _index_chains(self) -> None:
+        chains, chain_of = np.unique(self.mols, return_inverse=True)
+        self._chains, self._chain_of = chains, chain_of.ravel().astype(np.int32)
+
+    @property
+    def chains(self) -> np.ndarray:
+        """Sorted unique molecule IDs; chain *k* is ``chains[k]``."""
+        if self._chains is None:
+            self._index_chains()
+        return self._chains
+
+    @property
+    def chain_of(self) -> np.ndarray:
+        """Chain row of every atom."""
+        if self._chain_of is None:
+            self._index_chains()
+        return self._chain_of
+
+    @property
+    def layout(self) -> ChainLayout:
+        """Chain-major layout of the rows (see :py:mod:`analysis.chains`)."""
+        if self._layout is None:
+            self._layout = ChainLayout.detect(self.mols)
+        return self._layout
+
+    @property
+    def chain_coords(self) -> np.ndarray:
+        """``(n_chains, chain_len, 3)`` coordinates; a view of
+        :py:attr:`coords` when the layout is regular."""
+        return self.layout.view(self.coords)
+
+    @property
+    def chain_adjacency(self):
+        """
+        Chain-level CSR matrix: entry *(a, b)* is the number of bonds
+        between chains *a* and *b* (the diagonal holds intra-chain bonds
+        twice).
+        """
+        if self._chain_adjacency is None:
+            self._chain_adjacency = adjacency(self.chain_of[self.bond_rows], len(self.chains))
+        return self._chain_adjacency
+
+    @property
+    def chain_clusters(self) -> tuple[int, np.ndarray]:
+        """``(n_clusters, label per chain)`` of the chain-level graph."""
+        if self._chain_clusters is None:
+            self._chain_clusters = components(self.chain_of[self.bond_rows], len(self.chains))
+        return self._chain_clusters
+
+    # ---- stickers ------------------------------------------------------
+    @property
+    def sticker_rows(self) -> np.ndarray:
+        """Rows of the sticker atoms (:py:data:`STICKER_TYPES`), in ID order."""
+        if self._sticker_rows is None:
+            self._sticker_rows = np.flatnonzero(np.isin(self.types, STICKER_TYPES))
+        return self._sticker_rows
+
+    @property
+    def partner(self) -> np.ndarray:
+        """
+        For each sticker, the index (into :py:attr:`sticker_rows`) of the
+        sticker it is joined to by a :py:data:`STICKER_BOND_TYPE` bond, or
+        ``-1`` when unbound (see :py:mod:`analysis.stickers`).  Only bonds
+        joining a type-1 and a type-3 sticker count; a sticker with more
+        than one keeps its first, with a ``RuntimeWarning``.
+        """
+        if self._partner is None:
+            sticker_bonds = self.bond_rows[self.bond_types == STICKER_BOND_TYPE]
+            self._partner = partners(self.sticker_rows, sticker_bonds, self.n_atoms,
+                                     types=self.types, pair=STICKER_TYPES, strict=False)
+        return self._partner
+
+    @property
+    def sticker_chain(self) -> np.ndarray:
+        """Chain row of every sticker."""
+        return self.chain_of[self.sticker_rows]
+
+
+@lru_cache(maxsize=4)
+def _read_memo(path: str, size: int, mtime_ns: int) -> Snapshot:
+    return Snapshot.from_data(read_data(path))
+
+
+def as_snapshot(source: "str | Path | Snapshot") -> Snapshot:
+    """Return *source* itself if it is a :py:class:`Snapshot`, else read it."""
+    return source if isinstance(source, Snapshot) else Snapshot.read(source)
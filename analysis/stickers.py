@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Sticker bond state as one partner array.
+
+Typical usage
+-------------
+>>> from analysis.snapshot import Snapshot
+>>> from analysis import stickers
+>>> snap = Snapshot.read("final_state_Run1.DATA")
+>>> chain = snap.chain_of[snap.sticker_rows]     # chain of every sticker
+>>> stickers.bound_fraction(snap.partner)
+0.53
+>>> n_inter, n_intra = stickers.inter_intra(snap.partner, chain)
+>>> mult = stickers.pair_multiplicities(snap.partner, chain, len(snap.chains))
+
+``Template_input.in`` creates sticker bonds with
+``fix bond/create/random ... iparam 1 1 jparam 1 3``, so every sticker
+holds at most one bond of type 3, joining a type-1 and a type-3 sticker.
+The whole bond state of a snapshot is then a length-``n_stickers`` int32
+array: ``partner[k]`` is the sticker bound to sticker *k*, or ``-1``.
+It is built from the Bonds section in one scatter, and every statistic
+below is a mask or a ``bincount`` over it – no graph, no set of tuples.
+Stickers are numbered in the order of
+:py:attr:`analysis.snapshot.Snapshot.sticker_rows`.  Data that break the
+one-bond rule (another bonding protocol) make
+:py:attr:`~analysis.snapshot.Snapshot.partner` warn and keep one bond per
+sticker; :py:func:`partners` raises on them by default.
+"""
+
+from __future__ import annotations
+
+import warnings
+from typing import Optional, Sequence
+
+import numpy as np
+
+try:
+    from .bond_graph import degrees, pair_counts
+except ImportError:                      # run as a loose script from analysis/
+    from bond_graph import degrees, pair_counts
+
+
+def partners(sticker_rows: np.ndarray,
+             bonds: np.ndarray,
+             n_atoms: int,
+             types: Optional[np.ndarray] = None,
+             pair: Sequence[int] = (1, 3),
+             strict: bool = True) -> np.ndarray:
+    """
+    Build the partner array.
+
+    Parameters
+    ----------
+    sticker_rows
+        Rows of the sticker atoms.
+    bonds
+        ``(M, 2)`` sticker bonds as atom rows; bonds with an end that is
+        not a sticker are ignored.
+    n_atoms
+        Number of atom rows.
+    types
+        Atom type per row; if given, only bonds joining one atom of each
+        type in *pair* are kept.
+    pair
+        The two sticker types a bond must join.
+    strict
+        Raise if a sticker holds more than one bond; otherwise warn with
+        the number of such stickers and keep, in the order of *bonds*,
+        every bond whose two ends are still free.
+
+    Returns
+    -------
+    numpy.ndarray
+        ``int32`` index of each sticker's partner, ``-1`` when unbound.
+
+    Raises
+    ------
+    ValueError
+        If *strict* and a sticker has more than one bond.
+    """
+    bonds = np.asarray(bonds).reshape(-1, 2)
+    if types is not None:
+        t = np.sort(np.asarray(types)[bonds], axis=1)
+        bonds = bonds[(t[:, 0] == min(pair)) & (t[:, 1] == max(pair))]
+    slot = np.full(n_atoms, -1, dtype=np.int32)
+    slot[sticker_rows] = np.arange(len(sticker_rows))
+    pairs = slot[bonds]
+    pairs = pairs[(pairs >= 0).all(axis=1)]
+
+    held = np.bincount(pairs.ravel(), minlength=len(sticker_rows))
+    if len(held) and held.max() > 1:
+        n_over = int(np.count_nonzero(held > 1))
+        if strict:
+            raise ValueError(f"{n_over} sticker(s) hold more than one sticker bond")
+        warnings.warn(f"{n_over} sticker(s) hold more than one sticker bond; "
+                      "keeping the first bond of each", RuntimeWarning, stacklevel=2)
+        pairs = _first_bonds(pairs, held)
+    partner = np.full(len(sticker_rows), -1, dtype=np.int32)
+    partner[pairs[:, 0]] = pairs[:, 1]
+    partner[pairs[:, 1]] = pairs[:, 0]
+    return partner
+
+
+def _first_bonds(pairs: np.ndarray, held: np.ndarray) -> np.ndarray:
+    """Drop the bonds of *pairs* that reuse a sticker of an earlier bond;
+    only bonds touching a multiply-bonded sticker are looped over."""
+    clash = (held[pairs] > 1).any(axis=1)
+    taken = np.zeros(len(held), dtype=bool)
+    keep = ~clash
+    for k in np.flatnonzero(clash):
+        a, b = pairs[k]
+        if not (taken[a] or taken[b]):
+            taken[a] = taken[b] = keep[k] = True
+    return pairs[keep]
+
+
+def bond_pairs(partner: np.ndarray) -> np.ndarray:
+    """``(K, 2)`` bound sticker pairs, each once with the lower index first."""
+    i = np.flatnonzero(partner > np.arange(len(partner)))
+    return np.column_stack([i, partner[i]])
+
+
+def bound_fraction(partner: np.ndarray) -> float:
+    """Fraction of stickers that are bound (0 without stickers)."""
+    return float(np.mean(partner >= 0)) if len(partner) else 0.0
+
+
+def inter_intra(partner: np.ndarray, chain: np.ndarray) -> tuple[int, int]:
+    """
+    Number of bonds between stickers on different chains and on the
+    same chain; *chain* is the chain row of every sticker.
+    """
+    pairs = bond_pairs(partner)
+    intra = int(np.count_nonzero(chain[pairs[:, 0]] == chain[pairs[:, 1]]))
+    return len(pairs) - intra, intra
+
+
+def pair_multiplicities(partner: np.ndarray, chain: np.ndarray, n_chains: int) -> np.ndarray:
+    """Number of bonds joining each pair of different chains that share
+    at least one (in order of the chain pair)."""
+    ends = chain[bond_pairs(partner)]
+    _, counts = pair_counts(ends[ends[:, 0] != ends[:, 1]], n_chains)
+    return counts
+
+
+def chain_degrees(partner: np.ndarray, chain: np.ndarray, n_chains: int) -> np.ndarray:
+    """Number of *other* chains every chain is bonded to (parallel bonds
+    count once)."""
+    return degrees(chain[bond_pairs(partner)], n_chains)
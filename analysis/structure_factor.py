@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Static structure factor *S(q)* from gridded densities and FFTs.
+
+Typical usage
+-------------
+>>> from analysis.structure_factor import structure_factor
+>>> sq = structure_factor("traj_Run1.dump", groups=[(1, 3), (2, 4)], n_grid=128)
+>>> q, s = sq.q, sq.s()                   # s: (2, n_bins)
+
+For each group of atom types the (wrapped) positions are deposited on an
+``n_grid³`` mesh with the cloud-in-cell (CIC) scheme, the mesh is Fourier
+transformed with ``numpy.fft.rfftn``, and the assignment window
+``W(k) = Π_i sinc²(m_i / n_grid)`` is divided out.  Then
+
+    S(q) = ⟨ |ρ(q)|² ⟩ / N
+
+is averaged over all wave vectors in a shell of ``|q|`` and over frames.
+The cost per frame is *O(N + G log G)* with ``G = n_grid³`` – no pair is
+ever visited, so it runs on boxes and atom counts where a direct sum
+over ``exp(i q·r)`` or over pairs is out of reach.
+
+Wave vectors are those of the periodic box, ``q = 2π m / L``.  Close to
+the mesh Nyquist wave number ``π n_grid / L`` aliasing dominates even
+after deconvolution, so by default shells stop at half of it; raise
+``n_grid`` to reach larger *q*.
+
+:py:func:`structure_factor` spreads frames over worker processes with
+:py:func:`analysis.dump_index.reduce_frames`, like :py:func:`analysis.rdf.rdf`.
+"""
+
+from __future__ import annotations
+
+from functools import partial
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+
+try:
+    from .dump_index import DumpIndex, reduce_frames
+    from .lammps_dump import DumpFrame
+    from .neighbours import wrap_positions
+except ImportError:                      # run as a loose script from analysis/
+    from dump_index import DumpIndex, reduce_frames
+    from lammps_dump import DumpFrame
+    from neighbours import wrap_positions
+
+
+#: Dump columns a frame needs.
+COLUMNS = ("type", "x", "y", "z")
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# mesh kernels
+# ──────────────────────────────────────────────────────────────────────────
+def cic_density(coords: np.ndarray, box: np.ndarray, n_grid: int) -> np.ndarray:
+    """
+    Cloud-in-cell particle counts on an ``(n_grid,) * 3`` periodic mesh.
+
+    Every particle spreads a unit weight over the 8 mesh points around it
+    with trilinear weights, so the mesh sums to ``len(coords)``.
+    """
+    pos, lengths = wrap_positions(coords, box)
+    u = pos * (n_grid / lengths)
+    base = np.floor(u).astype(np.int64)
+    frac = u - base
+    base %= n_grid
+
+    idx, wgt = [], []
+    for corner in np.ndindex(2, 2, 2):
+        c = np.asarray(corner)
+        cell = (base + c) % n_grid
+        idx.append((cell[:, 0] * n_grid + cell[:, 1]) * n_grid + cell[:, 2])
+        wgt.append(np.prod(np.where(c, frac, 1.0 - frac), axis=1))
+    grid = np.bincount(np.concatenate(idx), weights=np.concatenate(wgt),
+                       minlength=n_grid ** 3)
+    return grid.reshape(n_grid, n_grid, n_grid)
+
+
+def _modes(n_grid: int) -> tuple[np.ndarray, np.ndarray]:
+    """Integer wave numbers of the full and the halved (``rfftn``) axis."""
+    return np.fft.fftfreq(n_grid, 1.0 / n_grid), np.fft.rfftfreq(n_grid, 1.0 / n_grid)
+
+
+def cic_window(n_grid: int) -> np.ndarray:
+    """CIC assignment window on the ``rfftn`` half-mesh."""
+    m, mz = _modes(n_grid)
+    wx = np.sinc(m / n_grid) ** 2
+    wz = np.sinc(mz / n_grid) ** 2
+    return wx[:, None, None] * wx[None, :, None] * wz[None, None, :]
+
+
+def default_shells(box: np.ndarray, n_grid: int) -> tuple[float, float]:
+    """
+    ``(q_max, bin_width)`` for *box*: half the mesh Nyquist wave number
+    and the lattice spacing ``2π / L``, both of the longest box edge.
+    """
+    box = np.asarray(box, dtype=np.float64)
+    longest = (box[:, 1] - box[:, 0]).max()
+    return 0.5 * np.pi * n_grid / longest, 2 * np.pi / longest
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# accumulator
+# ──────────────────────────────────────────────────────────────────────────
+class StructureFactor:
+    """
+    *S(q)* per type group, summed over frames.
+
+    Parameters
+    ----------
+    groups
+        Atom types of every group; e.g. ``[(1, 3), (2, 4)]``, or
+        ``[(1, 2, 3, 4)]`` for all beads.
+    n_grid
+        Mesh points per box edge.
+    q_max
+        Upper edge of the last shell (default: half the Nyquist wave
+        number of the first frame's longest edge).
+    bin_width
+        Shell width in *q* (default: ``2π / L`` of the first frame's
+        longest edge, the spacing of the wave-vector lattice).
+    """
+
+    def __init__(self,
+                 groups: Sequence[Sequence[int]] = ((1, 3), (2, 4)),
+                 n_grid: int = 128,
+                 q_max: Optional[float] = None,
+                 bin_width: Optional[float] = None) -> None:
+        self.groups = [tuple(int(t) for t in np.atleast_1d(g)) for g in groups]
+        self.n_grid = n_grid
+        self.q_max = q_max
+        self.bin_width = bin_width
+        self.sums: Optional[np.ndarray] = None     # Σ mode-weighted S per shell
+        self.modes: Optional[np.ndarray] = None    # Σ mode count per shell
+        self.n_frames = 0
+        self._window = cic_window(n_grid)
+
+    @property
+    def n_bins(self) -> int:
+        return int(np.ceil(self.q_max / self.bin_width)) if self.bin_width else 0
+
+    @property
+    def q(self) -> np.ndarray:
+        """Shell centres."""
+        return (np.arange(self.n_bins) + 0.5) * self.bin_width
+
+    def _shells(self, lengths: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Shell index and ``rfftn`` multiplicity of every mesh mode."""
+        m, mz = _modes(self.n_grid)
+        qx, qy, qz = (2 * np.pi * m / lengths[0], 2 * np.pi * m / lengths[1],
+                      2 * np.pi * mz / lengths[2])
+        q = np.sqrt(qx[:, None, None] ** 2 + qy[None, :, None] ** 2 + qz[None, None, :] ** 2)
+        shell = (q / self.bin_width).astype(np.int64)
+        shell[q == 0] = self.n_bins                 # drop q = 0
+        shell[shell > self.n_bins] = self.n_bins
+        # modes with 0 < m_z < n/2 stand for themselves and their conjugate
+        mult = np.where((mz > 0) & (2 * mz < self.n_grid), 2.0, 1.0)
+        return shell.ravel(), np.broadcast_to(mult, q.shape).ravel()
+
+    def add(self, types: np.ndarray, coords: np.ndarray, box: np.ndarray) -> None:
+        """Accumulate one configuration in the periodic *box*."""
+        box = np.asarray(box, dtype=np.float64)
+        lengths = box[:, 1] - box[:, 0]
+        if self.q_max is None or self.bin_width is None:
+            q_max, bin_width = default_shells(box, self.n_grid)
+            self.q_max = self.q_max or q_max
+            self.bin_width = self.bin_width or bin_width
+        if self.sums is None:
+            self.sums = np.zeros((len(self.groups), self.n_bins))
+            self.modes = np.zeros(self.n_bins)
+
+        shell, mult = self._shells(lengths)
+        size = self.n_bins + 1
+        self.modes += np.bincount(shell, weights=mult, minlength=size)[:-1]
+        for g, group in enumerate(self.groups):
+            sel = np.isin(types, group)
+            n = int(np.count_nonzero(sel))
+            if n == 0:
+                continue
+            rho = np.fft.rfftn(cic_density(np.asarray(coords)[sel], box, self.n_grid))
+            power = (np.abs(rho / self._window) ** 2).ravel() / n
+            self.sums[g] += np.bincount(shell, weights=mult * power, minlength=size)[:-1]
+        self.n_frames += 1
+
+    def add_frame(self, frame: DumpFrame) -> None:
+        """Accumulate a dump frame (needs the :py:data:`COLUMNS`)."""
+        self.add(frame["type"], frame.xyz(), frame.box)
+
+    def __add__(self, other: "StructureFactor") -> "StructureFactor":
+        if other.n_frames == 0:
+            return self
+        if self.n_frames == 0:
+            return other
+        if (other.groups, other.n_grid, other.n_bins, other.bin_width) != \
+                (self.groups, self.n_grid, self.n_bins, self.bin_width):
+            raise ValueError("cannot add StructureFactor objects with different settings")
+        total = StructureFactor(self.groups, self.n_grid, self.q_max, self.bin_width)
+        total.sums = self.sums + other.sums
+        total.modes = self.modes + other.modes
+        total.n_frames = self.n_frames + other.n_frames
+        return total
+
+    def s(self) -> np.ndarray:
+        """``(n_groups, n_bins)`` shell-averaged *S(q)*; NaN for empty shells."""
+        if self.sums is None:
+            return np.empty((len(self.groups), 0))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.modes > 0, self.sums / self.modes, np.nan)
+
+
+def _frame_sq(groups: list, n_grid: int, q_max: Optional[float],
+              bin_width: Optional[float], frame: DumpFrame) -> StructureFactor:
+    sq = StructureFactor(groups, n_grid, q_max, bin_width)
+    sq.add_frame(frame)
+    return sq
+
+
+def structure_factor(dump_file: str | Path,
+                     groups: Sequence[Sequence[int]] = ((1, 3), (2, 4)),
+                     n_grid: int = 128,
+                     q_max: Optional[float] = None,
+                     bin_width: Optional[float] = None,
+                     frames: Optional[Sequence[int]] = None,
+                     workers: Optional[int] = None) -> StructureFactor:
+    """
+    *S(q)* of a ``dump custom`` trajectory.
+
+    Parameters
+    ----------
+    dump_file
+        ``traj_<fName>.dump`` with ``type`` and ``x y z`` columns.
+    groups, n_grid, q_max, bin_width
+        See :py:class:`StructureFactor`; the defaults for *q_max* and
+        *bin_width* come from the box of frame 0, so all workers agree.
+    frames
+        Frame numbers to use (default: all).
+    workers
+        Worker processes (default: ``os.cpu_count()``; ``1`` = serial).
+    """
+    index = DumpIndex(dump_file)
+    chosen = index.select() if frames is None else np.asarray(frames, dtype=np.int64)
+    if len(chosen) and (q_max is None or bin_width is None):
+        default_q_max, default_width = default_shells(index.frames["box"][chosen[0]], n_grid)
+        q_max, bin_width = q_max or default_q_max, bin_width or default_width
+    func = partial(_frame_sq, [tuple(np.atleast_1d(g)) for g in groups], n_grid, q_max, bin_width)
+    total = reduce_frames(dump_file, func, frames=frames, columns=COLUMNS, workers=workers)
+    return total if total is not None else StructureFactor(groups, n_grid, q_max, bin_width)
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Columnar, chunked on-disk store for LAMMPS trajectories.
+
+Typical usage
+-------------
+>>> from analysis.traj_store import convert_dump, TrajStore
+>>> convert_dump("traj_Run1.dump")                  # → traj_Run1.ctraj/
+>>> store = TrajStore("traj_Run1.ctraj")
+>>> xu = store.read("xu", frames=slice(-10, None))  # (10, N) float32
+>>> types = store.static("type")
+>>> for frame in store.iter_frames(step=5, columns=["type", "x", "y", "z"]):
+...     ...                                         # DumpFrame, as iter_dump
+
+Layout ::
+
+    traj_Run1.ctraj/
+        manifest.json          # atoms, frames, chunking, column codecs
+        timestep.npy  box.npy  # (F,) and (F, 3, 2)
+        static/id.npy  static/type.npy  static/mol.npy  static/mass.npy
+        xu/000000.npy  xu/000001.npy ...   # (chunk_frames, N) per chunk
+        yu/...  zu/...
+
+Per-atom columns that never change (``id type mol mass``) are stored once.
+Every other column is a ``(frames, atoms)`` array split along the frame
+axis into chunks, either as raw ``.npy`` (memory-mapped on read),
+zlib-compressed ``.npz`` or – for archives – coordinates quantised and
+bit-packed by :py:mod:`analysis.quantize`.  Wrapped ``x y z`` are not stored when the
+unwrapped ``xu yu zu`` are present – they are re-derived from the box on
+read.  A reader therefore only touches the files of the columns and
+chunks it asks for.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Iterator, Optional, Sequence
+
+import numpy as np
+
+try:
+    from .lammps_dump import DumpFrame, INT_COLUMNS, iter_dump
+    from .quantize import dequantize, quantize
+except ImportError:                      # run as a loose script from analysis/
+    from lammps_dump import DumpFrame, INT_COLUMNS, iter_dump
+    from quantize import dequantize, quantize
+
+
+STORE_SUFFIX = ".ctraj"
+_MANIFEST = "manifest.json"
+_FORMAT_VERSION = 1
+
+#: Columns stored once instead of per frame.
+STATIC_COLUMNS = ("id", "type", "mol", "mass")
+
+_WRAPPED = {"x": "xu", "y": "yu", "z": "zu"}
+_AXIS = {"x": 0, "y": 1, "z": 2, "xu": 0, "yu": 1, "zu": 2}
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# chunk codecs
+# ──────────────────────────────────────────────────────────────────────────
+def _save_chunk(path: Path, chunk: np.ndarray, spec: dict,
+                box: Optional[np.ndarray] = None) -> None:
+    codec = spec["codec"]
+    if codec == "raw":
+        np.save(path.with_suffix(".npy"), chunk)
+    elif codec == "zlib":
+        np.savez_compressed(path.with_suffix(".npz"), data=chunk)
+    elif codec == "quant":
+        lo, hi = box[spec["axis"]]
+        block = quantize(chunk, lo, hi - lo, spec["precision"], spec["periodic"])
+        spec["max_error"] = max(spec["max_error"], float(block["max_error"]))
+        np.savez(path.with_suffix(".npz"), **block)
+    else:
+        raise ValueError(f"unknown codec '{codec}'")
+
+
+def _load_chunk(path: Path, codec: str) -> np.ndarray:
+    if codec == "raw":
+        return np.load(path.with_suffix(".npy"), mmap_mode="r")
+    with np.load(path.with_suffix(".npz")) as z:
+        return dequantize(z) if codec == "quant" else z["data"]
+
+
+def _column_spec(name: str, dtype: np.dtype, codec: str,
+                 precision: Optional[float], boundary: str) -> dict:
+    axis = _AXIS.get(name)
+    if precision is None or axis is None:
+        return {"dtype": dtype.str, "codec": codec}
+    flags = boundary.split()
+    return {"dtype": np.dtype(np.float32).str, "codec": "quant", "axis": axis,
+            "precision": precision, "max_error": 0.0,
+            "periodic": name in _WRAPPED and len(flags) == 3 and flags[axis] == "pp"}
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# conversion
+# ──────────────────────────────────────────────────────────────────────────
+def default_store_path(dump_file: str | Path) -> Path:
+    """``traj_Run1.dump`` → ``traj_Run1.ctraj``."""
+    dump_file = Path(dump_file)
+    return dump_file.with_name(dump_file.stem + STORE_SUFFIX)
+
+
+class _ChunkWriter:
+    """Buffers ``chunk_frames`` frames of one column, then writes them."""
+
+    def __init__(self, directory: Path, n_atoms: int, chunk_frames: int,
+                 spec: dict) -> None:
+        directory.mkdir()
+        self.directory, self.spec = directory, spec
+        # the quantiser sees full-precision input, its output is float32
+        dtype = np.float64 if spec["codec"] == "quant" else np.dtype(spec["dtype"])
+        self.buffer = np.empty((chunk_frames, n_atoms), dtype=dtype)
+        self.box: Optional[np.ndarray] = None
+        self.fill = 0
+        self.n_chunks = 0
+
+    def append(self, values: np.ndarray, box: np.ndarray) -> None:
+        if self.fill == 0:
+            self.box = box                     # quantisation grid of the chunk
+        self.buffer[self.fill] = values
+        self.fill += 1
+        if self.fill == len(self.buffer):
+            self.flush()
+
+    def flush(self) -> None:
+        if self.fill:
+            _save_chunk(self.directory / f"{self.n_chunks:06d}",
+                        self.buffer[:self.fill], self.spec, self.box)
+            self.n_chunks += 1
+            self.fill = 0
+
+
+def convert_dump(dump_file: str | Path,
+                 out: Optional[str | Path] = None,
+                 chunk_frames: int = 8,
+                 compress: bool = True,
+                 float_dtype: np.dtype | type = np.float32,
+                 derive_wrapped: bool = True,
+                 precision: Optional[float] = None,
+                 overwrite: bool = False) -> Path:
+    """
+    Convert a ``dump custom`` file into a :py:class:`TrajStore` directory.
+
+    Parameters
+    ----------
+    dump_file
+        Path to ``traj_<fName>.dump``, plain or compressed.
+    out
+        Store directory (default ``traj_<fName>.ctraj`` next to the dump).
+    chunk_frames
+        Frames per chunk file – the unit of I/O on read.
+    compress
+        zlib-compress chunks (``.npz``); otherwise raw, memory-mappable
+        ``.npy``.
+    float_dtype
+        On-disk type of float columns.  ``float32`` keeps the 6 significant
+        digits LAMMPS writes by default.
+    derive_wrapped
+        Skip ``x y z`` when ``xu yu zu`` are dumped as well; the reader
+        re-wraps the unwrapped coordinates into the box.
+    precision
+        If given, store coordinate columns lossily with
+        :py:func:`analysis.quantize.quantize` on a grid of ``precision`` ×
+        box length; the worst error per column is recorded in the
+        manifest (see :py:meth:`TrajStore.max_error`).
+    overwrite
+        Replace an existing store.
+
+    Returns
+    -------
+    pathlib.Path
+        The store directory.
+
+    Raises
+    ------
+    FileExistsError
+        If *out* exists and *overwrite* is false.
+    ValueError
+        If the dump has no complete frame, or the atom count or a static
+        column changes between frames.
+    """
+    out = Path(out) if out is not None else default_store_path(dump_file)
+    if out.exists():
+        if not overwrite:
+            raise FileExistsError(f"{out} exists (pass overwrite=True)")
+        shutil.rmtree(out)
+    tmp = out.with_name(out.name + ".partial")
+    if tmp.exists():
+        shutil.rmtree(tmp)
+    tmp.mkdir(parents=True)
+
+    codec = "zlib" if compress else "raw"
+    timesteps, boxes = [], []
+    writers: dict[str, _ChunkWriter] = {}
+    static: dict[str, np.ndarray] = {}
+    manifest: dict = {}
+
+    try:
+        for frame in iter_dump(dump_file):
+            if not manifest:
+                names = list(frame.columns)
+                skip = ({w for w, u in _WRAPPED.items() if u in names}
+                        if derive_wrapped else set())
+                static = {n: frame[n] for n in names if n in STATIC_COLUMNS}
+                (tmp / "static").mkdir()
+                for n, values in static.items():
+                    np.save(tmp / "static" / f"{n}.npy", values)
+                dynamic = [n for n in names if n not in static and n not in skip]
+                for n in dynamic:
+                    dtype = np.dtype(np.int32 if n in INT_COLUMNS else float_dtype)
+                    spec = _column_spec(n, dtype, codec, precision, frame.boundary)
+                    writers[n] = _ChunkWriter(tmp / n, frame.n_atoms, chunk_frames, spec)
+                manifest = {
+                    "version": _FORMAT_VERSION,
+                    "source": str(Path(dump_file).name),
+                    "n_atoms": frame.n_atoms,
+                    "chunk_frames": chunk_frames,
+                    "boundary": frame.boundary,
+                    "names": names,
+                    "static": list(static),
+                    "derived": sorted(skip),
+                    "columns": {n: writers[n].spec for n in dynamic},
+                }
+
+            if frame.n_atoms != manifest["n_atoms"]:
+                raise ValueError(f"atom count changes at timestep {frame.timestep}")
+            for n, values in static.items():
+                if not np.array_equal(frame[n], values):
+                    raise ValueError(f"static column '{n}' changes at "
+                                     f"timestep {frame.timestep}")
+            for n, writer in writers.items():
+                writer.append(frame[n], frame.box)
+            timesteps.append(frame.timestep)
+            boxes.append(frame.box)
+
+        if not manifest:
+            raise ValueError(f"no complete frames in {dump_file}")
+        for writer in writers.values():
+            writer.flush()
+        manifest["n_frames"] = len(timesteps)
+        np.save(tmp / "timestep.npy", np.asarray(timesteps, dtype=np.int64))
+        np.save(tmp / "box.npy", np.asarray(boxes, dtype=np.float64).reshape(-1, 3, 2))
+        (tmp / _MANIFEST).write_text(json.dumps(manifest, indent=1))
+        os.replace(tmp, out)
+    finally:
+        if tmp.exists():
+            shutil.rmtree(tmp, ignore_errors=True)
+    return out
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# reader
+# ──────────────────────────────────────────────────────────────────────────
+class TrajStore:
+    """
+    Read-only access to a store written by :py:func:`convert_dump`.
+
+    Parameters
+    ----------
+    path
+        Store directory (``*.ctraj``).
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.manifest = json.loads((self.path / _MANIFEST).read_text())
+        if self.manifest.get("version") != _FORMAT_VERSION:
+            raise ValueError(f"unsupported store version in {self.path}")
+        self.timesteps = np.load(self.path / "timestep.npy")
+        self.boxes = np.load(self.path / "box.npy")
+        self._static: dict[str, np.ndarray] = {}
+
+    # ---- metadata ------------------------------------------------------
+    def __len__(self) -> int:
+        return int(self.manifest["n_frames"])
+
+    @property
+    def n_atoms(self) -> int:
+        return int(self.manifest["n_atoms"])
+
+    @property
+    def names(self) -> list[str]:
+        """All per-atom columns of the source dump (stored or derived)."""
+        return list(self.manifest["names"])
+
+    @property
+    def boundary(self) -> str:
+        return self.manifest["boundary"]
+
+    def max_error(self, name: str) -> float:
+        """Worst absolute error of column *name* (0 for lossless columns;
+        derived ``x y z`` inherit the error of ``xu yu zu``)."""
+        name = _WRAPPED.get(name, name) if name in self.manifest["derived"] else name
+        return float(self.manifest["columns"].get(name, {}).get("max_error", 0.0))
+
+    def static(self, name: str) -> np.ndarray:
+        """Per-atom column stored once (``id``, ``type``, ``mol``, ``mass``)."""
+        if name not in self._static:
+            if name not in self.manifest["static"]:
+                raise KeyError(f"'{name}' is not a static column of {self.path.name}")
+            self._static[name] = np.load(self.path / "static" / f"{name}.npy",
+                                         mmap_mode="r")
+        return self._static[name]
+
+    def _atom_mask(self,
+                   types: Optional[Sequence[int]],
+                   mols: Optional[Sequence[int]]) -> Optional[np.ndarray]:
+        """Indices of the atoms of *types* / *mols*; *None* for all."""
+        if types is None and mols is None:
+            return None
+        keep = np.ones(self.n_atoms, dtype=bool)
+        if types is not None:
+            keep &= np.isin(self.static("type"), types)
+        if mols is not None:
+            keep &= np.isin(self.static("mol"), mols)
+        return np.flatnonzero(keep)
+
+    def _frames(self, frames) -> np.ndarray:
+        if frames is None:
+            return np.arange(len(self))
+        if isinstance(frames, slice):
+            return np.arange(len(self))[frames]
+        idx = np.atleast_1d(np.asarray(frames, dtype=np.int64))
+        return np.where(idx < 0, idx + len(self), idx)
+
+    # ---- column access -------------------------------------------------
+    def _read_stored(self, name: str, frames: np.ndarray) -> np.ndarray:
+        spec = self.manifest["columns"][name]
+        cf = int(self.manifest["chunk_frames"])
+        out = np.empty((len(frames), self.n_atoms), dtype=np.dtype(spec["dtype"]))
+        chunk_of = frames // cf
+        for c in np.unique(chunk_of):
+            rows = np.flatnonzero(chunk_of == c)
+            chunk = _load_chunk(self.path / name / f"{c:06d}", spec["codec"])
+            out[rows] = chunk[frames[rows] - c * cf]
+        return out
+
+    def read(self, name: str, frames=None) -> np.ndarray:
+        """
+        Return column *name* for the selected frames.
+
+        Parameters
+        ----------
+        name
+            Any column of :py:attr:`names`.
+        frames
+            *None* (all), a ``slice`` or a sequence of frame numbers.
+
+        Returns
+        -------
+        numpy.ndarray
+            ``(n_frames, n_atoms)`` array (static columns are broadcast).
+        """
+        frames = self._frames(frames)
+        if name in self.manifest["static"]:
+            return np.broadcast_to(self.static(name), (len(frames), self.n_atoms))
+        if name in self.manifest["columns"]:
+            return self._read_stored(name, frames)
+        if name in self.manifest["derived"]:
+            axis = "xyz".index(name)
+            lo = self.boxes[frames, axis, 0][:, None]
+            length = (self.boxes[frames, axis, 1] - self.boxes[frames, axis, 0])[:, None]
+            unwrapped = self._read_stored(_WRAPPED[name], frames)
+            return (lo + np.mod(unwrapped - lo, length)).astype(unwrapped.dtype)
+        raise KeyError(f"column '{name}' not in {self.path.name}")
+
+    def frame(self, i: int, columns: Optional[Sequence[str]] = None) -> DumpFrame:
+        """Frame number *i* as a :py:class:`~analysis.lammps_dump.DumpFrame`."""
+        return next(self.iter_frames(frames=[i], columns=columns))
+
+    def iter_frames(self,
+                    start: Optional[int] = None,
+                    stop: Optional[int] = None,
+                    step: Optional[int] = None,
+                    frames: Optional[Sequence[int]] = None,
+                    columns: Optional[Sequence[str]] = None,
+                    types: Optional[Sequence[int]] = None,
+                    mols: Optional[Sequence[int]] = None) -> Iterator[DumpFrame]:
+        """
+        Yield frames as :py:class:`~analysis.lammps_dump.DumpFrame`, reading
+        one chunk of the requested columns at a time.
+
+        *types* / *mols* keep only those atoms; the selection is made once
+        from the static ``type`` / ``mol`` columns and applied to every
+        chunk as it is decoded.
+        """
+        chosen = self._frames(slice(start, stop, step) if frames is None else frames)
+        columns = list(columns or self.names)
+        atoms = self._atom_mask(types, mols)
+        static = {n: (self.static(n) if atoms is None else self.static(n)[atoms])
+                  for n in columns if n in self.manifest["static"]}
+        cf = int(self.manifest["chunk_frames"])
+        breaks = np.flatnonzero(np.diff(chosen // cf)) + 1
+        for block in np.split(chosen, breaks):
+            data = {n: (None if n in self.manifest["static"] else self.read(n, block))
+                    for n in columns}
+            if atoms is not None:
+                data = {n: (v if v is None else v[:, atoms]) for n, v in data.items()}
+            for k, i in enumerate(block):
+                cols = {n: (static[n] if v is None else v[k]) for n, v in data.items()}
+                yield DumpFrame(int(self.timesteps[i]), self.boxes[i], self.boundary, cols)
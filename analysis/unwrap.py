@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Make bonded or touching clusters whole across the periodic boundary.
+
+Typical usage
+-------------
+>>> from analysis.snapshot import Snapshot
+>>> from analysis.unwrap import make_whole
+>>> snap = Snapshot.read("final_state_Run1.DATA")
+>>> x = snap.whole_coords                    # every bonded cluster in one piece
+>>> x = make_whole(frame.xyz(), frame.box, contact_edges(frame.xyz(), 15.0, frame.box))
+
+Wrapped ``x y z`` cut a droplet that straddles the boundary into pieces,
+``xu yu zu`` let chains of one droplet drift whole box lengths apart
+over a long run, and ``*.DATA`` files only hold wrapped positions.
+:py:func:`make_whole` rebuilds every connected component of a graph –
+the bonds, or contacts within a cutoff – around one root atom: a
+breadth-first search starting from the roots of *all* components at
+once advances a frontier array level by level, and each newly reached
+atom is placed at the periodic image closest to the atom it was reached
+from.  Every level is a handful of array operations on the CSR
+adjacency, so a frame costs *O(N + bonds)* however many clusters it has.
+
+The result is only meaningful for clusters that do not percolate, i.e.
+do not connect to their own periodic image.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+
+try:
+    from .bond_graph import adjacency, components
+except ImportError:                      # run as a loose script from analysis/
+    from bond_graph import adjacency, components
+
+
+def _neighbours(indptr: np.ndarray, indices: np.ndarray,
+                nodes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """``(source, neighbour)`` for every CSR entry in the rows of *nodes*."""
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+    source = np.repeat(nodes, counts)
+    offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return source, indices[np.repeat(starts, counts) + offset]
+
+
+def make_whole(coords: np.ndarray,
+               box: np.ndarray,
+               edges: np.ndarray,
+               roots: Optional[np.ndarray] = None,
+               recentre: bool = True) -> np.ndarray:
+    """
+    Coordinates with every connected component of *edges* made whole.
+
+    Parameters
+    ----------
+    coords
+        ``(N, 3)`` positions (wrapped or unwrapped).
+    box
+        ``(3, 2)`` periodic box bounds.
+    edges
+        ``(M, 2)`` row pairs: bonds (``Snapshot.bond_rows``) or contacts
+        (:py:func:`analysis.neighbours.contact_edges`).
+    roots
+        One row per component that keeps its position (default: the
+        first row of each component).
+    recentre
+        Shift each component by whole box lengths so that its mean
+        position lies inside the box.
+
+    Returns
+    -------
+    numpy.ndarray
+        ``(N, 3)`` float64 positions; atoms without edges are unchanged.
+    """
+    box = np.asarray(box, dtype=np.float64)
+    lengths = box[:, 1] - box[:, 0]
+    src = np.asarray(coords, dtype=np.float64)
+    out = src.copy()
+    n = len(src)
+    if n == 0:
+        return out
+
+    adj = adjacency(edges, n)
+    n_comp, label = components(edges, n)
+    if roots is None:
+        roots = np.unique(label, return_index=True)[1]
+
+    seen = np.zeros(n, dtype=bool)
+    seen[roots] = True
+    frontier = np.asarray(roots)
+    while len(frontier):
+        parent, child = _neighbours(adj.indptr, adj.indices, frontier)
+        fresh = ~seen[child]
+        parent, child = parent[fresh], child[fresh]
+        child, first = np.unique(child, return_index=True)   # one parent each
+        parent = parent[first]
+
+        step = src[child] - out[parent]
+        step -= lengths * np.rint(step / lengths)
+        out[child] = out[parent] + step
+        seen[child] = True
+        frontier = child
+
+    if recentre:
+        size = np.bincount(label, minlength=n_comp)[:, None]
+        mean = np.stack([np.bincount(label, weights=out[:, k], minlength=n_comp)
+                         for k in range(3)], axis=1) / size
+        out -= (lengths * np.floor((mean - box[:, 0]) / lengths))[label]
+    return out